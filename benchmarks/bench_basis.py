@@ -0,0 +1,59 @@
+"""Batch basis engine vs per-object mocapy evaluation.
+
+Evaluates the first J polynomials (J = 15..231, i.e. n <= 4..20) on a
+512x512 polar grid, checks the values against mocapy.zernike to 1e-12 and
+reports the speedup.
+
+    python -m benchmarks.bench_basis [--resolution 512] [--n-max 20]
+"""
+import argparse
+import time
+
+import numpy as np
+from mocapy.zernike import Zernike
+
+from zernikestreamlit.basis import n_max_to_J, osa_nm, zernike_matrix
+from zernikestreamlit.grid import PolarGrid
+
+TOLERANCE = 1e-12
+
+
+def per_object(n, m, rho, theta, ortho_norm):
+    return np.stack([np.broadcast_to(Zernike(nj, mj, ortho_norm)(rho, theta), rho.shape)
+                     for nj, mj in zip(n, m)])
+
+
+def best_of(func, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolution", type=int, default=512)
+    parser.add_argument("--n-min", type=int, default=4)
+    parser.add_argument("--n-max", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ortho-norm", action="store_true")
+    args = parser.parse_args()
+
+    grid = PolarGrid(args.resolution)
+    rho, theta = np.ascontiguousarray(grid.rho), np.ascontiguousarray(grid.theta)
+    print(f"grid {args.resolution}x{args.resolution}, ortho_norm={args.ortho_norm}")
+    print(f"{'n_max':>5} {'J':>4} {'mocapy [s]':>11} {'batch [s]':>10} {'speedup':>8} {'max |err|':>10}")
+    for n_max in range(args.n_min, args.n_max + 1):
+        J = n_max_to_J(n_max)
+        n, m = osa_nm(J)
+        t_ref, ref = best_of(lambda: per_object(n, m, rho, theta, args.ortho_norm), 1)
+        t_new, new = best_of(lambda: zernike_matrix(n, m, rho, theta, args.ortho_norm), args.repeat)
+        err = np.abs(new - ref).max()
+        flag = "" if err <= TOLERANCE else "  <-- above tolerance"
+        print(f"{n_max:>5} {J:>4} {t_ref:>11.3f} {t_new:>10.3f} {t_ref / t_new:>7.1f}x {err:>10.1e}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Accuracy and speed of the derivative bases and of slope fitting.
+
+The derivative basis from the sparse derivative matrices is compared with
+central finite differences of the basis, and slopes of random coefficient
+vectors are fitted back to their coefficients.
+
+    python -m benchmarks.bench_derivatives [--resolution 101] [--n-max 10] [--surfaces 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from zernikestreamlit.basis import n_max_to_J, osa_nm, zernike_matrix
+from zernikestreamlit.derivatives import derivative_matrices, get_slope_fitter, gradient_matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolution", type=int, default=101)
+    parser.add_argument("--n-max", type=int, default=10)
+    parser.add_argument("--surfaces", type=int, default=1000)
+    parser.add_argument("--step", type=float, default=1e-6, help="finite-difference step")
+    args = parser.parse_args()
+
+    x, y = np.meshgrid(np.linspace(-1, 1, args.resolution), np.linspace(-1, 1, args.resolution))
+    inside = np.hypot(x, y) <= 1
+    x, y = x[inside], y[inside]
+    n, m = osa_nm(n_max_to_J(args.n_max))
+
+    def basis(x, y):
+        return zernike_matrix(n, m, np.hypot(x, y), np.arctan2(y, x))
+
+    start = time.perf_counter()
+    derivative_matrices(args.n_max)
+    matrices = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dx, dy = gradient_matrix(n, m, np.hypot(x, y), np.arctan2(y, x))
+    gradient = time.perf_counter() - start
+
+    h = args.step
+    fd_x = (basis(x + h, y) - basis(x - h, y)) / (2 * h)
+    fd_y = (basis(x, y + h) - basis(x, y - h)) / (2 * h)
+    scale = max(np.abs(fd_x).max(), np.abs(fd_y).max())
+    error = max(np.abs(dx - fd_x).max(), np.abs(dy - fd_y).max()) / scale
+
+    rng = np.random.default_rng(0)
+    coefs = rng.normal(size=(args.surfaces, len(n)))
+    coefs[:, 0] = 0
+    gx, gy = coefs @ dx, coefs @ dy
+
+    start = time.perf_counter()
+    fitter = get_slope_fitter(x, y, args.n_max)
+    factorization = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fitted = fitter.fit(gx, gy)
+    rate = args.surfaces / (time.perf_counter() - start)
+
+    print(f"{inside.sum()} points in a {args.resolution}x{args.resolution} pupil, n_max={args.n_max} (J={len(n)})")
+    print(f"derivative matrices (once per n_max)  : {matrices * 1e3:.1f} ms")
+    print(f"derivative bases dx, dy               : {gradient * 1e3:.1f} ms")
+    print(f"relative error vs finite differences  : {error:.1e}")
+    print(f"slope fit factorization (once per key): {factorization * 1e3:.1f} ms")
+    print(f"slope fit, whole stack                : {rate:10.1f} fits/s")
+    print(f"max |coef error| of the slope fit     : {np.abs(fitted - coefs).max():.1e}")
+
+
+if __name__ == "__main__":
+    main()
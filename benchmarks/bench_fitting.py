@@ -0,0 +1,60 @@
+"""Fits per second: WaveFront.from_sampled_wavefront vs the cached-factorization fitter.
+
+Uses the 101x101 polar sampling of the rotation check on page 4.
+
+    python -m benchmarks.bench_fitting [--resolution 101] [--n-max 8] [--surfaces 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+from mocapy.zernike import WaveFront
+
+from zernikestreamlit.basis import n_max_to_J, osa_nm, zernike_matrix
+from zernikestreamlit.fitting import get_fitter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolution", type=int, default=101)
+    parser.add_argument("--n-max", type=int, default=8)
+    parser.add_argument("--surfaces", type=int, default=1000)
+    parser.add_argument("--reference-surfaces", type=int, default=10,
+                        help="number of surfaces fitted through WaveFront.from_sampled_wavefront")
+    args = parser.parse_args()
+
+    rho, theta = np.meshgrid(np.linspace(0, 1, args.resolution), np.linspace(0, 2 * np.pi, args.resolution))
+    x, y = rho * np.cos(theta), rho * np.sin(theta)
+    n, m = osa_nm(n_max_to_J(args.n_max))
+    rng = np.random.default_rng(0)
+    coefs = rng.normal(size=(args.surfaces, len(n)))
+    zs = np.einsum("kj,jhw->khw", coefs, zernike_matrix(n, m, rho, theta))
+
+    start = time.perf_counter()
+    for k in range(args.reference_surfaces):
+        WaveFront.from_sampled_wavefront(x, y, zs[k])
+    reference_rate = args.reference_surfaces / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    fitter = get_fitter(x, y, args.n_max)
+    factorization = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for k in range(args.surfaces):
+        fitter.fit(zs[k])
+    single_rate = args.surfaces / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    fitted = fitter.fit(zs)
+    stack_rate = args.surfaces / (time.perf_counter() - start)
+
+    print(f"sampling {args.resolution}x{args.resolution}, n_max={args.n_max} (J={len(n)}), {args.surfaces} surfaces")
+    print(f"max |coef error|                      : {np.abs(fitted - coefs).max():.1e}")
+    print(f"factorization (once per key)          : {factorization * 1e3:.1f} ms")
+    print(f"WaveFront.from_sampled_wavefront      : {reference_rate:10.1f} fits/s")
+    print(f"cached fitter, one surface per call   : {single_rate:10.1f} fits/s  ({single_rate / reference_rate:.0f}x)")
+    print(f"cached fitter, whole (K, H, W) stack  : {stack_rate:10.1f} fits/s  ({stack_rate / reference_rate:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
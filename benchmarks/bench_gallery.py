@@ -0,0 +1,32 @@
+"""Build time of the Radial gallery: evaluation of the polynomials against figure rendering.
+
+The polynomials are evaluated in one pass of the radial recurrence; the PNG
+rendering of the three matplotlib figures dominates the build.
+
+    python -m benchmarks.bench_gallery [--polynomials 30 100 300]
+"""
+import argparse
+import time
+
+from zernikestreamlit.gallery import build, radial_pairs, radial_values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--polynomials", type=int, nargs="+", default=[30, 100, 300])
+    args = parser.parse_args()
+
+    print(f"{'polynomials':>11} {'n_max':>6} {'evaluate [ms]':>14} {'build [s]':>10}")
+    for polynomials in args.polynomials:
+        pairs = radial_pairs(polynomials)
+        start = time.perf_counter()
+        radial_values(pairs)
+        evaluate = time.perf_counter() - start
+        start = time.perf_counter()
+        build(polynomials)
+        total = time.perf_counter() - start
+        print(f"{polynomials:>11} {pairs[-1][0]:>6} {evaluate * 1e3:>14.2f} {total:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
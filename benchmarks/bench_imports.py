@@ -0,0 +1,133 @@
+"""Cold-start and first-paint import cost of the app and of each page.
+
+Each script runs in a fresh interpreter under ``python -X importtime`` in
+Streamlit's bare mode, so the measurement covers every module imported up to
+the end of the first paint, including those loaded lazily by widgets. The cost
+of ``import streamlit`` itself is measured separately and subtracted.
+
+    python -m benchmarks.bench_imports [--save imports.json] [--baseline imports.json] [--threshold 0.2]
+
+Each script is run ``--repeat`` times and the fastest run is kept, to smooth
+out the noise of the interpreter start-up.
+
+With ``--baseline``, pages whose import or wall time grew by more than
+``threshold`` (relative) and ``min-delta`` (absolute) are reported and the
+exit status is 1.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_DIR = ROOT / "zernikestreamlit"
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+RUNNER = """
+import runpy, sys
+sys.argv = [{path!r}]
+runpy.run_path({path!r}, run_name="__main__")
+"""
+
+
+def scripts():
+    yield "app", APP_DIR / "zernikestreamlit_app.py"
+    for page in sorted((APP_DIR / "pages").glob("*.py")):
+        yield page.stem, page
+
+
+def importtime(code):
+    """Total top-level import time [ms], per-module cumulative times [ms], wall time [ms], and errors."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(ROOT), os.environ.get("PYTHONPATH", "")]))
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = (time.perf_counter() - start) * 1e3
+    total, modules, errors = 0.0, {}, []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match is None:
+            if line.strip() and not line.startswith("import time:"):
+                errors.append(line)
+            continue
+        cumulative, indent, name = int(match[2]) / 1e3, len(match[3]), match[4]
+        modules[name] = cumulative
+        # top-level imports are indented by a single space
+        if indent == 1:
+            total += cumulative
+    if proc.returncode:
+        errors.append(f"exit status {proc.returncode}")
+    return total, modules, wall, errors
+
+
+def best_of(code, repeat):
+    runs = [importtime(code) for _ in range(repeat)]
+    total = min(run[0] for run in runs)
+    wall = min(run[2] for run in runs)
+    return total, runs[-1][1], wall, runs[-1][3]
+
+
+def measure(top, repeat):
+    base_total, base_modules, base_wall, _ = best_of("import streamlit", repeat)
+    results = {"streamlit": {"import_ms": base_total, "wall_ms": base_wall}}
+    for name, path in scripts():
+        total, modules, wall, errors = best_of(RUNNER.format(path=str(path)), repeat)
+        extra = {mod: t for mod, t in modules.items() if mod not in base_modules and "." not in mod}
+        results[name] = {
+            "import_ms": total - base_total,
+            "wall_ms": wall - base_wall,
+            "heaviest": dict(sorted(extra.items(), key=lambda item: -item[1])[:top]),
+            "failed": bool(errors and "exit status" in errors[-1]),
+        }
+    return results
+
+
+def compare(results, baseline, threshold, min_delta):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ("import_ms", "wall_ms"):
+            before, after = max(previous[metric], 0.0), current[metric]
+            if after > before * (1 + threshold) and after - before > min_delta:
+                regressions.append(f"{name}: {metric} {before:.0f} -> {after:.0f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="JSON file of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative increase reported as a regression")
+    parser.add_argument("--min-delta", type=float, default=50.0, help="absolute increase [ms] below which changes are noise")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per script, the fastest one is kept")
+    parser.add_argument("--top", type=int, default=5, help="number of heaviest modules listed per script")
+    args = parser.parse_args()
+
+    results = measure(args.top, args.repeat)
+    print(f"import streamlit: {results['streamlit']['import_ms']:.0f} ms, excluded below")
+    print(f"{'script':<32} {'imports [ms]':>12} {'first paint [ms]':>17}  heaviest imports")
+    for name, result in results.items():
+        if name == "streamlit":
+            continue
+        heaviest = ", ".join(f"{mod} {t:.0f}" for mod, t in result["heaviest"].items())
+        status = "  (failed)" if result["failed"] else ""
+        print(f"{name:<32} {result['import_ms']:>12.0f} {result['wall_ms']:>17.0f}  {heaviest}{status}")
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold, args.min_delta)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
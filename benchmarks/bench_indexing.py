@@ -0,0 +1,76 @@
+"""Validate and time the vectorized index conversions.
+
+Every scheme is checked against a brute-force enumeration of (n, m) pairs for
+j up to --j-max (1e5 by default), then the array conversions are timed against
+the equivalent Python loops.
+
+    python -m benchmarks.bench_indexing [--j-max 100000]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from zernikestreamlit.indexing import FIRST_INDEX, SCHEMES, j_to_nm, nm_to_j, reorder
+
+
+def brute_force(scheme, count):
+    """(n, m) of the first ``count`` indices, by sorting (n, m) pairs with each scheme's ordering rule."""
+    pairs = []
+    n = 0
+    # the Fringe ordering interleaves radial orders, keep enough of them
+    while len(pairs) < 4 * count:
+        pairs += [(n, m) for m in range(-n, n + 1, 2)]
+        n += 1
+    if scheme == "osa":
+        ordered = sorted(pairs)
+    elif scheme in ("fringe", "wyant"):
+        ordered = sorted(pairs, key=lambda p: ((p[0] + abs(p[1])) // 2, -abs(p[1]), p[1] < 0))
+    else:
+        # Noll: by n then |m|; within a +-m pair, the cos term (m > 0) takes the even index
+        ordered = sorted(pairs, key=lambda p: (p[0], abs(p[1]), p[1]))
+        for k in range(len(ordered) - 1):
+            (n0, m0), (n1, m1) = ordered[k], ordered[k + 1]
+            if n0 == n1 and m0 == -m1 < 0 and (k + 1) % 2 == 0:
+                ordered[k], ordered[k + 1] = ordered[k + 1], ordered[k]
+    n, m = np.array(ordered[:count]).T
+    return n, m
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--j-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'scheme':<8} {'check':<6} {'j->nm array [ms]':>17} {'j->nm loop [ms]':>16} {'nm->j array [ms]':>17} {'nm->j loop [ms]':>16}")
+    for scheme in SCHEMES:
+        j = np.arange(args.j_max) + FIRST_INDEX[scheme]
+        n_ref, m_ref = brute_force(scheme, args.j_max)
+        t_array, (n, m) = timed(lambda: j_to_nm(j, scheme))
+        t_loop, _ = timed(lambda: [j_to_nm(int(k), scheme) for k in j])
+        t_back, j_back = timed(lambda: nm_to_j(n, m, scheme))
+        t_back_loop, _ = timed(lambda: [nm_to_j(int(a), int(b), scheme) for a, b in zip(n, m)])
+        ok = np.array_equal(n, n_ref) and np.array_equal(m, m_ref) and np.array_equal(j_back, j)
+        failed |= not ok
+        print(f"{scheme:<8} {'ok' if ok else 'FAIL':<6} {t_array * 1e3:>17.2f} {t_loop * 1e3:>16.1f} "
+              f"{t_back * 1e3:>17.2f} {t_back_loop * 1e3:>16.1f}")
+
+    coefs = np.random.default_rng(0).normal(size=(1000, 231))
+    t_reorder, fringe = timed(lambda: reorder(coefs, "osa", "fringe"))
+    back = reorder(fringe, "fringe", "osa")[:, :231]
+    print(f"reorder 1000 x 231 OSA -> Fringe: {t_reorder * 1e3:.2f} ms, round trip "
+          f"{'ok' if np.array_equal(back, coefs) else 'FAIL'}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
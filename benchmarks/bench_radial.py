@@ -0,0 +1,83 @@
+"""Precision and speed of the radial kernel against Radial.__call__, per order.
+
+Errors are measured against the exact value of the integer-coefficient sum at
+each (float) sample, computed with fractions. ``Radial.__call__`` is mocapy's;
+when mocapy is not installed, the lambdified sympy factorial sum it evaluates
+stands in for it.
+
+    python -m benchmarks.bench_radial [--orders 4 10 20 30 40 60] [--samples 10000] [--repeat 5]
+"""
+import argparse
+import time
+from fractions import Fraction
+
+import numpy as np
+
+from zernikestreamlit import basis, radial
+from zernikestreamlit.expressions import radial_expr
+
+
+def best_of(func, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def exact(n, m, rho):
+    coefs = [Fraction(c) for c in radial.integer_coefficients(n, m)]
+    return np.array([float(sum(c * Fraction(r) ** (m + 2 * k) for k, c in enumerate(coefs))) for r in rho])
+
+
+def reference(n, m):
+    """mocapy's Radial.__call__, or the lambdified sympy expression it evaluates."""
+    try:
+        from mocapy.zernike import Radial
+        return Radial(n, m), "Radial.__call__"
+    except ImportError:
+        import sympy as sp
+        return sp.lambdify(sp.Symbol("rho"), radial_expr(n, m), "numpy"), "lambdified sympy sum"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, nargs="+", default=[4, 10, 20, 30, 40, 60])
+    parser.add_argument("--samples", type=int, default=10000, help="rho samples of the timings")
+    parser.add_argument("--exact-samples", type=int, default=101, help="rho samples of the error measurement")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rho = np.linspace(0, 1, args.samples)
+    rho_exact = np.linspace(0, 1, args.exact_samples)
+    print(f"{args.samples} samples for timings, {args.exact_samples} for errors; per polynomial, worst m of each "
+          f"order, and whole (n+1, n+1) tables")
+    print(f"{'n':>3} {'reference':>22} {'err':>8} {'ms':>8}   {'kernel':>8} {'err':>8} {'ms':>8}   "
+          f"{'table':>8} {'ms':>8}   {'basis':>8} {'ms':>8}")
+    for n in args.orders:
+        ms = range(n % 2, n + 1, 2)
+        truth = {m: exact(n, m, rho_exact) for m in ms}
+        ref_err = ker_err = 0.0
+        ref_time = ker_time = 0.0
+        for m in ms:
+            func, name = reference(n, m)
+            elapsed, _ = best_of(lambda: func(rho), args.repeat)
+            ref_time += elapsed
+            ref_err = max(ref_err, np.abs(func(rho_exact) - truth[m]).max())
+            elapsed, _ = best_of(lambda: radial.radial(n, m, rho), args.repeat)
+            ker_time += elapsed
+            ker_err = max(ker_err, np.abs(radial.radial(n, m, rho_exact) - truth[m]).max())
+        # whole tables up to n: radial.radial_table and basis.radial_table
+        table_time, _ = best_of(lambda: radial.radial_table(n, rho), args.repeat)
+        basis_time, _ = best_of(lambda: basis.radial_table(n, rho), args.repeat)
+        table_err = max(np.abs(radial.radial_table(n, rho_exact)[n, m] - truth[m]).max() for m in ms)
+        basis_err = max(np.abs(basis.radial_table(n, rho_exact)[n, m] - truth[m]).max() for m in ms)
+        count = len(ms)
+        print(f"{n:>3} {name:>22} {ref_err:8.1e} {ref_time / count * 1e3:8.3f}   "
+              f"{'':>8} {ker_err:8.1e} {ker_time / count * 1e3:8.3f}   "
+              f"{table_err:8.1e} {table_time * 1e3:8.3f}   {basis_err:8.1e} {basis_time * 1e3:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Benchmark suite: evaluation, fitting, figure building and page reruns.
+
+    python -m benchmarks.suite [--save results.json] [--baseline results.json] [--threshold 0.2] [--only pages]
+
+Cases, grouped as:
+
+- evaluation: mocapy ``Radial``/``Angular``/``Zernike`` objects and the batch
+  basis engine over grid sizes and orders
+- fitting: ``WaveFront.from_sampled_wavefront`` and the cached fitter
+- plots: ``plot_3d_plotly`` and ``surface_figure`` build time and serialized size
+- pages: every page script run through Streamlit's ``AppTest``, first run with
+  empty caches and a rerun
+
+Each metric is the best of ``--repeat`` runs. Cases needing mocapy are skipped
+when it is not installed. With ``--baseline``, times (``*_ms``) that grew by
+more than ``threshold`` (relative) and ``min-delta`` (absolute, ms) and sizes
+(``*_bytes``) that grew by more than ``threshold`` are reported, and the exit
+status is 1. Everything runs headless: no browser, matplotlib on the Agg
+backend, and the on-disk caches in a temporary directory.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_DIR = ROOT / "zernikestreamlit"
+GROUPS = ("evaluation", "fitting", "plots", "pages")
+
+
+def best_of(func, repeat):
+    """Best wall time [ms] of ``repeat`` calls, and the last result."""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3, result
+
+
+def _mocapy():
+    try:
+        import mocapy.zernike
+    except ImportError:
+        return None
+    return mocapy.zernike
+
+
+def evaluation_cases(args):
+    from zernikestreamlit.basis import n_max_to_J, osa_nm, zernike_matrix
+    from zernikestreamlit.grid import PolarGrid
+    mz = _mocapy()
+    for resolution in args.resolutions:
+        grid = PolarGrid(resolution)
+        rho, theta = np.ascontiguousarray(grid.rho), np.ascontiguousarray(grid.theta)
+        for n_max in args.orders:
+            n, m = osa_nm(n_max_to_J(n_max))
+            key = f"res{resolution}_n{n_max}"
+            yield f"basis_{key}", {"time_ms": best_of(lambda: zernike_matrix(n, m, rho, theta), args.repeat)[0]}
+            if mz is None:
+                continue
+            yield f"mocapy_radial_{key}", {"time_ms": best_of(
+                lambda: [mz.Radial(nj, abs(mj))(rho) for nj, mj in zip(n, m) if mj >= 0], args.repeat)[0]}
+            yield f"mocapy_angular_{key}", {"time_ms": best_of(
+                lambda: [mz.Angular(mj)(theta) for mj in range(-n_max, n_max + 1)], args.repeat)[0]}
+            yield f"mocapy_zernike_{key}", {"time_ms": best_of(
+                lambda: [mz.Zernike(nj, mj)(rho, theta) for nj, mj in zip(n, m)], args.repeat)[0]}
+
+
+def _sampled(resolution, n_max, surfaces=1):
+    from zernikestreamlit.basis import n_max_to_J, osa_nm, zernike_matrix
+    rho, theta = np.meshgrid(np.linspace(0, 1, resolution), np.linspace(0, 2 * np.pi, resolution))
+    n, m = osa_nm(n_max_to_J(n_max))
+    coefs = np.random.default_rng(0).normal(size=(surfaces, len(n)))
+    zs = np.tensordot(coefs, zernike_matrix(n, m, rho, theta), axes=1)
+    return rho * np.cos(theta), rho * np.sin(theta), zs
+
+
+def fitting_cases(args):
+    from zernikestreamlit.fitting import ZernikeFitter
+    mz = _mocapy()
+    for resolution in args.resolutions:
+        for n_max in args.orders:
+            x, y, zs = _sampled(resolution, n_max, surfaces=100)
+            key = f"res{resolution}_n{n_max}"
+            factorization, fitter = best_of(lambda: ZernikeFitter(x, y, n_max), args.repeat)
+            yield f"fitter_{key}", {"factorization_ms": factorization,
+                                    "fit_100_ms": best_of(lambda: fitter.fit(zs), args.repeat)[0]}
+            if mz is not None:
+                yield f"mocapy_fit_{key}", {"time_ms": best_of(
+                    lambda: mz.WaveFront.from_sampled_wavefront(x, y, zs[0]), args.repeat)[0]}
+
+
+def plot_cases(args):
+    from zernikestreamlit.grid import get_grid
+    from zernikestreamlit.payload import payload_bytes
+    from zernikestreamlit.plotting import surface_figure
+    from zernikestreamlit.surface_store import evaluate_surface
+    mz = _mocapy()
+    for resolution in args.resolutions:
+        grid = get_grid(resolution)
+        values = evaluate_surface("zernike", 5, 3, False, grid)
+        build_ms, fig = best_of(lambda: surface_figure(grid, values), args.repeat)
+        yield f"surface_figure_res{resolution}", {"build_ms": build_ms, "payload_bytes": payload_bytes(fig)}
+    if mz is not None:
+        wfe = mz.WaveFront({(5, 3): 2, (3, 1): -0.5})
+        build_ms, fig = best_of(lambda: wfe.plot_3d_plotly(), args.repeat)
+        yield "mocapy_plot_3d_plotly", {"build_ms": build_ms, "payload_bytes": payload_bytes(fig)}
+
+
+def scripts():
+    yield "app", APP_DIR / "zernikestreamlit_app.py"
+    for page in sorted((APP_DIR / "pages").glob("*.py")):
+        yield page.stem, page
+
+
+def page_cases(args):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    for name, path in scripts():
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        at = AppTest.from_file(str(path), default_timeout=args.timeout)
+        start = time.perf_counter()
+        at.run()
+        first = (time.perf_counter() - start) * 1e3
+        rerun, _ = best_of(at.run, args.repeat)
+        # errors are recorded, not fatal: mocapy sections fail where it is not installed
+        yield f"page_{name}", {"first_run_ms": first, "rerun_ms": rerun, "errors": len(at.exception)}
+
+
+CASES = {"evaluation": evaluation_cases, "fitting": fitting_cases, "plots": plot_cases, "pages": page_cases}
+
+
+def run(args):
+    results = {}
+    for group in args.only:
+        for name, metrics in CASES[group](args):
+            results[f"{group}/{name}"] = metrics
+            print(f"{group}/{name:<36} " + "  ".join(f"{key} {value:.1f}" if isinstance(value, float) else
+                                                      f"{key} {value}" for key, value in metrics.items()), flush=True)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name, {})
+        for metric, after in current.items():
+            before = previous.get(metric)
+            if before is None:
+                continue
+            if metric.endswith("_ms") and after > before * (1 + threshold) and after - before > min_delta:
+                regressions.append(f"{name}: {metric} {before:.1f} -> {after:.1f} ms")
+            elif metric.endswith("_bytes") and after > before * (1 + threshold):
+                regressions.append(f"{name}: {metric} {before} -> {after} bytes")
+            elif metric == "errors" and after > before:
+                regressions.append(f"{name}: {before} -> {after} errors")
+    return regressions
+
+
+def metadata():
+    import numpy
+    import streamlit
+    mz = _mocapy()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy.__version__,
+        "streamlit": streamlit.__version__,
+        "mocapy": getattr(sys.modules.get("mocapy"), "__version__", "unknown") if mz is not None else None,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--resolutions", type=int, nargs="+", default=[100, 256])
+    parser.add_argument("--orders", type=int, nargs="+", default=[4, 10])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per metric, the fastest one is kept")
+    parser.add_argument("--timeout", type=float, default=300, help="page run timeout [s]")
+    parser.add_argument("--save", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="JSON file of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative increase reported as a regression")
+    parser.add_argument("--min-delta", type=float, default=5.0, help="absolute increase [ms] below which changes are noise")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    with tempfile.TemporaryDirectory() as cache:
+        for env, sub in (("ZERNIKESTREAMLIT_CACHE_DIR", "surfaces"), ("ZERNIKESTREAMLIT_GALLERY_DIR", "gallery"),
+                         ("ZERNIKESTREAMLIT_TABLES_DIR", "tables")):
+            os.environ[env] = str(Path(cache) / sub)
+        results = run(args)
+
+    if args.save:
+        args.save.write_text(json.dumps({"meta": metadata(), "results": results}, indent=2))
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
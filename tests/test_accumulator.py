@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from zernikestreamlit import accumulator, surface_store
+from zernikestreamlit.basis import GridBasis
+from zernikestreamlit.grid import PolarGrid
+
+RESOLUTION = 24
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv(surface_store.CACHE_DIR_ENV, str(tmp_path))
+    surface_store.get_store.clear()
+    surface_store.get_surface.clear()
+    yield
+    surface_store.get_store.clear()
+    surface_store.get_surface.clear()
+
+
+def full_rebuild(coefs, ortho_norm=False):
+    return GridBasis(PolarGrid(RESOLUTION), 6, ortho_norm).combine(coefs)
+
+
+@pytest.mark.parametrize("ortho_norm", [False, True])
+def test_delta_updates_match_a_full_rebuild(ortho_norm):
+    acc = accumulator.SurfaceAccumulator(RESOLUTION, ortho_norm)
+    rng = np.random.default_rng(2)
+    terms = [(2, 0), (3, -1), (4, 2), (6, -4), (5, 5)]
+    for _ in range(20):
+        coefs = {term: float(rng.normal()) for term in terms if rng.random() < 0.6}
+        acc.update(coefs)
+        assert acc.coefs == coefs
+        np.testing.assert_allclose(acc.surface, full_rebuild(coefs, ortho_norm), atol=1e-12)
+
+
+def test_only_changed_terms_are_counted():
+    acc = accumulator.SurfaceAccumulator(RESOLUTION)
+    assert acc.update({(2, 0): 0.5, (3, 1): 0.2}) == 2
+    assert acc.update({(2, 0): 0.5, (3, 1): 0.1}) == 1
+    assert acc.update({(3, 1): 0.1}) == 1
+    assert not acc.set(3, 1, 0.1)
+    assert acc.coefs == {(3, 1): 0.1}
+
+
+def test_periodic_rebuild(monkeypatch):
+    monkeypatch.setattr(accumulator, "REBUILD_EVERY", 3)
+    acc = accumulator.SurfaceAccumulator(RESOLUTION)
+    for k in range(1, 8):
+        acc.set(4, 0, 0.1 * k)
+    assert acc.updates == 1
+    np.testing.assert_allclose(acc.surface, full_rebuild({(4, 0): 0.7}), atol=1e-12)
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from zernikestreamlit.background import TaskRegistry
+
+
+def test_concurrent_submissions_share_one_computation():
+    registry = TaskRegistry(max_workers=2)
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return 42
+
+    futures = []
+    threads = [threading.Thread(target=lambda: futures.append(registry.submit("key", compute))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    release.set()
+    assert len({id(future) for future in futures}) == 1
+    assert futures[0].result(5) == 42
+    assert len(calls) == 1
+    # done results are shared too
+    assert registry.submit("key", compute) is futures[0]
+    assert registry.stats() == {"tasks": 1, "running": 0, "submitted": 1}
+
+
+def test_failed_computations_are_retried():
+    registry = TaskRegistry(max_workers=1)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("first attempt fails")
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        registry.submit("key", flaky).result(5)
+    assert registry.submit("key", flaky).result(5) == "ok"
+    assert len(attempts) == 2
+
+
+def test_finished_tasks_are_evicted_oldest_first():
+    registry = TaskRegistry(max_workers=1, max_tasks=2)
+    futures = {}
+    for key in "abcd":
+        futures[key] = registry.submit(key, str, key)
+        futures[key].result(5)
+    assert registry.stats()["tasks"] == 2
+    # the most recent keys are still shared, the oldest ones are computed again
+    assert registry.submit("d", str) is futures["d"]
+    assert registry.submit("a", str) is not futures["a"]
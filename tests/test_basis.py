@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from zernikestreamlit import basis, radial
+from zernikestreamlit.grid import PolarGrid
+
+RHO = np.linspace(0, 1, 7)
+THETA = np.linspace(0, 2 * np.pi, 9)
+
+
+def direct(n, m, rho, theta):
+    """z_n^m from the closed-form radial polynomial and numpy's trig functions."""
+    angular = np.cos(m * theta) if m >= 0 else np.sin(-m * theta)
+    return radial.radial(n, m, rho) * angular
+
+
+def test_zernike_matrix_matches_direct_formula():
+    rho, theta = np.meshgrid(RHO, THETA)
+    n, m = basis.osa_nm(basis.n_max_to_J(12))
+    values = basis.zernike_matrix(n, m, rho, theta)
+    assert values.shape == (len(n),) + rho.shape
+    for j, (nj, mj) in enumerate(zip(n, m)):
+        np.testing.assert_allclose(values[j], direct(nj, mj, rho, theta), atol=1e-12)
+
+
+def test_zernike_matrix_scalar_point():
+    values = basis.zernike_matrix([2, 3], [0, -1], 0.5, 0.3, ortho_norm=True)
+    assert values.shape == (2,)
+    np.testing.assert_allclose(values, [np.sqrt(3 / np.pi) * (2 * 0.25 - 1),
+                                        np.sqrt(8 / np.pi) * (3 * 0.125 - 2 * 0.5) * np.sin(0.3)])
+
+
+@pytest.mark.parametrize("n, m", [(3, 0), (2, 4), (-1, 1)])
+def test_zernike_matrix_invalid_orders(n, m):
+    with pytest.raises(ValueError):
+        basis.zernike_matrix([n], [m], RHO, 0.0)
+
+
+@pytest.mark.parametrize("ortho_norm", [False, True])
+def test_grid_basis_matches_zernike_matrix(ortho_norm):
+    grid = PolarGrid(16, max_order=4)
+    # n_max above the grid's trig tables exercises the recurrence fallback
+    for n_max in (4, 7):
+        grid_basis = basis.GridBasis(grid, n_max, ortho_norm)
+        expected = basis.zernike_matrix(grid_basis.n, grid_basis.m, grid.rho, grid.theta, ortho_norm)
+        np.testing.assert_allclose(grid_basis.values, expected, atol=1e-12)
+    np.testing.assert_allclose(grid_basis.radial(5, -3)[3], radial.radial(5, 3, grid.rhos, ortho_norm),
+                               atol=1e-12)
+
+
+def test_grid_basis_combine_and_invalid_pairs():
+    grid_basis = basis.GridBasis(PolarGrid(16), 4)
+    coefs = {(2, 0): 0.5, (3, -1): -0.25, (5, 1): 1.0, (3, 0): 2.0}
+    expected = 0.5 * grid_basis.zernike(2, 0) - 0.25 * grid_basis.zernike(3, -1)
+    np.testing.assert_allclose(grid_basis.combine(coefs), expected)
+    assert not grid_basis.zernike(3, 0).any()
+    assert not grid_basis.radial(6, 0).any()
+
+
+def test_grid_basis_angular_bounds():
+    grid_basis = basis.GridBasis(PolarGrid(16), 4)
+    np.testing.assert_allclose(grid_basis.angular(-3)[:, 0], np.sin(3 * grid_basis.grid.thetas), atol=1e-12)
+    with pytest.raises(ValueError):
+        grid_basis.angular(5)
+
+
+def test_coefficient_vector_round_trip():
+    coefs = {(0, 0): 1.0, (3, -1): -0.5, (4, 2): 0.25}
+    vector = basis.coefs_to_vector(coefs, 4)
+    assert len(vector) == basis.n_max_to_J(4)
+    assert basis.vector_to_coefs(vector) == coefs
+    with pytest.raises(ValueError):
+        basis.coefs_to_vector({(5, 1): 1.0}, 4)
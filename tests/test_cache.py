@@ -0,0 +1,50 @@
+import threading
+
+import numpy as np
+import streamlit as st
+
+from zernikestreamlit import cache
+
+
+def test_counted_cache_lookups_per_thread():
+    calls = []
+
+    @cache.counted(st.cache_resource, max_entries=2)
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    square.clear()
+    before = cache.lookups().get("test_counted_cache_lookups_per_thread.<locals>.square", (0, 0))
+    assert [square(2), square(2), square(3), square(2)] == [4, 4, 9, 4]
+    assert calls == [2, 3]
+    after = cache.lookups()["test_counted_cache_lookups_per_thread.<locals>.square"]
+    assert (after[0] - before[0], after[1] - before[1]) == (2, 2)
+
+    # another thread hits the shared cache, and only its own lookups are counted there
+    seen = {}
+    thread = threading.Thread(target=lambda: (square(3), seen.update(cache.lookups())))
+    thread.start()
+    thread.join()
+    assert seen["test_counted_cache_lookups_per_thread.<locals>.square"] == (1, 0)
+
+    square.clear()
+    square(2)
+    assert calls == [2, 3, 2]
+
+
+def test_lru_cache():
+    lru = cache.LRUCache(2)
+    assert lru.get_or_create("a", lambda: 1) == 1
+    assert lru.get_or_create("a", lambda: 2) == 1
+    lru.get_or_create("b", lambda: 2)
+    lru.get_or_create("c", lambda: 3)
+    assert len(lru) == 2 and lru.get_or_create("a", lambda: 4) == 4
+    assert (lru.hits, lru.misses) == (1, 4)
+
+
+def test_array_key():
+    x = np.arange(6.0)
+    assert cache.array_key(x, None) == cache.array_key(x.copy(), None)
+    assert cache.array_key(x) != cache.array_key(x.reshape(2, 3))
+    assert cache.array_key(x) != cache.array_key(x.astype(np.float32))
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from zernikestreamlit import decompose
+from zernikestreamlit.basis import n_max_to_J, osa_nm, zernike_matrix
+
+N_MAX = 4
+SIZE = 33
+
+
+@pytest.fixture
+def stack(tmp_path):
+    """(path, coefficients) of a .npy stack of 40 surfaces, two of them with NaN dropouts."""
+    x, y = np.meshgrid(np.linspace(-1, 1, SIZE), np.linspace(-1, 1, SIZE))
+    n, m = osa_nm(n_max_to_J(N_MAX))
+    coefs = np.random.default_rng(4).normal(size=(40, len(n)))
+    zs = np.tensordot(coefs, zernike_matrix(n, m, np.hypot(x, y), np.arctan2(y, x)), axes=1)
+    zs[3, 10:14, 5:20] = np.nan
+    zs[17, 16, 16] = np.inf
+    path = tmp_path / "stack.npy"
+    np.save(path, zs)
+    return path, coefs
+
+
+def test_dropouts_are_fitted_on_the_finite_samples(stack, tmp_path):
+    path, coefs = stack
+    fitted, skipped, _ = decompose.decompose([path], tmp_path / "table", N_MAX, workers=2)
+    assert (fitted, skipped) == (40, 0)
+    table = decompose.read_table(tmp_path / "table").to_pandas()
+    columns = decompose.coefficient_columns(N_MAX)
+    np.testing.assert_allclose(table[columns].to_numpy(), coefs, atol=1e-10)
+    np.testing.assert_allclose(table["residual_rms"], 0, atol=1e-10)
+    assert table["missing"][3] == 60 and table["missing"][17] == 1
+    assert table["missing"].drop([3, 17]).eq(0).all()
+
+
+def test_resume_skips_written_parts(stack, tmp_path):
+    path, _ = stack
+    output = tmp_path / "table"
+    surface_bytes = 8 * SIZE * SIZE
+    fitted, skipped, _ = decompose.decompose([path], output, N_MAX, chunk_bytes=7 * surface_bytes, workers=2)
+    assert (fitted, skipped) == (40, 0)
+    first = decompose.read_table(output)
+    parts = sorted(output.glob("part-*.parquet"))
+    assert len(parts) == 6
+
+    # an interrupted run: the last parts are missing
+    for part in parts[-2:]:
+        part.unlink()
+    fitted, skipped, _ = decompose.decompose([path], output, N_MAX, chunk_bytes=7 * surface_bytes, workers=2)
+    assert (fitted, skipped) == (40 - 28, 28)
+    assert decompose.read_table(output).equals(first)
+
+    fitted, skipped, _ = decompose.decompose([path], output, N_MAX, chunk_bytes=7 * surface_bytes, workers=2)
+    assert (fitted, skipped) == (0, 40)
+    with pytest.raises(ValueError):
+        decompose.decompose([path], output, N_MAX + 1, chunk_bytes=7 * surface_bytes)
+
+
+def test_surface_without_enough_samples(tmp_path):
+    zs = np.full((2, SIZE, SIZE), np.nan)
+    zs[0] = 1.0
+    zs[1, 16, 16] = 1.0
+    np.save(tmp_path / "stack.npy", zs)
+    decompose.decompose([tmp_path / "stack.npy"], tmp_path / "table", N_MAX)
+    table = decompose.read_table(tmp_path / "table").to_pandas()
+    columns = decompose.coefficient_columns(N_MAX)
+    assert table[columns[0]][0] == pytest.approx(1)
+    assert table[columns].iloc[1].isna().all()
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from zernikestreamlit import derivatives
+from zernikestreamlit.basis import n_max_to_J, osa_nm, zernike_matrix
+
+N_MAX = 8
+STEP = 1e-6
+# Cartesian points inside the disk, including the origin where the polar formulas are singular
+X = np.array([0.0, 0.3, -0.5, 0.1, 0.7, -0.2])
+Y = np.array([0.0, 0.2, 0.4, -0.6, -0.1, -0.9])
+
+
+def zernike_xy(n, m, x, y, ortho_norm):
+    return zernike_matrix(n, m, np.hypot(x, y), np.arctan2(y, x), ortho_norm)
+
+
+@pytest.mark.parametrize("ortho_norm", [False, True])
+def test_gradient_matrix_matches_finite_differences(ortho_norm):
+    n, m = osa_nm(n_max_to_J(N_MAX))
+    dx, dy = derivatives.gradient_matrix(n, m, np.hypot(X, Y), np.arctan2(Y, X), ortho_norm)
+    fd_x = (zernike_xy(n, m, X + STEP, Y, ortho_norm) - zernike_xy(n, m, X - STEP, Y, ortho_norm)) / (2 * STEP)
+    fd_y = (zernike_xy(n, m, X, Y + STEP, ortho_norm) - zernike_xy(n, m, X, Y - STEP, ortho_norm)) / (2 * STEP)
+    np.testing.assert_allclose(dx, fd_x, atol=1e-6)
+    np.testing.assert_allclose(dy, fd_y, atol=1e-6)
+
+
+def test_analytic_gradient_matches_gradient_matrix():
+    n, m = osa_nm(n_max_to_J(N_MAX))
+    rho, theta = np.hypot(X[1:], Y[1:]), np.arctan2(Y[1:], X[1:])
+    for expected, actual in zip(derivatives.analytic_gradient(n, m, rho, theta),
+                                derivatives.gradient_matrix(n, m, rho, theta)):
+        np.testing.assert_allclose(actual, expected, atol=1e-10)
+
+
+def test_gradient_coefficients_of_defocus():
+    # z_2^0 = 2 (x^2 + y^2) - 1, so dz/dx = 4x = 4 z_1^1 and dz/dy = 4y = 4 z_1^-1
+    gx, gy = derivatives.gradient_coefficients(2, 0)
+    np.testing.assert_allclose(gx, [0, 0, 4, 0, 0, 0], atol=1e-12)
+    np.testing.assert_allclose(gy, [0, 4, 0, 0, 0, 0], atol=1e-12)
+
+
+def test_slope_fit_recovers_coefficients():
+    x, y = np.meshgrid(np.linspace(-1, 1, 25), np.linspace(-1, 1, 25))
+    rng = np.random.default_rng(1)
+    coefs = rng.normal(size=n_max_to_J(5))
+    coefs[0] = 0.0
+    n, m = osa_nm(len(coefs))
+    dx, dy = derivatives.gradient_matrix(n, m, np.hypot(x, y), np.arctan2(y, x))
+    fitter = derivatives.get_slope_fitter(x, y, 5)
+    np.testing.assert_allclose(fitter.fit(np.tensordot(coefs, dx, axes=1), np.tensordot(coefs, dy, axes=1)),
+                               coefs, atol=1e-10)
@@ -0,0 +1,75 @@
+import io
+
+import numpy as np
+import pytest
+
+from zernikestreamlit import basis, fitting
+
+N_MAX = 6
+X, Y = np.meshgrid(np.linspace(-1, 1, 41), np.linspace(-1, 1, 41))
+
+
+def surface(coefs):
+    """Sum of Zernike polynomials evaluated directly at every (X, Y) sample."""
+    n, m = basis.osa_nm(coefs.shape[-1])
+    values = basis.zernike_matrix(n, m, np.hypot(X, Y), np.arctan2(Y, X))
+    return np.tensordot(coefs, values, axes=1)
+
+
+def test_fit_recovers_coefficients():
+    rng = np.random.default_rng(0)
+    coefs = rng.normal(size=(3, basis.n_max_to_J(N_MAX)))
+    zs = surface(coefs)
+    fitter = fitting.get_fitter(X, Y, N_MAX)
+    np.testing.assert_allclose(fitter.fit(zs), coefs, atol=1e-10)
+    np.testing.assert_allclose(fitter.fit(zs[1]), coefs[1], atol=1e-10)
+    np.testing.assert_allclose(fitter.residual_rms(zs, coefs), 0, atol=1e-12)
+
+    rebuilt = fitter.reconstruct(coefs)
+    assert rebuilt.shape == zs.shape
+    assert np.isnan(rebuilt[:, ~fitter.mask]).all()
+    np.testing.assert_allclose(rebuilt[:, fitter.mask], zs[:, fitter.mask], atol=1e-10)
+
+
+def test_fit_residual_of_higher_orders():
+    # a polynomial above n_max leaves a residual, reported as the RMS over the pupil
+    J = basis.n_max_to_J(N_MAX)
+    coefs = np.zeros(basis.n_max_to_J(N_MAX + 2))
+    coefs[J + 3] = 1.0
+    zs = surface(coefs)
+    fitter = fitting.get_fitter(X, Y, N_MAX)
+    fitted = fitter.fit(zs)
+    residual = zs[fitter.mask] - fitter.basis @ fitted
+    assert fitter.residual_rms(zs, fitted) == pytest.approx(np.sqrt(np.mean(residual ** 2)))
+    assert fitter.residual_rms(zs, fitted) > 0.1
+
+
+def test_fitters_are_shared_per_sampling():
+    mask = np.hypot(X, Y) >= 0.3
+    fitter = fitting.get_fitter(X, Y, N_MAX)
+    assert fitting.get_fitter(X.copy(), Y.copy(), N_MAX) is fitter
+    assert fitting.get_fitter(X, Y, N_MAX, ortho_norm=True) is not fitter
+    masked = fitting.get_fitter(X, Y, N_MAX, mask=mask)
+    assert masked is not fitter
+    assert masked.mask.sum() < fitter.mask.sum()
+
+
+def test_too_few_samples():
+    with pytest.raises(ValueError):
+        fitting.ZernikeFitter(X[:3, :3], Y[:3, :3], N_MAX)
+
+
+def test_load_sampled_surface():
+    zs = np.arange(12.0).reshape(3, 4)
+    buffer = io.BytesIO()
+    np.save(buffer, zs)
+    buffer.seek(0)
+    x, y, z = fitting.load_sampled_surface(buffer)
+    assert x.shape == y.shape == zs.shape
+    assert (x[0, 0], y[-1, -1]) == (-1, 1)
+
+    buffer = io.BytesIO()
+    np.savez(buffer, x=x, z=zs)
+    buffer.seek(0)
+    with pytest.raises(ValueError, match="y"):
+        fitting.load_sampled_surface(buffer)
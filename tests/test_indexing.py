@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from zernikestreamlit.indexing import FIRST_INDEX, SCHEMES, convert, j_to_nm, nm_to_j, reorder
+
+J_MAX = 100_000
+
+
+def test_known_indices():
+    # (n, m) of the first polynomials, from the published tables of each scheme
+    assert [tuple(map(int, nm)) for nm in zip(*j_to_nm(np.arange(6), "osa"))] == \
+        [(0, 0), (1, -1), (1, 1), (2, -2), (2, 0), (2, 2)]
+    assert [tuple(map(int, nm)) for nm in zip(*j_to_nm(np.arange(1, 12), "noll"))] == \
+        [(0, 0), (1, 1), (1, -1), (2, 0), (2, -2), (2, 2), (3, -1), (3, 1), (3, -3), (3, 3), (4, 0)]
+    assert [tuple(map(int, nm)) for nm in zip(*j_to_nm(np.arange(1, 10), "fringe"))] == \
+        [(0, 0), (1, 1), (1, -1), (2, 0), (2, 2), (2, -2), (3, 1), (3, -1), (4, 0)]
+    assert int(nm_to_j(4, 0, "wyant")) == 8
+
+
+@pytest.mark.parametrize("scheme", SCHEMES)
+def test_round_trip(scheme):
+    j = np.arange(J_MAX) + FIRST_INDEX[scheme]
+    n, m = j_to_nm(j, scheme)
+    assert np.all(np.abs(m) <= n) and np.all((n - m) % 2 == 0)
+    np.testing.assert_array_equal(nm_to_j(n, m, scheme), j)
+
+
+@pytest.mark.parametrize("scheme", SCHEMES)
+def test_bijective_on_full_orders(scheme):
+    # every (n, m) up to n_max gets a distinct index
+    n_max = 30
+    n, m = j_to_nm(np.arange((n_max + 1) * (n_max + 2) // 2), "osa")
+    j = nm_to_j(n, m, scheme)
+    assert len(np.unique(j)) == len(j)
+
+
+def test_convert_and_reorder():
+    j = np.arange(1, 200)
+    np.testing.assert_array_equal(convert(convert(j, "noll", "fringe"), "fringe", "noll"), j)
+    coefs = np.arange(15.0)
+    noll = reorder(coefs, "osa", "noll")
+    n, m = j_to_nm(np.arange(15), "osa")
+    np.testing.assert_array_equal(noll[nm_to_j(n, m, "noll") - 1], coefs)
+    np.testing.assert_array_equal(reorder(noll, "noll", "osa")[:15], coefs)
+
+
+def test_invalid_indices():
+    with pytest.raises(ValueError):
+        j_to_nm(0, "noll")
+    with pytest.raises(ValueError):
+        j_to_nm(1, "zemax")
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from zernikestreamlit import operators
+from zernikestreamlit.basis import coefs_to_vector, osa_nm, zernike_matrix
+from zernikestreamlit.fitting import get_fitter
+
+N_MAX = 5
+EXAMPLE = coefs_to_vector({(5, 3): 2, (3, 1): -0.5, (2, -2): 0.3, (0, 0): 1}, n_max=N_MAX)
+X, Y = np.meshgrid(np.linspace(-1, 1, 31), np.linspace(-1, 1, 31))
+
+
+def fitted(xs, ys):
+    """Coefficients of W(xs, ys) fitted on the (X, Y) sampling."""
+    n, m = osa_nm(len(EXAMPLE))
+    zs = np.tensordot(EXAMPLE, zernike_matrix(n, m, np.hypot(xs, ys), np.arctan2(ys, xs)), axes=1)
+    return get_fitter(X, Y, N_MAX).fit(zs)
+
+
+@pytest.mark.parametrize("alpha", [0.0, np.pi / 5, 2.0])
+def test_rotate_matches_fit(alpha):
+    # W(rho, theta + alpha) at (x, y) is W at (x, y) rotated by +alpha
+    xs = X * np.cos(alpha) - Y * np.sin(alpha)
+    ys = X * np.sin(alpha) + Y * np.cos(alpha)
+    np.testing.assert_allclose(operators.rotate(EXAMPLE, alpha), fitted(xs, ys), atol=1e-10)
+    np.testing.assert_allclose(operators.rotation_matrix(N_MAX, alpha) @ EXAMPLE,
+                               operators.rotate(EXAMPLE, alpha), atol=1e-12)
+
+
+def test_rotate_sweep_and_stacks():
+    alphas = np.linspace(0, 2 * np.pi, 7)
+    stack = np.stack([EXAMPLE, 2 * EXAMPLE])
+    swept = operators.rotate(stack, alphas)
+    assert swept.shape == (len(alphas),) + stack.shape
+    for k, alpha in enumerate(alphas):
+        np.testing.assert_allclose(swept[k, 1], 2 * operators.rotate(EXAMPLE, alpha), atol=1e-12)
+
+
+@pytest.mark.parametrize("dx, dy, scale", [(0.2, 0.0, 1.0), (-0.1, 0.3, 0.8), (0.0, 0.0, 0.5)])
+def test_translate_matches_fit(dx, dy, scale):
+    expected = fitted(scale * X - dx, scale * Y - dy)
+    np.testing.assert_allclose(operators.translate(EXAMPLE, dx, dy, scale), expected, atol=1e-9)
+    stack = operators.translate(np.stack([EXAMPLE, -EXAMPLE]), dx, dy, scale)
+    np.testing.assert_allclose(stack[1], -expected, atol=1e-9)
+
+
+def test_translate_needs_whole_orders():
+    with pytest.raises(ValueError):
+        operators.translate(EXAMPLE[:-1], 0.1, 0.0)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from zernikestreamlit.psf import PSFEngine, PupilGrid, diffraction_limited_mtf
+
+
+@pytest.fixture(scope="module")
+def pupil():
+    return PupilGrid(128, 2)
+
+
+def test_unaberrated_mtf_matches_diffraction_limit(pupil):
+    engine = PSFEngine(pupil)
+    assert engine.strehl() == pytest.approx(1)
+    frequencies, mtf_x, mtf_y = engine.mtf_cuts()
+    np.testing.assert_allclose(mtf_x, diffraction_limited_mtf(frequencies), atol=2e-3)
+    np.testing.assert_allclose(mtf_y, mtf_x, atol=1e-6)
+
+
+def test_psf_energy(pupil):
+    # Parseval: the PSF, normalized to the unaberrated peak, sums to padded^2 / points whatever the wavefront
+    engine = PSFEngine(pupil)
+    engine.update({(3, 1): 0.3})
+    assert engine.psf().sum() == pytest.approx(pupil.padded ** 2 / pupil.points, rel=1e-4)
+
+
+def test_small_aberration_follows_marechal(pupil):
+    engine = PSFEngine(pupil)
+    engine.update({(2, 0): 0.05})
+    assert engine.strehl() < 1
+    assert engine.strehl() == pytest.approx(engine.marechal(), abs=1e-3)
+
+
+def test_term_updates_match_a_fresh_engine(pupil):
+    engine = PSFEngine(pupil)
+    engine.update({(2, 0): 0.2, (3, 1): 0.1})
+    engine.psf()
+    assert engine.update({(2, 0): 0.05, (3, 1): 0.0}) == 2
+    fresh = PSFEngine(pupil)
+    fresh.update({(2, 0): 0.05})
+    np.testing.assert_allclose(engine.psf(), fresh.psf(), atol=1e-6)
+
+
+def test_padding_is_required():
+    with pytest.raises(ValueError):
+        PupilGrid(64, 1)
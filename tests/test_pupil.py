@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from zernikestreamlit import pupil
+from zernikestreamlit.basis import n_max_to_J, osa_nm, zernike_matrix
+
+N_MAX = 5
+X, Y = np.meshgrid(np.linspace(-1, 1, 61), np.linspace(-1, 1, 61))
+
+
+@pytest.fixture(scope="module")
+def annulus():
+    mask = pupil.annular_mask(X, Y, obstruction=0.4, spiders=3, spider_width=0.05)
+    return pupil.get_masked_basis(X, Y, N_MAX, mask)
+
+
+def test_annular_mask():
+    mask = pupil.annular_mask(X, Y, obstruction=0.4, spiders=4, spider_width=0.1)
+    rho = np.hypot(X, Y)
+    assert not mask[rho < 0.4].any() and not mask[rho > 1].any()
+    # the vane along +x is masked, the diagonal is not
+    assert not mask[30, 50] and mask[round(30 + 0.5 * 30 / np.sqrt(2)), round(30 + 0.5 * 30 / np.sqrt(2))]
+
+
+def test_basis_is_orthonormal_on_the_annulus(annulus):
+    values = annulus.values
+    np.testing.assert_allclose(values.T @ values / len(values), np.eye(len(annulus.n)), atol=1e-10)
+    # while the Zernikes themselves are not orthogonal there
+    assert np.abs(annulus.gram() - np.eye(len(annulus.n))).max() > 0.1
+    np.testing.assert_allclose(np.diag(annulus.gram()), 1)
+
+
+def test_fit_and_zernike_coefficients(annulus):
+    rng = np.random.default_rng(3)
+    zernike = rng.normal(size=(2, n_max_to_J(N_MAX)))
+    n, m = osa_nm(zernike.shape[-1])
+    zs = np.tensordot(zernike, zernike_matrix(n, m, np.hypot(X, Y), np.arctan2(Y, X)), axes=1)
+    coefs = annulus.fit(zs)
+    np.testing.assert_allclose(annulus.to_zernike(coefs), zernike, atol=1e-10)
+    np.testing.assert_allclose(annulus.from_zernike(zernike), coefs, atol=1e-10)
+    np.testing.assert_allclose(annulus.reconstruct(coefs)[:, annulus.mask], zs[:, annulus.mask], atol=1e-10)
+    np.testing.assert_allclose(annulus.evaluate(coefs[0], np.hypot(X, Y), np.arctan2(Y, X)), zs[0], atol=1e-10)
+
+
+def test_masked_bases_are_shared():
+    mask = pupil.annular_mask(X, Y, obstruction=0.2)
+    assert pupil.get_masked_basis(X, Y, 3, mask) is pupil.get_masked_basis(X.copy(), Y.copy(), 3, mask.copy())
+
+
+def test_degenerate_pupil():
+    # on the x axis alone, every z_n^-m vanishes
+    with pytest.raises(ValueError, match="separate"):
+        pupil.MaskedBasis(X, Y, 2, np.abs(Y) < 1e-12)
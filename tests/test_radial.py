@@ -0,0 +1,56 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from zernikestreamlit import basis, radial
+
+RHO = np.linspace(0, 1, 21)
+
+
+def exact(n, m, rho):
+    """r_n^m at each (float) sample, summed exactly from the integer coefficients."""
+    coefs = radial.integer_coefficients(n, m)
+    return np.array([float(sum(c * Fraction(r) ** (m + 2 * k) for k, c in enumerate(coefs))) for r in rho])
+
+
+def test_integer_coefficients():
+    assert radial.integer_coefficients(0, 0) == (1,)
+    assert radial.integer_coefficients(2, 0) == (-1, 2)
+    assert radial.integer_coefficients(4, 0) == (1, -6, 6)
+    assert radial.integer_coefficients(4, 2) == (-3, 4)
+    # r_n^m(1) = 1
+    for n in range(40):
+        for m in range(n % 2, n + 1, 2):
+            assert sum(radial.integer_coefficients(n, m)) == 1
+
+
+@pytest.mark.parametrize("n", [0, 1, 4, 10, 11, 20, 30, 45, 60])
+def test_radial_matches_exact_sum(n):
+    for m in range(n % 2, n + 1, 2):
+        np.testing.assert_allclose(radial.radial(n, m, RHO), exact(n, m, RHO), rtol=0, atol=1e-12)
+
+
+def test_radial_ortho_norm_and_negative_m():
+    np.testing.assert_allclose(radial.radial(5, -3, RHO, ortho_norm=True),
+                               np.sqrt(12) * radial.radial(5, 3, RHO))
+
+
+def test_radial_table_matches_exact_sum():
+    n_max = 40
+    table = radial.radial_table(n_max, RHO)
+    assert table.shape == (n_max + 1, n_max + 1, len(RHO))
+    for n in range(n_max + 1):
+        for m in range(n + 1):
+            expected = exact(n, m, RHO) if (n - m) % 2 == 0 else np.zeros(len(RHO))
+            np.testing.assert_allclose(table[n, m], expected, rtol=0, atol=1e-12)
+
+
+def test_radial_table_matches_basis_recurrence():
+    np.testing.assert_allclose(radial.radial_table(12, RHO), basis.radial_table(12, RHO), atol=1e-12)
+
+
+@pytest.mark.parametrize("n, m", [(3, 0), (2, 4), (-1, 1)])
+def test_invalid_orders(n, m):
+    with pytest.raises(ValueError):
+        radial.radial(n, m, RHO)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from zernikestreamlit import surface_store
+
+
+def test_replicas_sharing_a_directory_stay_bounded(tmp_path):
+    max_bytes = 300_000
+    replicas = [surface_store.SurfaceStore(tmp_path, max_bytes) for _ in range(2)]
+    for n in range(12):
+        for m in range(-n, n + 1, 2):
+            replicas[(n + m) // 2 % 2].get("zernike", n, m, resolution=40)
+    assert replicas[0].nbytes <= max_bytes
+    np.testing.assert_allclose(replicas[1].get("zernike", 11, 1, resolution=40),
+                               surface_store.evaluate_surface("zernike", 11, 1, False, surface_store.PolarGrid(40)))
+
+
+@pytest.fixture
+def fresh_store():
+    surface_store.get_store.clear()
+    surface_store.get_surface.clear()
+    yield
+    surface_store.get_store.clear()
+    surface_store.get_surface.clear()
+
+
+def test_unwritable_cache_directory_falls_back(tmp_path, monkeypatch, fresh_store):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setenv(surface_store.CACHE_DIR_ENV, str(blocker / "surfaces"))
+    monkeypatch.setattr(surface_store.tempfile, "gettempdir", lambda: str(tmp_path / "tmp"))
+    assert surface_store.get_store().root == tmp_path / "tmp" / "zernikestreamlit" / "surfaces"
+
+
+def test_no_writable_directory_evaluates_in_memory(tmp_path, monkeypatch, fresh_store):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setenv(surface_store.CACHE_DIR_ENV, str(blocker / "surfaces"))
+    monkeypatch.setattr(surface_store.tempfile, "gettempdir", lambda: str(blocker))
+    assert surface_store.get_store() is None
+    surface = surface_store.get_surface("radial", 4, 2, resolution=20)
+    assert surface.shape == (20, 20) and not surface.flags.writeable
+    assert not surface_store.get_surface("zernike", 3, 0, resolution=20).any()
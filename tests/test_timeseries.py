@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+import scipy.signal
+
+from zernikestreamlit import timeseries
+from zernikestreamlit.basis import osa_nm, zernike_matrix
+from zernikestreamlit.timeseries import CoefficientStream, RollingRMS, Welford, WelchPSD, analyze, demo_stream
+
+
+@pytest.fixture(scope="module")
+def coefs():
+    return demo_stream(5000, n_max=3, seed=1)
+
+
+def batches(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+def test_welford_matches_numpy(coefs):
+    moments = Welford(coefs.shape[1])
+    for batch in batches(coefs, 777):
+        moments.update(batch)
+    np.testing.assert_allclose(moments.mean, coefs.mean(axis=0), atol=1e-14)
+    np.testing.assert_allclose(moments.covariance(), np.cov(coefs, rowvar=False), atol=1e-13)
+
+
+def test_rolling_rms_matches_direct(coefs):
+    window = 200
+    stops = np.arange(window, len(coefs) + 1, 37)
+    rolling = RollingRMS(coefs.shape[1], window, stops)
+    for batch in batches(coefs, 512):
+        rolling.update(batch)
+    expected = np.array([np.sqrt(np.mean(np.square(coefs[stop - window:stop]), axis=0)) for stop in stops])
+    np.testing.assert_allclose(rolling.result(), expected, atol=1e-12)
+
+
+@pytest.mark.parametrize("segment", [256, 1024])
+def test_welch_psd_matches_scipy(coefs, segment):
+    spectrum = WelchPSD(coefs.shape[1], segment, rate=1000.0)
+    for batch in batches(coefs, 300):
+        spectrum.update(batch)
+    frequencies, expected = scipy.signal.welch(coefs, fs=1000.0, window="hann", nperseg=segment, detrend=False,
+                                               axis=0)
+    np.testing.assert_allclose(spectrum.frequencies(), frequencies)
+    np.testing.assert_allclose(spectrum.result(), expected, rtol=1e-10, atol=1e-15)
+
+
+def test_chunked_analysis_matches_one_chunk(coefs, monkeypatch):
+    whole = analyze(CoefficientStream(coefs))
+    monkeypatch.setattr(timeseries, "CHUNK_BYTES", 8 * coefs.shape[1] * 333)
+    stream = CoefficientStream(coefs)
+    assert stream.chunk_size == 333
+    chunked = analyze(stream)
+    for key in whole:
+        np.testing.assert_allclose(chunked[key], whole[key], atol=1e-12)
+
+
+def test_surface_stream_is_fitted(coefs, tmp_path):
+    x, y = np.meshgrid(np.linspace(-1, 1, 48), np.linspace(-1, 1, 48))
+    n, m = osa_nm(coefs.shape[1])
+    surfaces = np.tensordot(coefs[:100], zernike_matrix(n, m, np.hypot(x, y), np.arctan2(y, x)), axes=1)
+    np.save(tmp_path / "surfaces.npy", surfaces)
+    stream = CoefficientStream.open(tmp_path / "surfaces.npy", n_max=3)
+    assert stream.kind == "surfaces"
+    np.testing.assert_allclose(np.concatenate([chunk for _, chunk in stream.chunks()]), coefs[:100], atol=1e-10)
+    np.testing.assert_allclose(stream.coefficients(42), coefs[42], atol=1e-10)
+
+
+def test_short_streams():
+    stats = analyze(CoefficientStream(np.ones((1, 3))))
+    assert stats["rms"].shape == (1, 3)
+    with pytest.raises(ValueError):
+        CoefficientStream(np.ones((10, 4)))
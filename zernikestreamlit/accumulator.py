@@ -0,0 +1,74 @@
+"""Wavefront surfaces updated term by term.
+
+A wavefront surface is a sum of coefficient-weighted Zernike surfaces. The
+accumulator keeps the current coefficient of every (n, m) term and the summed
+surface; when a coefficient changes, only ``(new - old) * z_n^m`` is added, so
+an edit costs O(points) instead of re-evaluating the J terms of the sum. The
+term surfaces are the ones ``surface_store.get_surface`` already serves to the
+component plots.
+"""
+import numpy as np
+import streamlit as st
+
+from zernikestreamlit.grid import DEFAULT_RESOLUTION
+from zernikestreamlit.surface_store import get_surface
+
+# the sum is recomputed from scratch after this many delta updates, to bound rounding drift
+REBUILD_EVERY = 256
+
+
+class SurfaceAccumulator:
+    """Summed surface of ``{(n, m): coefficient}`` terms on the shared grid of ``resolution``."""
+
+    def __init__(self, resolution=DEFAULT_RESOLUTION, ortho_norm=False):
+        self.resolution = resolution
+        self.ortho_norm = ortho_norm
+        self.shape = (resolution, resolution)
+        self.coefs = {}
+        self.surface = np.zeros(self.shape)
+        self.updates = 0
+
+    def __repr__(self):
+        return f"<SurfaceAccumulator(resolution={self.resolution}, terms={len(self.coefs)}, ortho_norm={self.ortho_norm})>"
+
+    def term(self, n, m):
+        return get_surface("zernike", n, m, self.ortho_norm, self.resolution)
+
+    def set(self, n, m, coef):
+        """Set the coefficient of z_n^m, adding the difference to the surface; True if it changed."""
+        old = self.coefs.get((n, m), 0.0)
+        if coef == old:
+            return False
+        self.surface += (coef - old) * self.term(n, m)
+        if coef == 0:
+            self.coefs.pop((n, m), None)
+        else:
+            self.coefs[(n, m)] = coef
+        self.updates += 1
+        if self.updates >= REBUILD_EVERY:
+            self.rebuild()
+        return True
+
+    def update(self, coefs):
+        """Make ``{(n, m): coefficient}`` the whole set of terms; returns the number of terms changed."""
+        changed = 0
+        for key in set(self.coefs) - set(coefs):
+            changed += self.set(*key, 0.0)
+        for (n, m), coef in coefs.items():
+            changed += self.set(n, m, coef)
+        return changed
+
+    def rebuild(self):
+        """Recompute the surface from all the terms."""
+        self.surface = np.zeros(self.shape)
+        for (n, m), coef in self.coefs.items():
+            self.surface += coef * self.term(n, m)
+        self.updates = 0
+
+
+def session_accumulator(name, resolution=DEFAULT_RESOLUTION, ortho_norm=False):
+    """SurfaceAccumulator kept in the session state under ``name``, across reruns."""
+    key = f"accumulator_{name}_{resolution}_{ortho_norm}"
+    if key not in st.session_state:
+        st.session_state[key] = SurfaceAccumulator(resolution, ortho_norm)
+    return st.session_state[key]
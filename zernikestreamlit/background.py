@@ -0,0 +1,92 @@
+"""Heavy page sections computed in the background, shared by every session.
+
+A section submits its computation under a key and renders a placeholder until
+it completes, so the rest of the page stays interactive whatever the cost of the
+section. While the computation runs, a fragment polls its future every
+``POLL_INTERVAL`` and reruns the page once it is done, which renders the result
+in place of the placeholder.
+
+Submissions are deduplicated by key across sessions: sessions asking for a key
+that is running or done get the same future, so ten sessions arriving at once
+start one computation. At most ``MAX_TASKS`` finished results are kept, least
+recently submitted first out; failed computations are forgotten, so the next
+submission retries them.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from zernikestreamlit.cache import counted
+
+
+MAX_WORKERS = 2
+MAX_TASKS = 16
+POLL_INTERVAL = "1s"
+
+
+class TaskRegistry:
+    """Futures of keyed computations on a thread pool, one per key."""
+
+    def __init__(self, max_workers=MAX_WORKERS, max_tasks=MAX_TASKS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="zernikestreamlit-background")
+        self.max_tasks = max_tasks
+        self.submitted = 0
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<TaskRegistry(tasks={len(self._futures)}, submitted={self.submitted})>"
+
+    def submit(self, key, func, *args, **kwargs):
+        """Future of ``func(*args, **kwargs)``, shared by every caller of ``key`` while it runs or once done."""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self._futures.move_to_end(key)
+                return future
+            # submitted under the lock, so concurrent callers of a new key cannot both start it
+            future = self.executor.submit(func, *args, **kwargs)
+            self._futures[key] = future
+            self.submitted += 1
+            finished = [k for k, f in self._futures.items() if f.done() and k != key]
+            for k in finished[:max(len(self._futures) - self.max_tasks, 0)]:
+                del self._futures[k]
+            return future
+
+    def stats(self):
+        with self._lock:
+            running = sum(not future.done() for future in self._futures.values())
+            return {"tasks": len(self._futures), "running": running, "submitted": self.submitted}
+
+
+@counted(st.cache_resource)
+def get_registry():
+    """The registry shared by every session of the server."""
+    return TaskRegistry()
+
+
+def submit(key, func, *args, **kwargs):
+    """Shared future of ``func(*args, **kwargs)`` under ``key``."""
+    return get_registry().submit(key, func, *args, **kwargs)
+
+
+def section(future, render, placeholder="Computing in the background..."):
+    """``render(result)`` once ``future`` is done, a placeholder polled until then."""
+    if future.done():
+        try:
+            result = future.result()
+        except Exception as e:
+            st.error(f"This section could not be computed: {e}")
+            return
+        render(result)
+        return
+
+    @st.fragment(run_every=POLL_INTERVAL)
+    def poll():
+        if future.done():
+            st.rerun()
+        st.info(placeholder)
+
+    poll()
@@ -0,0 +1,207 @@
+"""Vectorized evaluation of the Zernike basis.
+
+The whole basis Z[j, p] for the first J polynomials is evaluated on a point set
+in one pass, without sympy: radial polynomials use the three-term recurrence
+
+    r_n^m = rho * (r_{n-1}^{|m-1|} + r_{n-1}^{m+1}) - r_{n-2}^m,    r_n^n = rho**n
+
+and angular polynomials the Chebyshev recurrences
+
+    cos(m*theta) = 2*cos(theta)*cos((m-1)*theta) - cos((m-2)*theta)   (same for sin)
+
+Conventions follow mocapy.zernike: z_n^m = r_n^{|m|} a_m with a_m = cos(m*theta)
+for m >= 0 and sin(-m*theta) for m < 0, and ``ortho_norm`` multiplies by
+N_n^m = sqrt((2n+2) / ((1+delta_m0) pi)). Polynomials are ordered using the
+OSA/ANSI single index j = (n*(n+2) + m) / 2.
+"""
+import numpy as np
+import streamlit as st
+
+from zernikestreamlit.cache import counted
+from zernikestreamlit.grid import DEFAULT_MAX_ORDER, DEFAULT_RESOLUTION, get_grid
+from zernikestreamlit.indexing import nm_to_osa, osa_to_nm
+
+
+def osa_nm(J):
+    """(n, m) arrays of the first J polynomials in OSA/ANSI order."""
+    return osa_to_nm(np.arange(J))
+
+
+def n_max_to_J(n_max):
+    """Number of polynomials with radial order n <= n_max."""
+    return (n_max + 1) * (n_max + 2) // 2
+
+
+def coefs_to_vector(coefs, n_max):
+    """Coefficient vector in OSA order from a {(n, m): c} dict like WaveFront's."""
+    vector = np.zeros(n_max_to_J(n_max))
+    for (n, m), c in coefs.items():
+        if n > n_max:
+            raise ValueError(f"coefficient ({n}, {m}) above n_max={n_max}")
+        vector[nm_to_osa(n, m)] += c
+    return vector
+
+
+def vector_to_coefs(vector, atol=0.0):
+    """{(n, m): c} dict from a coefficient vector in OSA order, dropping |c| <= atol."""
+    n, m = osa_nm(len(vector))
+    return {(int(nj), int(mj)): float(c) for nj, mj, c in zip(n, m, vector) if abs(c) > atol}
+
+
+def normalization(n, m):
+    """Orthonormalization constant N_n^m, vectorized over n and m."""
+    n, m = np.asarray(n), np.asarray(m)
+    return np.sqrt((2 * n + 2) / ((1 + (m == 0)) * np.pi))
+
+
+def radial_levels(n_max, rho):
+    """Yield ``(n, level)`` for n = 0..n_max, where ``level[m]`` is r_n^m(rho).
+
+    ``level`` has shape (n+1,) + rho.shape; rows with n-m odd are zero. Only the
+    two previous levels are kept alive, so memory stays O(n_max * points).
+    """
+    rho = np.asarray(rho, dtype=float)
+    prev2 = None
+    prev = np.ones((1,) + rho.shape)
+    yield 0, prev
+    for n in range(1, n_max + 1):
+        level = np.zeros((n + 1,) + rho.shape)
+        # m = 0 uses |m-1| = 1 twice
+        for m in range(n % 2, n, 2):
+            left = prev[abs(m - 1)]
+            right = prev[m + 1]
+            np.add(left, right, out=level[m])
+            level[m] *= rho
+            if m <= n - 2:
+                level[m] -= prev2[m]
+        np.multiply(prev[n - 1], rho, out=level[n])
+        prev2, prev = prev, level
+        yield n, level
+
+
+def radial_table(n_max, rho):
+    """Stacked r_n^m(rho) of shape (n_max+1, n_max+1) + rho.shape, zero where undefined."""
+    rho = np.asarray(rho, dtype=float)
+    table = np.zeros((n_max + 1, n_max + 1) + rho.shape)
+    for n, level in radial_levels(n_max, rho):
+        table[n, :n + 1] = level
+    return table
+
+
+def trig_table(m_max, theta):
+    """cos(m*theta) and sin(m*theta) for m = 0..m_max, each of shape (m_max+1,) + theta.shape."""
+    theta = np.asarray(theta, dtype=float)
+    cos = np.empty((m_max + 1,) + theta.shape)
+    sin = np.empty((m_max + 1,) + theta.shape)
+    cos[0], sin[0] = 1.0, 0.0
+    if m_max >= 1:
+        cos[1], sin[1] = np.cos(theta), np.sin(theta)
+    two_cos = 2 * cos[1] if m_max >= 2 else None
+    for m in range(2, m_max + 1):
+        np.multiply(two_cos, cos[m - 1], out=cos[m])
+        cos[m] -= cos[m - 2]
+        np.multiply(two_cos, sin[m - 1], out=sin[m])
+        sin[m] -= sin[m - 2]
+    return cos, sin
+
+
+def zernike_matrix(n, m, rho, theta, ortho_norm=False):
+    """Evaluate z_{n[j]}^{m[j]}(rho, theta) for every j, as an array of shape (J,) + rho.shape."""
+    n, m = np.atleast_1d(n).astype(int), np.atleast_1d(m).astype(int)
+    if np.any((n - m) % 2) or np.any(np.abs(m) > n) or np.any(n < 0):
+        raise ValueError("each (n, m) must satisfy n >= |m| and n-m even")
+    rho, theta = np.broadcast_arrays(np.asarray(rho, dtype=float), np.asarray(theta, dtype=float))
+    shape = rho.shape
+    # evaluated on flat points so that scalar inputs get writable rows too
+    rho, theta = rho.reshape(-1), theta.reshape(-1)
+    n_max = int(n.max(initial=0))
+    cos, sin = trig_table(n_max, theta)
+
+    out = np.empty((len(n), rho.size))
+    rows_by_n = {}
+    for j, (nj, mj) in enumerate(zip(n, m)):
+        rows_by_n.setdefault(nj, []).append((j, mj))
+    for level_n, level in radial_levels(n_max, rho):
+        for j, mj in rows_by_n.get(level_n, ()):
+            angular = cos[mj] if mj >= 0 else sin[-mj]
+            np.multiply(level[abs(mj)], angular, out=out[j])
+    if ortho_norm:
+        out *= normalization(n, m)[:, np.newaxis]
+    return out.reshape((len(n),) + shape)
+
+
+class GridBasis:
+    """Zernike, radial and angular basis evaluated once on a PolarGrid.
+
+    Since the grid is separable in (theta, rho), radial and angular parts are
+    evaluated on the 1D samples and combined with an outer product.
+    """
+
+    def __init__(self, grid, n_max, ortho_norm=False):
+        self.grid = grid
+        self.n_max = n_max
+        self.ortho_norm = ortho_norm
+        self.n, self.m = osa_nm(n_max_to_J(n_max))
+        self.index = {(int(nj), int(mj)): j for j, (nj, mj) in enumerate(zip(self.n, self.m))}
+
+        self._radial = radial_table(n_max, grid.rhos)
+        if n_max <= grid.max_order:
+            cos, sin = grid.cos_table[:n_max + 1], grid.sin_table[:n_max + 1]
+        else:
+            cos, sin = trig_table(n_max, grid.thetas)
+        # rows indexed by m + n_max, m in [-n_max, n_max]
+        self._angular = np.concatenate([sin[:0:-1], cos])
+        if ortho_norm:
+            ns = np.arange(n_max + 1)
+            self._radial *= np.sqrt(2 * ns + 2)[:, np.newaxis, np.newaxis]
+            ms = np.arange(-n_max, n_max + 1)
+            self._angular /= np.sqrt((1 + (ms == 0)) * np.pi)[:, np.newaxis]
+
+        radial = self._radial[self.n, np.abs(self.m)]
+        angular = self._angular[self.m + n_max]
+        self.values = angular[:, :, np.newaxis] * radial[:, np.newaxis, :]
+        for arr in (self._radial, self._angular, self.values):
+            arr.setflags(write=False)
+
+    def __repr__(self):
+        return f"<GridBasis(resolution={self.grid.resolution}, n_max={self.n_max}, ortho_norm={self.ortho_norm})>"
+
+    @property
+    def matrix(self):
+        """Basis as a (J, points) matrix."""
+        return self.values.reshape(len(self.n), -1)
+
+    def _valid(self, n, m):
+        return 0 <= abs(m) <= n <= self.n_max and (n - m) % 2 == 0
+
+    def zernike(self, n, m):
+        """z_n^m on the grid; zero for (n, m) pairs that do not define a polynomial."""
+        if not self._valid(n, m):
+            return np.zeros(self.grid.shape)
+        return self.values[self.index[(n, m)]]
+
+    def radial(self, n, m):
+        """r_n^m(rho) broadcast on the grid, rotationally symmetric."""
+        if not self._valid(n, m):
+            return np.zeros(self.grid.shape)
+        return np.broadcast_to(self._radial[n, abs(m)][np.newaxis, :], self.grid.shape)
+
+    def angular(self, m):
+        """a_m(theta) broadcast on the grid."""
+        if abs(m) > self.n_max:
+            raise ValueError(f"a_m is tabulated for |m| <= n_max={self.n_max}, got m={m}")
+        return np.broadcast_to(self._angular[m + self.n_max][:, np.newaxis], self.grid.shape)
+
+    def combine(self, coefs):
+        """Surface of sum_j c_j z_j, with ``coefs`` a {(n, m): c} dict like WaveFront's."""
+        surface = np.zeros(self.grid.shape)
+        for (n, m), c in coefs.items():
+            if self._valid(n, m):
+                surface += c * self.values[self.index[(n, m)]]
+        return surface
+
+
+@counted(st.cache_resource, max_entries=8)
+def get_grid_basis(resolution=DEFAULT_RESOLUTION, n_max=DEFAULT_MAX_ORDER, ortho_norm=False):
+    """Shared GridBasis on the shared grid of the given resolution."""
+    return GridBasis(get_grid(resolution), n_max, ortho_norm)
@@ -0,0 +1,142 @@
+"""Process-wide bounded caches shared by the engines.
+
+Unlike ``st.cache_resource``, these work the same inside and outside of a
+Streamlit script run (CLIs, benchmarks), and hash numpy arrays by content.
+
+The ``st.cache_*`` functions of the library are declared with ``counted``,
+which counts their hits and misses per thread in ``lookups()``, so that a
+profiler can attribute them to the rerun running on its thread.
+"""
+import functools
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+
+
+# {function name: [hits, misses]} of the ``counted`` caches called from each thread
+_lookups = threading.local()
+
+
+def lookups():
+    """{function name: (hits, misses)} of the ``counted`` caches called from this thread so far."""
+    return {name: tuple(counts) for name, counts in getattr(_lookups, "counts", {}).items()}
+
+
+def counted(cache, **options):
+    """Decorator caching a function with ``cache(**options)``, e.g. ``st.cache_resource``, counting hits and misses.
+
+    The function body only runs on a miss: it bumps a per-thread counter the
+    wrapper compares. ``clear`` is forwarded to the cache.
+    """
+    def decorator(func):
+        name = func.__qualname__
+        misses = threading.local()
+
+        @functools.wraps(func)
+        def body(*args, **kwargs):
+            misses.count = getattr(misses, "count", 0) + 1
+            return func(*args, **kwargs)
+
+        cached = cache(**options)(body)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            before = getattr(misses, "count", 0)
+            result = cached(*args, **kwargs)
+            if not hasattr(_lookups, "counts"):
+                _lookups.counts = {}
+            counts = _lookups.counts.setdefault(name, [0, 0])
+            counts[getattr(misses, "count", 0) != before] += 1
+            return result
+
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+
+def array_key(*arrays):
+    """Digest identifying the content, shape and dtype of arrays, for use as a cache key."""
+    h = hashlib.blake2b(digest_size=16)
+    for arr in arrays:
+        if arr is None:
+            h.update(b"none")
+            continue
+        arr = np.ascontiguousarray(arr)
+        h.update(f"{arr.dtype.str}{arr.shape}".encode())
+        h.update(arr.data)
+    return h.hexdigest()
+
+
+def footprint(obj, _seen=None):
+    """Approximate memory held by ``obj``: array buffers, containers and instance attributes, each counted once."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        # views and memory maps do not own their data
+        return sys.getsizeof(obj) if obj.base is not None else obj.nbytes + sys.getsizeof(obj)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, Mapping):
+        size += sum(footprint(k, _seen) + footprint(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(footprint(item, _seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += footprint(vars(obj), _seen)
+    return size
+
+
+class LRUCache:
+    """Thread-safe mapping keeping the ``maxsize`` most recently used values, with hit/miss counters."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    def get_or_create(self, key, factory):
+        """Value cached under ``key``, created with ``factory()`` on a miss.
+
+        The factory runs outside of the lock, so two threads missing the same key
+        at once may both build it; the first one stored wins.
+        """
+        with self._lock:
+            value = self._values.get(key)
+            if value is not None:
+                self.hits += 1
+                self._values.move_to_end(key)
+                return value
+            self.misses += 1
+        value = factory()
+        with self._lock:
+            value = self._values.setdefault(key, value)
+            self._values.move_to_end(key)
+            while len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def nbytes(self):
+        """Approximate memory held by the cached values."""
+        with self._lock:
+            values = list(self._values.values())
+        seen = set()
+        return sum(footprint(value, seen) for value in values)
+
+    def stats(self):
+        """Entries, capacity, hit/miss counters and memory footprint."""
+        return {"entries": len(self), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "nbytes": self.nbytes()}
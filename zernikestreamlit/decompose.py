@@ -0,0 +1,260 @@
+"""Streaming Zernike decomposition of large surface datasets.
+
+Surface stacks are read in chunks from memory-mapped ``.npy`` files (or
+uncompressed ``.npz`` members), fitted against the cached factorization of
+``zernikestreamlit.fitting`` by a pool of worker threads (the fit is one BLAS
+product, which releases the GIL), and written chunk by chunk as Parquet parts
+of a table directory. Chunks hold at most ``CHUNK_BYTES`` of float64 surfaces
+and at most ``2 * workers`` chunks are in flight, so memory stays bounded
+whatever the size of the archive and of its surfaces.
+
+Surfaces with non-finite samples (NaN dropouts, saturated pixels) inside the
+pupil are fitted on their finite samples only, with the factorization cached
+per dropout pattern, and the ``missing`` column counts the samples left out.
+Surfaces with too few finite samples get NaN coefficients.
+
+Parts are written atomically and named after their source file and first row,
+so an interrupted run is resumed by running the same command again: chunks
+whose part exists are skipped.
+
+    python -m zernikestreamlit.decompose archive/*.npy --output tables/run1 --n-max 6 [--chunk-bytes 67108864] [--workers 4]
+
+A ``.npy`` file holds a (K, H, W) stack (or a single (H, W) surface) sampled on
+a square grid spanning [-1, 1] x [-1, 1]; a ``.npz`` file holds ``x``, ``y`` and
+a ``z`` stack, like the surfaces uploaded on page 4.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from zernikestreamlit.basis import n_max_to_J, osa_nm
+from zernikestreamlit.fitting import get_fitter
+
+TABLE_VERSION = 2
+CHUNK_BYTES = 64 * 2**20
+TABLES_DIR_ENV = "ZERNIKESTREAMLIT_TABLES_DIR"
+MANIFEST = "manifest.json"
+
+
+def default_root():
+    """Directory holding the coefficient tables browsed by the app."""
+    root = os.environ.get(TABLES_DIR_ENV)
+    if root:
+        return Path(root)
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "zernikestreamlit" / "tables"
+
+
+def coefficient_columns(n_max):
+    """Column name of every coefficient, in OSA order."""
+    n, m = osa_nm(n_max_to_J(n_max))
+    return [f"z_{n_j}_{m_j}" for n_j, m_j in zip(n, m)]
+
+
+def chunk_size(shape, chunk_bytes=CHUNK_BYTES):
+    """Surfaces per chunk of a (K, H, W) stack, at most ``chunk_bytes`` of float64."""
+    surface_bytes = 8 * int(np.prod(shape[1:]))
+    return max(1, chunk_bytes // surface_bytes)
+
+
+def _npz_member(path, name):
+    # memory map an array stored uncompressed in a .npz archive, load it otherwise
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(f"{name}.npy")
+        if info.compress_type != zipfile.ZIP_STORED:
+            with archive.open(info) as f:
+                return np.lib.format.read_array(f, allow_pickle=False)
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        local_header = f.read(30)
+        name_length = int.from_bytes(local_header[26:28], "little")
+        extra_length = int.from_bytes(local_header[28:30], "little")
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+        if np.lib.format.read_magic(f) == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape, offset=offset, order="F" if fortran_order else "C")
+
+
+def open_stack(path):
+    """(x, y, zs) of a surface file, ``zs`` of shape (K, H, W) and memory-mapped when possible."""
+    path = Path(path)
+    if path.suffix == ".npz":
+        with np.load(path, allow_pickle=False) as data:
+            missing = {"x", "y", "z"} - set(data.files)
+            if missing:
+                raise ValueError(f"{path}: missing arrays in .npz file: {sorted(missing)}")
+            x, y = data["x"], data["y"]
+        zs = _npz_member(path, "z")
+    else:
+        zs = np.load(path, mmap_mode="r", allow_pickle=False)
+        if zs.ndim < 2:
+            raise ValueError(f"{path}: expected surfaces of 2 dimensions, got shape {zs.shape}")
+        h, w = zs.shape[-2:]
+        x, y = np.meshgrid(np.linspace(-1, 1, w), np.linspace(-1, 1, h))
+    if zs.ndim == 2:
+        zs = zs[np.newaxis]
+    return x, y, zs
+
+
+def part_path(output, source, start):
+    return Path(output) / f"part-{source:04d}-{start:012d}.parquet"
+
+
+def _write_part(path, source, start, coefs, rms, missing, columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table = pa.table({
+        "source": pa.array(np.full(len(coefs), source, dtype=np.int32)),
+        "index": pa.array(np.arange(start, start + len(coefs), dtype=np.int64)),
+        **{name: pa.array(coefs[:, j]) for j, name in enumerate(columns)},
+        "residual_rms": pa.array(rms),
+        "missing": pa.array(missing.astype(np.int32)),
+    })
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _fit_finite(x, y, z, fitter):
+    # refit on the finite samples, with a factorization shared by the surfaces of the same dropout pattern
+    try:
+        finite = get_fitter(x, y, fitter.n_max, mask=fitter.mask & np.isfinite(z), ortho_norm=fitter.ortho_norm)
+    except ValueError:
+        return np.full(len(fitter.n), np.nan), np.nan
+    coefs = finite.fit(z)
+    return coefs, finite.residual_rms(z, coefs)
+
+
+def _fit_part(fitter, x, y, zs, source, start, stop, path, columns):
+    chunk = np.asarray(zs[start:stop], dtype=float)
+    finite = np.isfinite(chunk)
+    missing = np.sum(~finite[:, fitter.mask], axis=1)
+    # the rows with dropouts are refitted below, zeros only keep NaN out of the batched product
+    batch = np.where(finite, chunk, 0.0) if missing.any() else chunk
+    coefs = fitter.fit(batch)
+    rms = fitter.residual_rms(batch, coefs)
+    for k in np.flatnonzero(missing):
+        coefs[k], rms[k] = _fit_finite(x, y, chunk[k], fitter)
+    _write_part(path, source, start, coefs, rms, missing, columns)
+    return stop - start
+
+
+def _check_manifest(output, manifest, resume):
+    path = Path(output) / MANIFEST
+    if path.exists():
+        previous = json.loads(path.read_text())
+        if resume and previous != manifest:
+            raise ValueError(f"{output} holds a run with other inputs or parameters, use another output directory")
+        if not resume:
+            for part in Path(output).glob("part-*.parquet"):
+                part.unlink()
+    path.write_text(json.dumps(manifest, indent=2))
+
+
+def decompose(inputs, output, n_max, chunk_bytes=CHUNK_BYTES, workers=4, ortho_norm=False, resume=True,
+              progress=None):
+    """Fit every surface of ``inputs`` and write the coefficient table to the ``output`` directory.
+
+    ``progress(fitted, skipped, total, elapsed)`` is called after every chunk. Returns
+    (fitted, skipped, elapsed): the surfaces fitted by this call, the ones
+    found already fitted by a previous run, and the wall time.
+    """
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    stacks = [open_stack(path) for path in inputs]
+    columns = coefficient_columns(n_max)
+    manifest = {
+        "version": TABLE_VERSION,
+        "n_max": n_max,
+        "ortho_norm": ortho_norm,
+        "chunk_bytes": chunk_bytes,
+        "columns": columns,
+        "inputs": [{"path": str(Path(path).resolve()), "surfaces": len(zs), "shape": list(zs.shape[1:]),
+                    "chunk_size": chunk_size(zs.shape, chunk_bytes)}
+                   for path, (_, _, zs) in zip(inputs, stacks)],
+    }
+    _check_manifest(output, manifest, resume)
+
+    total = sum(len(zs) for _, _, zs in stacks)
+    fitted = skipped = 0
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for source, (x, y, zs) in enumerate(stacks):
+            fitter = get_fitter(x, y, n_max, ortho_norm=ortho_norm)
+            size = chunk_size(zs.shape, chunk_bytes)
+            for start in range(0, len(zs), size):
+                stop = min(start + size, len(zs))
+                path = part_path(output, source, start)
+                if path.exists():
+                    skipped += stop - start
+                    continue
+                # bounded number of chunks in flight, hence of surfaces in memory
+                if len(pending) >= 2 * workers:
+                    fitted += pending.popleft().result()
+                    if progress:
+                        progress(fitted, skipped, total, time.perf_counter() - start_time)
+                pending.append(executor.submit(_fit_part, fitter, x, y, zs, source, start, stop, path, columns))
+        while pending:
+            fitted += pending.popleft().result()
+            if progress:
+                progress(fitted, skipped, total, time.perf_counter() - start_time)
+    return fitted, skipped, time.perf_counter() - start_time
+
+
+def list_tables(root):
+    """Table directories (holding a manifest) under ``root``, including ``root`` itself."""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    return sorted(path.parent for path in [root / MANIFEST, *root.glob(f"*/{MANIFEST}")] if path.exists())
+
+
+def read_manifest(table):
+    return json.loads((Path(table) / MANIFEST).read_text())
+
+
+def read_table(table, columns=None):
+    """The coefficient table of a run as a pyarrow Table, sorted by source file and row."""
+    import pyarrow.dataset as ds
+    data = ds.dataset(sorted(Path(table).glob("part-*.parquet")), format="parquet")
+    return data.to_table(columns=columns).sort_by([("source", "ascending"), ("index", "ascending")])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit Zernike coefficients to large surface archives.")
+    parser.add_argument("inputs", type=Path, nargs="+", help=".npy stacks or .npz files with x, y and z")
+    parser.add_argument("--output", type=Path, required=True, help="table directory, resumed if it exists")
+    parser.add_argument("--n-max", type=int, default=6)
+    parser.add_argument("--chunk-bytes", type=int, default=CHUNK_BYTES, help="bytes of surfaces per chunk and part")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--ortho-norm", action="store_true")
+    parser.add_argument("--no-resume", action="store_true", help="discard the parts of a previous run")
+    args = parser.parse_args()
+
+    def progress(fitted, skipped, total, elapsed):
+        print(f"\r{fitted + skipped}/{total} surfaces, {fitted / max(elapsed, 1e-9):.0f} surfaces/s", end="", flush=True)
+
+    fitted, skipped, elapsed = decompose(args.inputs, args.output, args.n_max, args.chunk_bytes, args.workers,
+                                         args.ortho_norm, not args.no_resume, progress)
+    print(f"\n{fitted} surfaces fitted in {elapsed:.1f} s ({fitted / max(elapsed, 1e-9):.0f} surfaces/s), "
+          f"{skipped} already in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
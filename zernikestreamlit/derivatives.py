@@ -0,0 +1,183 @@
+"""Cartesian derivatives of the Zernike basis and slope fitting.
+
+The x and y derivatives of a polynomial of order n are polynomials of order
+n-1, so they are exact linear combinations of lower-order Zernikes:
+
+    dz_j/dx = sum_k Dx[j, k] z_k,    dz_j/dy = sum_k Dy[j, k] z_k
+
+The sparse matrices Dx and Dy are computed once per (n_max, ortho_norm) by
+projecting the analytic derivatives (radial derivatives from the differentiated
+three-term recurrence) onto the basis. Derivative bases on any point set are
+then a sparse product with the basis, with no singularity at rho = 0.
+
+Slopes, e.g. from a Shack-Hartmann sensor, are turned into coefficients by a
+least-squares fit whose factorization is cached per sampling, like
+``zernikestreamlit.fitting``.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from zernikestreamlit.basis import n_max_to_J, normalization, osa_nm, trig_table, zernike_matrix
+from zernikestreamlit.cache import LRUCache, array_key
+from zernikestreamlit.fitting import get_fitter
+
+# relative magnitude below which entries of the derivative matrices are dropped
+SPARSE_RTOL = 1e-10
+MAX_CACHED_SLOPE_FITTERS = 8
+
+
+def radial_derivative_levels(n_max, rho):
+    """Yield ``(n, level, dlevel)``: r_n^m(rho) and dr_n^m/drho for m = 0..n, as in ``basis.radial_levels``.
+
+    The derivative follows from differentiating the three-term recurrence:
+
+        dr_n^m = r_{n-1}^{|m-1|} + r_{n-1}^{m+1} + rho * (dr_{n-1}^{|m-1|} + dr_{n-1}^{m+1}) - dr_{n-2}^m
+    """
+    rho = np.asarray(rho, dtype=float)
+    prev2 = dprev2 = None
+    prev, dprev = np.ones((1,) + rho.shape), np.zeros((1,) + rho.shape)
+    yield 0, prev, dprev
+    for n in range(1, n_max + 1):
+        level = np.zeros((n + 1,) + rho.shape)
+        dlevel = np.zeros((n + 1,) + rho.shape)
+        for m in range(n % 2, n, 2):
+            total = prev[abs(m - 1)] + prev[m + 1]
+            dtotal = dprev[abs(m - 1)] + dprev[m + 1]
+            level[m] = rho * total
+            dlevel[m] = total + rho * dtotal
+            if m <= n - 2:
+                level[m] -= prev2[m]
+                dlevel[m] -= dprev2[m]
+        level[n] = rho * prev[n - 1]
+        dlevel[n] = prev[n - 1] + rho * dprev[n - 1]
+        prev2, dprev2, prev, dprev = prev, dprev, level, dlevel
+        yield n, level, dlevel
+
+
+def analytic_gradient(n, m, rho, theta, ortho_norm=False):
+    """dz/dx and dz/dy from the polar formulas of the Zernike page; requires rho > 0."""
+    n, m = np.atleast_1d(n).astype(int), np.atleast_1d(m).astype(int)
+    rho, theta = np.broadcast_arrays(np.asarray(rho, dtype=float), np.asarray(theta, dtype=float))
+    n_max = int(n.max(initial=0))
+    cos, sin = trig_table(max(n_max, 1), theta)
+    dx = np.empty((len(n),) + rho.shape)
+    dy = np.empty((len(n),) + rho.shape)
+    rows_by_n = {}
+    for j, (nj, mj) in enumerate(zip(n, m)):
+        rows_by_n.setdefault(nj, []).append((j, mj))
+    for level_n, level, dlevel in radial_derivative_levels(n_max, rho):
+        for j, mj in rows_by_n.get(level_n, ()):
+            k = abs(mj)
+            if mj >= 0:
+                a, da = cos[k], -k * sin[k]
+            else:
+                a, da = sin[k], k * cos[k]
+            radial, dradial = level[k], dlevel[k]
+            over_rho = radial / rho
+            dx[j] = dradial * a * cos[1] - over_rho * da * sin[1]
+            dy[j] = dradial * a * sin[1] + over_rho * da * cos[1]
+    if ortho_norm:
+        norm = normalization(n, m).reshape((-1,) + (1,) * rho.ndim)
+        dx *= norm
+        dy *= norm
+    return dx, dy
+
+
+def _sampling(n_max):
+    # polar sampling avoiding rho = 0, with enough points for an exact projection up to n_max
+    res = 2 * n_max + 4
+    rho, theta = np.meshgrid(np.linspace(0, 1, res + 1)[1:], np.linspace(0, 2 * np.pi, res, endpoint=False))
+    return rho, theta
+
+
+def _sparse(matrix):
+    matrix[np.abs(matrix) < SPARSE_RTOL * max(np.abs(matrix).max(), 1.0)] = 0.0
+    # deferred: scipy is slow to import and only needed once a matrix is built
+    from scipy import sparse
+    return sparse.csr_matrix(matrix)
+
+
+@lru_cache(maxsize=32)
+def derivative_matrices(n_max, ortho_norm=False):
+    """(Dx, Dy): J x J matrices, row j holding the coefficients of dz_j/dx (resp. dz_j/dy).
+
+    Both are strictly lower triangular in radial order, and returned as
+    ``scipy.sparse`` CSR matrices.
+    """
+    rho, theta = _sampling(n_max)
+    fitter = get_fitter(rho * np.cos(theta), rho * np.sin(theta), n_max, ortho_norm=ortho_norm)
+    dx, dy = analytic_gradient(fitter.n, fitter.m, rho, theta, ortho_norm)
+    return _sparse(fitter.fit(dx)), _sparse(fitter.fit(dy))
+
+
+def gradient_coefficients(n, m, ortho_norm=False):
+    """Dense coefficient vectors (OSA order) of dz_n^m/dx and dz_n^m/dy."""
+    Dx, Dy = derivative_matrices(max(n, 1), ortho_norm)
+    j = (n * (n + 2) + m) // 2
+    return tuple(np.ravel(D[[j]].toarray()) for D in (Dx, Dy))
+
+
+def gradient_matrix(n, m, rho, theta, ortho_norm=False):
+    """dz/dx and dz/dy of every (n[j], m[j]), each of shape (J,) + rho.shape, valid everywhere."""
+    n, m = np.atleast_1d(n).astype(int), np.atleast_1d(m).astype(int)
+    rho, theta = np.broadcast_arrays(np.asarray(rho, dtype=float), np.asarray(theta, dtype=float))
+    n_max = int(n.max(initial=0))
+    basis_n, basis_m = osa_nm(n_max_to_J(n_max))
+    basis = zernike_matrix(basis_n, basis_m, rho, theta, ortho_norm).reshape(len(basis_n), -1)
+    Dx, Dy = derivative_matrices(n_max, ortho_norm)
+    rows = (n * (n + 2) + m) // 2
+    shape = (len(n),) + rho.shape
+    dx = np.asarray(Dx[rows] @ basis).reshape(shape)
+    dy = np.asarray(Dy[rows] @ basis).reshape(shape)
+    return dx, dy
+
+
+class SlopeFitter:
+    """Least-squares coefficients from x and y slopes sampled at (x, y) in the unit disk.
+
+    Piston has no slope and is left at 0; the fitted vector still has J entries
+    in OSA order so that it can be used like any other coefficient vector.
+    """
+
+    def __init__(self, x, y, n_max, mask=None, ortho_norm=False):
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        rho = np.hypot(x, y)
+        inside = rho <= 1
+        if mask is not None:
+            inside &= np.asarray(mask, dtype=bool)
+        self.shape = x.shape
+        self.mask = inside
+        self.n_max = n_max
+        self.ortho_norm = ortho_norm
+        self.n, self.m = osa_nm(n_max_to_J(n_max))
+        if 2 * inside.sum() < len(self.n) - 1:
+            raise ValueError(f"{inside.sum()} samples in the pupil are not enough for n_max={n_max}")
+
+        dx, dy = gradient_matrix(self.n, self.m, rho[inside], np.arctan2(y, x)[inside], ortho_norm)
+        # (2 * points, J - 1): x slopes stacked over y slopes, piston column dropped
+        self.basis = np.concatenate([dx[1:].T, dy[1:].T])
+        q, r = np.linalg.qr(self.basis)
+        self.pinv = np.linalg.solve(r, q.T)
+        self.basis.setflags(write=False)
+        self.pinv.setflags(write=False)
+
+    def __repr__(self):
+        return f"<SlopeFitter(shape={self.shape}, J={len(self.n)}, ortho_norm={self.ortho_norm})>"
+
+    def fit(self, gx, gy):
+        """Coefficients (..., J) from slope maps of shape (..., H, W)."""
+        gx, gy = np.asarray(gx, dtype=float), np.asarray(gy, dtype=float)
+        samples = np.concatenate([gx[..., self.mask], gy[..., self.mask]], axis=-1)
+        coefs = np.zeros(samples.shape[:-1] + (len(self.n),))
+        coefs[..., 1:] = samples @ self.pinv.T
+        return coefs
+
+
+_slope_fitters = LRUCache(MAX_CACHED_SLOPE_FITTERS)
+
+
+def get_slope_fitter(x, y, n_max, mask=None, ortho_norm=False):
+    """SlopeFitter shared by every fit on the same (x, y, mask, n_max, ortho_norm) key."""
+    key = (array_key(x, y, mask), n_max, ortho_norm)
+    return _slope_fitters.get_or_create(key, lambda: SlopeFitter(x, y, n_max, mask, ortho_norm))
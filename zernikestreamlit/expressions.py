@@ -0,0 +1,200 @@
+"""Precomputed index of polynomial expressions.
+
+Building sympy expressions and printing them as LaTeX is the slowest part of
+the inspectors, so both are computed once by a build step for every valid
+(n, m) up to ``DEFAULT_N_MAX`` and saved as gzipped JSON, together with the
+normalization constants and the OSA/Noll/Fringe indices. Pages look entries up
+in O(1) and only fall back to sympy outside of the indexed range, where the
+entries built are kept, read-only, in a process-wide LRU of ``MAX_BUILT``
+entries shared by every session.
+
+    python -m zernikestreamlit.expressions [--n-max 30]
+"""
+import argparse
+import gzip
+import json
+import threading
+from pathlib import Path
+from types import MappingProxyType
+
+import streamlit as st
+
+from zernikestreamlit.cache import LRUCache, counted
+from zernikestreamlit.indexing import nm_to_fringe, nm_to_noll, nm_to_osa
+from zernikestreamlit.radial import integer_coefficients
+
+INDEX_PATH = Path(__file__).parent / "data" / "expressions.json.gz"
+INDEX_VERSION = 1
+DEFAULT_N_MAX = 30
+# entries built with sympy above the index that are kept alive
+MAX_BUILT = 512
+
+
+def _symbols():
+    import sympy as sp
+    return sp, sp.Symbol("rho"), sp.Symbol("theta")
+
+
+def radial_expr(n, m, ortho_norm=False):
+    """sympy expression of r_n^m(rho), from the exact integer coefficients of its factorial-sum definition."""
+    sp, rho, _ = _symbols()
+    m = abs(m)
+    if (n - m) % 2:
+        return sp.Integer(0)
+    expr = sp.Add(*(sp.Integer(c) * rho ** (m + 2 * k) for k, c in enumerate(integer_coefficients(n, m))))
+    if ortho_norm:
+        expr = sp.sqrt(2 * n + 2) * expr
+    return expr
+
+
+def angular_expr(m, ortho_norm=False):
+    """sympy expression of a_m(theta)."""
+    sp, _, theta = _symbols()
+    if m < 0:
+        expr = sp.sin(-m * theta)
+    elif m > 0:
+        expr = sp.cos(m * theta)
+    else:
+        expr = sp.Integer(1)
+    if ortho_norm:
+        expr = expr / sp.sqrt((1 + (m == 0)) * sp.pi)
+    return expr
+
+
+def zernike_expr(n, m, ortho_norm=False):
+    """sympy expression of z_n^m(rho, theta) = r_n^|m|(rho) a_m(theta)."""
+    return radial_expr(n, m, ortho_norm) * angular_expr(m, ortho_norm)
+
+
+def _entry(expr):
+    import sympy as sp
+    return {"expr": str(expr), "latex": sp.latex(expr)}
+
+
+def build_index(n_max=DEFAULT_N_MAX):
+    """Expressions, LaTeX, normalization constants and indices for every valid (n, m) with n <= n_max."""
+    import sympy as sp
+    index = {"version": INDEX_VERSION, "n_max": n_max, "radial": {}, "angular": {}, "zernike": {}}
+    for m in range(-n_max, n_max + 1):
+        norm = 1 / sp.sqrt((1 + (m == 0)) * sp.pi)
+        index["angular"][str(m)] = {
+            "raw": _entry(angular_expr(m)),
+            "ortho_norm": _entry(angular_expr(m, True)),
+            "norm": str(norm),
+            "norm_value": float(norm),
+        }
+    for n in range(n_max + 1):
+        for m in range(-n, n + 1, 2):
+            key = f"{n} {m}"
+            if m >= 0:
+                norm = sp.sqrt(2 * n + 2)
+                index["radial"][key] = {
+                    "raw": _entry(radial_expr(n, m)),
+                    "ortho_norm": _entry(radial_expr(n, m, True)),
+                    "norm": str(norm),
+                    "norm_value": float(norm),
+                }
+            norm = sp.sqrt(sp.Integer(2 * n + 2) / ((1 + (m == 0)) * sp.pi))
+            index["zernike"][key] = {
+                "raw": _entry(zernike_expr(n, m)),
+                "ortho_norm": _entry(zernike_expr(n, m, True)),
+                "norm": str(norm),
+                "norm_value": float(norm),
+                "osa": int(nm_to_osa(n, m)),
+                "noll": int(nm_to_noll(n, m)),
+                "fringe": int(nm_to_fringe(n, m)),
+            }
+    return index
+
+
+def load_index(path=INDEX_PATH):
+    """Read an index written by ``main``; an empty index if missing or from another version."""
+    try:
+        with gzip.open(path, "rt") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        index = {}
+    if index.get("version") != INDEX_VERSION:
+        return {"version": INDEX_VERSION, "n_max": -1, "radial": {}, "angular": {}, "zernike": {}}
+    return index
+
+
+@counted(st.cache_resource)
+def get_index():
+    """The expression index shipped with the app, shared by every session."""
+    return load_index()
+
+
+ZERO = {"expr": "0", "latex": "0"}
+
+# lookups answered by the index, counted across sessions for ``report``
+_index_hits = 0
+_index_lock = threading.Lock()
+# entries built above the index, shared read-only by every session
+_built = LRUCache(MAX_BUILT)
+
+
+def _lookup(kind, key, ortho_norm, build):
+    entry = get_index()[kind].get(key)
+    if entry is not None:
+        global _index_hits
+        with _index_lock:
+            _index_hits += 1
+        return entry["ortho_norm" if ortho_norm else "raw"]
+    return _built.get_or_create((kind, key, ortho_norm), lambda: MappingProxyType(_entry(build())))
+
+
+def radial_entry(n, m, ortho_norm=False):
+    """{"expr": ..., "latex": ...} of r_n^m, from the index when available."""
+    if n <= get_index()["n_max"] and (abs(m) > n or (n - m) % 2):
+        return ZERO
+    return _lookup("radial", f"{n} {abs(m)}", ortho_norm, lambda: radial_expr(n, m, ortho_norm))
+
+
+def angular_entry(m, ortho_norm=False):
+    """{"expr": ..., "latex": ...} of a_m, from the index when available."""
+    return _lookup("angular", str(m), ortho_norm, lambda: angular_expr(m, ortho_norm))
+
+
+def zernike_entry(n, m, ortho_norm=False):
+    """{"expr": ..., "latex": ...} of z_n^m, from the index when available."""
+    if n <= get_index()["n_max"] and (abs(m) > n or (n - m) % 2):
+        return ZERO
+    return _lookup("zernike", f"{n} {m}", ortho_norm, lambda: zernike_expr(n, m, ortho_norm))
+
+
+def zernike_info(n, m):
+    """Normalization constant and OSA/Noll/Fringe indices of z_n^m, or None outside of the index."""
+    entry = get_index()["zernike"].get(f"{n} {m}")
+    if entry is None:
+        return None
+    return {key: entry[key] for key in ("norm", "norm_value", "osa", "noll", "fringe")}
+
+
+def report():
+    """Index lookups, and size, hit rate and footprint of the entries built above the index, in the sidebar."""
+    stats = _built.stats()
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = stats["hits"] / lookups if lookups else 0.0
+    st.sidebar.caption(f"Expressions: {_index_hits} lookups from the index (n <= {get_index()['n_max']}); "
+                       f"{stats['entries']}/{stats['maxsize']} built above it and kept, "
+                       f"{stats['hits']} hits / {stats['misses']} misses ({hit_rate:.0%}), "
+                       f"{stats['nbytes'] / 1024:.0f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the precomputed expression index.")
+    parser.add_argument("--n-max", type=int, default=DEFAULT_N_MAX)
+    parser.add_argument("--output", type=Path, default=INDEX_PATH)
+    args = parser.parse_args()
+
+    index = build_index(args.n_max)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0 keeps the file identical from one build to the next
+    args.output.write_bytes(gzip.compress(json.dumps(index, separators=(",", ":")).encode(), mtime=0))
+    print(f"{len(index['zernike'])} Zernike, {len(index['radial'])} radial and {len(index['angular'])} angular "
+          f"entries written to {args.output} ({args.output.stat().st_size / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Least-squares Zernike fits with a cached factorization of the basis.
+
+The basis matrix B (points x J) of a pupil sampling is factored once as B = QR
+and turned into the pseudo-inverse P = R^-1 Q^T. Every later fit on the same
+(x, y, mask, J) key is then a single matrix product, and a stack of K surfaces
+is fitted in one BLAS call.
+"""
+import numpy as np
+
+from zernikestreamlit.basis import n_max_to_J, osa_nm, vector_to_coefs, zernike_matrix
+from zernikestreamlit.cache import LRUCache, array_key
+
+# number of distinct pupil samplings whose factorization is kept alive
+MAX_CACHED_FITTERS = 8
+
+
+class ZernikeFitter:
+    """Pseudo-inverse of the Zernike basis sampled at (x, y), restricted to the unit disk."""
+
+    def __init__(self, x, y, n_max, mask=None, ortho_norm=False):
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        rho = np.hypot(x, y)
+        inside = rho <= 1
+        if mask is not None:
+            inside &= np.asarray(mask, dtype=bool)
+
+        self.shape = x.shape
+        self.mask = inside
+        self.n_max = n_max
+        self.ortho_norm = ortho_norm
+        self.n, self.m = osa_nm(n_max_to_J(n_max))
+        if inside.sum() < len(self.n):
+            raise ValueError(f"{inside.sum()} samples in the pupil, at least {len(self.n)} are needed for n_max={n_max}")
+
+        # (points, J)
+        self.basis = zernike_matrix(self.n, self.m, rho[inside], np.arctan2(y, x)[inside], ortho_norm).T
+        q, r = np.linalg.qr(self.basis)
+        # (J, points)
+        self.pinv = np.linalg.solve(r, q.T)
+        self.basis.setflags(write=False)
+        self.pinv.setflags(write=False)
+
+    def __repr__(self):
+        return f"<ZernikeFitter(shape={self.shape}, points={self.pinv.shape[1]}, J={len(self.n)}, ortho_norm={self.ortho_norm})>"
+
+    def fit(self, zs):
+        """Coefficients of a surface (H, W) or a stack (K, H, W), as an array of shape (J,) or (K, J)."""
+        zs = np.asarray(zs, dtype=float)
+        samples = zs[..., self.mask]
+        return samples @ self.pinv.T
+
+    def reconstruct(self, coefs):
+        """Surfaces (..., H, W) from coefficients (..., J), NaN outside the pupil."""
+        coefs = np.asarray(coefs, dtype=float)
+        out = np.full(coefs.shape[:-1] + self.shape, np.nan)
+        out[..., self.mask] = coefs @ self.basis.T
+        return out
+
+    def residual_rms(self, zs, coefs):
+        """RMS of the fit residual over the pupil, per surface."""
+        zs = np.asarray(zs, dtype=float)
+        residual = zs[..., self.mask] - np.asarray(coefs) @ self.basis.T
+        return np.sqrt(np.mean(residual ** 2, axis=-1))
+
+    def as_dict(self, coefs, atol=0.0):
+        """{(n, m): coef} dict, the layout used by mocapy's WaveFront, dropping |coef| <= atol."""
+        return vector_to_coefs(coefs, atol)
+
+    def to_wavefront(self, coefs, atol=0.0):
+        """mocapy WaveFront from a coefficient vector."""
+        from mocapy.zernike import WaveFront
+        return WaveFront(self.as_dict(coefs, atol))
+
+
+_fitters = LRUCache(MAX_CACHED_FITTERS)
+
+
+def get_fitter(x, y, n_max, mask=None, ortho_norm=False):
+    """ZernikeFitter shared by every fit on the same (x, y, mask, n_max, ortho_norm) key.
+
+    Factorizations are kept in a process-wide LRU of MAX_CACHED_FITTERS entries.
+    """
+    key = (array_key(x, y, mask), n_max, ortho_norm)
+    return _fitters.get_or_create(key, lambda: ZernikeFitter(x, y, n_max, mask, ortho_norm))
+
+
+def fit_surfaces(x, y, zs, n_max, mask=None, ortho_norm=False):
+    """Fit one surface or a (K, H, W) stack sampled at (x, y), reusing the cached factorization."""
+    return get_fitter(x, y, n_max, mask, ortho_norm).fit(zs)
+
+
+def load_sampled_surface(file):
+    """Read a sampled surface from a ``.npy`` or ``.npz`` file (path or file-like).
+
+    A ``.npz`` holds ``x``, ``y`` and ``z`` arrays. A ``.npy`` holds ``z`` alone,
+    sampled on a square grid spanning [-1, 1] x [-1, 1].
+    """
+    data = np.load(file, allow_pickle=False)
+    if isinstance(data, np.lib.npyio.NpzFile):
+        with data:
+            missing = {"x", "y", "z"} - set(data.files)
+            if missing:
+                raise ValueError(f"missing arrays in .npz file: {sorted(missing)}")
+            return data["x"], data["y"], data["z"]
+    zs = np.asarray(data, dtype=float)
+    if zs.ndim < 2:
+        raise ValueError(f"expected a 2D surface, got shape {zs.shape}")
+    h, w = zs.shape[-2:]
+    x, y = np.meshgrid(np.linspace(-1, 1, w), np.linspace(-1, 1, h))
+    return x, y, zs
@@ -0,0 +1,173 @@
+"""Radial gallery figures, built once and saved.
+
+The gallery of the Radial page (1D curves of the first polynomials, 2D and 3D
+maps of r_n^m(rho) against the polynomial index) used to be rendered by every
+worker on its first request. Here all the polynomials are evaluated in one
+pass of the radial recurrence, which takes milliseconds: the cost of the
+gallery is the matplotlib rendering, so the figures are saved as PNG files
+that can be built ahead of time and loaded directly by the pages:
+
+    python -m zernikestreamlit.gallery [--polynomials 30]
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from zernikestreamlit.basis import radial_table
+
+# bump whenever the figures change, older builds are then rebuilt
+GALLERY_VERSION = 2
+GALLERY_DIR_ENV = "ZERNIKESTREAMLIT_GALLERY_DIR"
+PLOT_1D_N = 10
+PLOT_2D_N = 30
+SAMPLES = 201
+ARTIFACTS = ("plot_1d.png", "plot_2d.png", "plot_3d.png")
+
+
+def default_root():
+    root = os.environ.get(GALLERY_DIR_ENV)
+    if root:
+        return Path(root)
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "zernikestreamlit" / "gallery"
+
+
+def radial_pairs(count):
+    """First ``count`` (n, m) radial pairs, m >= 0, by increasing n then m."""
+    pairs = []
+    n = 0
+    while len(pairs) < count:
+        pairs += [(n, m) for m in range(n % 2, n + 1, 2)]
+        n += 1
+    return pairs[:count]
+
+
+def radial_values(pairs, samples=SAMPLES):
+    """r_n^m of every pair on ``samples`` points of [0, 1], shape (len(pairs), samples)."""
+    rhos = np.linspace(0, 1, samples)
+    ns, ms = np.array(pairs).reshape(-1, 2).T
+    return radial_table(int(ns.max(initial=0)), rhos)[ns, ms]
+
+
+def _png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def plot_1d(pairs, values, rhos):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    for (n, m), curve in zip(pairs, values):
+        ax.plot(rhos, curve, label=f"$r_{{{n}}}^{{{m}}}$")
+    ax.set_xlabel(r"$\rho$")
+    ax.legend(ncol=2, fontsize="small")
+    ax.grid(True)
+    return fig
+
+
+def plot_2d(pairs, values, rhos):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    mesh = ax.pcolormesh(rhos, np.arange(len(pairs)), np.asarray(values), shading="nearest", cmap="RdBu_r",
+                         vmin=-1, vmax=1)
+    ticks = np.arange(0, len(pairs), max(len(pairs) // 40, 1))
+    ax.set_yticks(ticks, [f"({pairs[j][0]}, {pairs[j][1]})" for j in ticks], fontsize="x-small")
+    ax.set_xlabel(r"$\rho$")
+    ax.set_ylabel("(n, m)")
+    fig.colorbar(mesh, ax=ax)
+    return fig
+
+
+def plot_3d(pairs, values, rhos):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot(projection="3d")
+    j, rho = np.meshgrid(np.arange(len(pairs)), rhos, indexing="ij")
+    ax.plot_surface(rho, j, np.asarray(values), cmap="viridis")
+    ax.set_xlabel(r"$\rho$")
+    ax.set_ylabel("polynomial")
+    ax.set_zlabel(r"$r_n^m(\rho)$")
+    return fig
+
+
+def build(polynomials=PLOT_2D_N, samples=SAMPLES):
+    """Gallery artifacts {file name: PNG bytes} of the first ``polynomials`` radial polynomials."""
+    pairs = radial_pairs(max(polynomials, PLOT_1D_N))
+    values = radial_values(pairs, samples)
+    rhos = np.linspace(0, 1, samples)
+    return {
+        "plot_1d.png": _png(plot_1d(pairs[:PLOT_1D_N], values[:PLOT_1D_N], rhos)),
+        "plot_2d.png": _png(plot_2d(pairs, values, rhos)),
+        "plot_3d.png": _png(plot_3d(pairs, values, rhos)),
+    }
+
+
+def _manifest(polynomials, samples):
+    return {"version": GALLERY_VERSION, "polynomials": polynomials, "samples": samples}
+
+
+def save(artifacts, root, polynomials=PLOT_2D_N, samples=SAMPLES):
+    """Write the artifacts and their manifest atomically, so that readers never see a partial build."""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    files = dict(artifacts, **{"manifest.json": json.dumps(_manifest(polynomials, samples)).encode()})
+    for name, data in files.items():
+        fd, tmp = tempfile.mkstemp(dir=root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, root / name)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+def load(root, polynomials=PLOT_2D_N, samples=SAMPLES):
+    """Artifacts saved by ``save`` with the same parameters and version, or None."""
+    root = Path(root)
+    try:
+        if json.loads((root / "manifest.json").read_text()) != _manifest(polynomials, samples):
+            return None
+        return {name: (root / name).read_bytes() for name in ARTIFACTS}
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def load_or_build(root=None, polynomials=PLOT_2D_N):
+    """Prebuilt artifacts from ``root``, or built and saved there for the other workers."""
+    root = default_root() if root is None else Path(root)
+    artifacts = load(root, polynomials)
+    if artifacts is None:
+        artifacts = build(polynomials)
+        try:
+            save(artifacts, root, polynomials)
+        except OSError:
+            # a read-only cache directory only costs the rebuild on the next worker
+            pass
+    return artifacts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prebuild the Radial gallery figures.")
+    parser.add_argument("--polynomials", type=int, default=PLOT_2D_N)
+    parser.add_argument("--root", type=Path, default=None, help=f"output directory (default: ${GALLERY_DIR_ENV} or ~/.cache)")
+    args = parser.parse_args()
+
+    root = default_root() if args.root is None else args.root
+    start = time.perf_counter()
+    artifacts = build(args.polynomials)
+    save(artifacts, root, args.polynomials)
+    print(f"{args.polynomials} polynomials in {time.perf_counter() - start:.2f} s, "
+          f"{sum(map(len, artifacts.values())) / 1024:.0f} KiB written to {root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Shared polar/Cartesian evaluation grids.
+
+A grid is built once per resolution and held in ``st.cache_resource`` so that
+every page and every session evaluates polynomials against the same read-only
+arrays instead of rebuilding the meshgrid and trig tables on each rerun.
+"""
+import numpy as np
+import streamlit as st
+
+from zernikestreamlit.cache import counted
+
+DEFAULT_RESOLUTION = 100
+# highest |m| for which cos(m*theta) and sin(m*theta) are tabulated
+DEFAULT_MAX_ORDER = 10
+# number of distinct resolutions kept alive by st.cache_resource
+MAX_CACHED_GRIDS = 4
+
+
+def _readonly(arr):
+    arr.setflags(write=False)
+    return arr
+
+
+class PolarGrid:
+    """Polar sampling of the unit disk, with its Cartesian twin and trig tables.
+
+    ``rho`` and ``theta`` follow the ``np.meshgrid(rhos, thetas)`` layout used in
+    the documentation: theta varies along axis 0, rho along axis 1. Since
+    ``cos(m*theta)`` only depends on theta, the trig tables are stored per theta
+    sample and broadcast by the basis engine.
+    """
+
+    def __init__(self, resolution=DEFAULT_RESOLUTION, max_order=DEFAULT_MAX_ORDER):
+        self.resolution = int(resolution)
+        self.max_order = int(max_order)
+
+        self.rhos = _readonly(np.linspace(0, 1, self.resolution))
+        self.thetas = _readonly(np.linspace(0, 2 * np.pi, self.resolution))
+        self.shape = (self.resolution, self.resolution)
+
+        self.rho = np.broadcast_to(self.rhos[np.newaxis, :], self.shape)
+        self.theta = np.broadcast_to(self.thetas[:, np.newaxis], self.shape)
+        self.x = _readonly(self.rhos[np.newaxis, :] * np.cos(self.thetas)[:, np.newaxis])
+        self.y = _readonly(self.rhos[np.newaxis, :] * np.sin(self.thetas)[:, np.newaxis])
+
+        # tables indexed by m, shared with the basis engine
+        ms = np.arange(self.max_order + 1)
+        self.cos_table = _readonly(np.cos(ms[:, np.newaxis] * self.thetas[np.newaxis, :]))
+        self.sin_table = _readonly(np.sin(ms[:, np.newaxis] * self.thetas[np.newaxis, :]))
+
+    def __repr__(self):
+        return f"<PolarGrid(resolution={self.resolution}, max_order={self.max_order})>"
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.rhos, self.thetas, self.x, self.y,
+                                      self.cos_table, self.sin_table))
+
+
+@counted(st.cache_resource, max_entries=MAX_CACHED_GRIDS)
+def get_grid(resolution=DEFAULT_RESOLUTION, max_order=DEFAULT_MAX_ORDER):
+    """Shared, read-only PolarGrid for a given resolution."""
+    return PolarGrid(resolution, max_order)
+
@@ -0,0 +1,144 @@
+"""Single-index schemes for Zernike polynomials, vectorized over numpy arrays.
+
+OSA/ANSI and Wyant indices start at 0, Noll and Fringe indices at 1. Every
+conversion works on whole arrays of indices at once, and ``reorder`` moves
+coefficient vectors from one scheme to another through precomputed
+permutation tables.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+SCHEMES = ("osa", "noll", "fringe", "wyant")
+FIRST_INDEX = {"osa": 0, "noll": 1, "fringe": 1, "wyant": 0}
+
+
+def _triangular_root(k):
+    # largest n with n*(n+1)/2 <= k, exact for integer k
+    k = np.asarray(k, dtype=np.int64)
+    n = ((np.sqrt(8 * k.astype(float) + 1) - 1) // 2).astype(np.int64)
+    n = np.where(n * (n + 1) // 2 > k, n - 1, n)
+    return np.where((n + 1) * (n + 2) // 2 <= k, n + 1, n)
+
+
+def _isqrt(k):
+    k = np.asarray(k, dtype=np.int64)
+    s = np.sqrt(k.astype(float)).astype(np.int64)
+    s = np.where(s * s > k, s - 1, s)
+    return np.where((s + 1) * (s + 1) <= k, s + 1, s)
+
+
+def _check(j, scheme):
+    j = np.asarray(j)
+    if np.any(j < FIRST_INDEX[scheme]):
+        raise ValueError(f"{scheme} indices start at {FIRST_INDEX[scheme]}")
+    return j.astype(np.int64)
+
+
+def nm_to_osa(n, m):
+    """OSA/ANSI index j = (n*(n+2) + m) / 2."""
+    n, m = np.asarray(n), np.asarray(m)
+    return (n * (n + 2) + m) // 2
+
+
+def osa_to_nm(j):
+    """(n, m) of OSA/ANSI indices."""
+    j = _check(j, "osa")
+    n = _triangular_root(j)
+    m = 2 * (j - n * (n + 1) // 2) - n
+    return n, m
+
+
+def nm_to_noll(n, m):
+    """Noll index: cos terms (m > 0) get even j, sin terms (m < 0) odd j."""
+    n, m = np.asarray(n), np.asarray(m)
+    quarter = n % 4
+    shift = ((m >= 0) & (quarter >= 2)) | ((m <= 0) & (quarter <= 1))
+    return n * (n + 1) // 2 + np.abs(m) + shift
+
+
+def noll_to_nm(j):
+    """(n, m) of Noll indices."""
+    j = _check(j, "noll")
+    n = _triangular_root(j - 1)
+    k = j - 1 - n * (n + 1) // 2
+    parity = n % 2
+    abs_m = 2 * ((k + 1 - parity) // 2) + parity
+    m = np.where(j % 2 == 0, abs_m, -abs_m)
+    return n, m
+
+
+def nm_to_fringe(n, m):
+    """Fringe (University of Arizona) index, ordered by (n + |m|) / 2 then decreasing |m|."""
+    n, m = np.asarray(n), np.asarray(m)
+    return (1 + (n + np.abs(m)) // 2) ** 2 - 2 * np.abs(m) + (m < 0)
+
+
+def fringe_to_nm(j):
+    """(n, m) of Fringe indices."""
+    j = _check(j, "fringe")
+    s = _isqrt(j - 1)
+    offset = j - 1 - s * s
+    abs_m = s - offset // 2
+    m = np.where(offset % 2 == 0, abs_m, -abs_m)
+    return 2 * s - abs_m, m
+
+
+def nm_to_wyant(n, m):
+    """Wyant index: the Fringe ordering, starting at 0."""
+    return nm_to_fringe(n, m) - 1
+
+
+def wyant_to_nm(j):
+    """(n, m) of Wyant indices."""
+    return fringe_to_nm(_check(j, "wyant") + 1)
+
+
+_TO_J = {"osa": nm_to_osa, "noll": nm_to_noll, "fringe": nm_to_fringe, "wyant": nm_to_wyant}
+_TO_NM = {"osa": osa_to_nm, "noll": noll_to_nm, "fringe": fringe_to_nm, "wyant": wyant_to_nm}
+
+
+def _scheme(scheme):
+    scheme = scheme.lower()
+    if scheme not in SCHEMES:
+        raise ValueError(f"unknown indexing scheme {scheme!r}, expected one of {SCHEMES}")
+    return scheme
+
+
+def nm_to_j(n, m, scheme):
+    """Single index of (n, m) in ``scheme``."""
+    return _TO_J[_scheme(scheme)](n, m)
+
+
+def j_to_nm(j, scheme):
+    """(n, m) of single indices in ``scheme``."""
+    return _TO_NM[_scheme(scheme)](j)
+
+
+def convert(j, src, dst):
+    """Convert single indices from scheme ``src`` to scheme ``dst``."""
+    return nm_to_j(*j_to_nm(j, src), dst)
+
+
+@lru_cache(maxsize=64)
+def permutation(src, dst, length):
+    """Positions in ``dst`` of the first ``length`` polynomials of ``src``, and the ``dst`` vector length.
+
+    The vector length is the smallest one holding every one of these
+    polynomials; it can be larger than ``length`` when the two schemes do not
+    order the same polynomials first (e.g. OSA and Fringe).
+    """
+    src, dst = _scheme(src), _scheme(dst)
+    j = np.arange(length) + FIRST_INDEX[src]
+    positions = convert(j, src, dst) - FIRST_INDEX[dst]
+    positions.setflags(write=False)
+    return positions, int(positions.max(initial=-1)) + 1
+
+
+def reorder(coefs, src, dst):
+    """Move coefficient vectors (..., L) indexed in ``src`` to the ``dst`` ordering, zero-filling gaps."""
+    coefs = np.asarray(coefs)
+    positions, length = permutation(src, dst, coefs.shape[-1])
+    out = np.zeros(coefs.shape[:-1] + (length,), dtype=coefs.dtype)
+    out[..., positions] = coefs
+    return out
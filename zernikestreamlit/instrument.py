@@ -0,0 +1,224 @@
+"""Opt-in timing of the stages of each page rerun.
+
+Off by default. It is turned on for one session with the ``profile`` query
+parameter (e.g. ``?profile=1``) or for every session with
+``ZERNIKESTREAMLIT_PROFILE=1``. A page calls ``start(page)`` first and
+``report()`` last. In between, every ``stage(name)`` block, every function
+decorated with ``timed(name)`` and every ``cache_data``/``cache_resource``
+function is timed. The caching decorators replace ``st.cache_data`` and
+``st.cache_resource`` and take the same arguments.
+
+Only the pages use this module, so that the library CLIs and the benchmarks do
+not load it. The shared caches of the library are declared with
+``cache.counted``, which counts hits and misses per thread without timing
+anything; the page caches here are counted the same way, and the report lists
+the lookups made by the rerun's thread. Pages time the library functions they
+call by wrapping them with ``timed``, and build their
+``PagePayload`` with ``page_payload``, which times the charts and measures
+their exact bytes in profiled reruns.
+
+``report()`` draws the breakdown of the rerun in the sidebar and appends it to
+a rolling log of the last ``LOG_SIZE`` reruns of the server, which can be
+downloaded as JSON lines. When ``ZERNIKESTREAMLIT_PROFILE_LOG`` names a file,
+each rerun is also appended to that file.
+
+The profile of a rerun is bound to the script thread running it. When
+profiling is off, a stage costs one thread-local lookup.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+from zernikestreamlit import cache
+from zernikestreamlit.payload import PagePayload, payload_bytes
+
+PROFILE_ENV = "ZERNIKESTREAMLIT_PROFILE"
+PROFILE_PARAM = "profile"
+LOG_ENV = "ZERNIKESTREAMLIT_PROFILE_LOG"
+LOG_SIZE = 500
+
+# last reruns of every session, appended from the script threads
+_log = deque(maxlen=LOG_SIZE)
+_log_lock = threading.Lock()
+# profile of the rerun running on each script thread
+_active = threading.local()
+
+
+def enabled():
+    """Whether this session is profiled, from ``ZERNIKESTREAMLIT_PROFILE`` or the ``profile`` query parameter."""
+    if os.environ.get(PROFILE_ENV, "").lower() not in ("", "0", "false"):
+        return True
+    return st.query_params.get(PROFILE_PARAM, "0").lower() not in ("0", "false")
+
+
+class Profile:
+    """Stages and cache lookups of one page rerun."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.stages = []
+        self.depth = 0
+        # cache lookups of this thread before the rerun
+        self._lookups = cache.lookups()
+
+    def __repr__(self):
+        return f"<Profile(page={self.page!r}, stages={len(self.stages)})>"
+
+    @property
+    def elapsed(self):
+        """Wall time since the start of the rerun [ms]."""
+        return (time.perf_counter() - self._start) * 1e3
+
+    def enter(self, name):
+        """Open the stage ``name``, returns its entry; stages are listed in call order, nested ones indented."""
+        entry = {"stage": name, "depth": self.depth, "ms": 0.0}
+        self.stages.append(entry)
+        self.depth += 1
+        return entry
+
+    @property
+    def caches(self):
+        """{function name: (hits, misses)} of the counted caches called since the start of the rerun."""
+        caches = {}
+        for name, (hits, misses) in cache.lookups().items():
+            before = self._lookups.get(name, (0, 0))
+            if (hits, misses) != before:
+                caches[name] = (hits - before[0], misses - before[1])
+        return caches
+
+    def to_dict(self):
+        return {
+            "page": self.page,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "total_ms": self.elapsed,
+            "stages": self.stages,
+            "caches": {name: {"hits": hits, "misses": misses} for name, (hits, misses) in self.caches.items()},
+        }
+
+
+def current():
+    """Profile of the rerun running on this thread, None when profiling is off or outside a page run."""
+    return getattr(_active, "profile", None)
+
+
+def start(page):
+    """Start profiling a rerun of ``page`` if this session is profiled."""
+    profile = Profile(page) if enabled() else None
+    _active.profile = profile
+    return profile
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as the stage ``name`` of the running rerun."""
+    profile = getattr(_active, "profile", None)
+    if profile is None:
+        yield
+        return
+    entry = profile.enter(name)
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry["ms"] = (time.perf_counter() - start_time) * 1e3
+        profile.depth = entry["depth"]
+
+
+def timed(name):
+    """Decorator timing every call of a function as the stage ``name``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_active, "profile", None) is None:
+                return func(*args, **kwargs)
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _traced(cache_decorator, func, **options):
+    return timed(f"{func.__qualname__}()")(cache.counted(cache_decorator, **options)(func))
+
+
+def cache_data(func=None, **options):
+    """``st.cache_data`` timed and counting its hits and misses."""
+    if func is None:
+        return functools.partial(cache_data, **options)
+    return _traced(st.cache_data, func, **options)
+
+
+def cache_resource(func=None, **options):
+    """``st.cache_resource`` timed and counting its hits and misses."""
+    if func is None:
+        return functools.partial(cache_resource, **options)
+    return _traced(st.cache_resource, func, **options)
+
+
+def chart(fig, **kwargs):
+    """``st.plotly_chart``, timed as a stage: the figure is serialized and queued for the browser."""
+    with stage("st.plotly_chart"):
+        return st.plotly_chart(fig, **kwargs)
+
+
+def page_payload(plots, **kwargs):
+    """``PagePayload`` drawing with ``chart``; in profiled reruns it measures the exact bytes, timed as ``serialize``."""
+    measure = timed("serialize")(payload_bytes) if current() is not None else None
+    return PagePayload(plots, measure=measure, plot=chart, **kwargs)
+
+
+def log():
+    """Profiled reruns of every session, oldest first."""
+    with _log_lock:
+        return list(_log)
+
+
+def _append(record):
+    with _log_lock:
+        _log.append(record)
+        path = os.environ.get(LOG_ENV)
+        if path:
+            with open(path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+def report():
+    """Close the profiled rerun: stage breakdown and cache lookups in the sidebar, record in the log."""
+    profile = current()
+    if profile is None:
+        return
+    _active.profile = None
+    record = profile.to_dict()
+    _append(record)
+
+    totals = {}
+    for entry in record["stages"]:
+        totals[entry["stage"]] = totals.get(entry["stage"], 0) + entry["ms"]
+    with st.sidebar:
+        st.subheader("Profile")
+        st.caption(f"Rerun of {profile.page}: {record['total_ms']:.0f} ms, {len(record['stages'])} timed stages")
+        with st.expander("Time per stage", expanded=True):
+            st.dataframe({"stage": list(totals), "ms": list(totals.values()),
+                          "calls": [sum(entry["stage"] == name for entry in record["stages"]) for name in totals]},
+                         hide_index=True)
+        if record["caches"]:
+            with st.expander("Cache lookups"):
+                st.dataframe({"function": list(record["caches"]),
+                              "hits": [counts["hits"] for counts in record["caches"].values()],
+                              "misses": [counts["misses"] for counts in record["caches"].values()]},
+                             hide_index=True)
+        with st.expander("Stages in call order"):
+            st.text("\n".join(f"{entry['ms']:9.1f} ms  {'  ' * entry['depth']}{entry['stage']}"
+                              for entry in record["stages"]))
+        reruns = log()
+        st.download_button(f"Download the log ({len(reruns)} reruns)",
+                           "".join(json.dumps(rerun) + "\n" for rerun in reruns),
+                           file_name="zernikestreamlit-profile.jsonl", mime="application/json")
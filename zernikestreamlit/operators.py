@@ -0,0 +1,109 @@
+"""Closed-form change of coordinates on coefficient vectors.
+
+Rotating, translating or scaling the pupil coordinates maps a wavefront of
+radial order <= n_max onto another one of the same order, so the new
+coefficients are a linear function of the old ones. Rotation is the 2x2 block
+per (n, +-m) pair derived on the Wavefront page; translation and scaling are
+precomputed (sparse) J x J matrices. Applying them costs O(J) (resp. one
+sparse product) instead of a full re-sampling and fit.
+
+Coefficient vectors are in OSA/ANSI order, as in ``zernikestreamlit.basis``.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from zernikestreamlit.basis import n_max_to_J, osa_nm, zernike_matrix
+from zernikestreamlit.fitting import get_fitter
+from zernikestreamlit.indexing import nm_to_osa
+
+# relative magnitude below which entries of a transform matrix are dropped
+SPARSE_RTOL = 1e-10
+
+
+def _pairs(J):
+    n, m = osa_nm(J)
+    positive = m > 0
+    j_pos = np.flatnonzero(positive)
+    j_neg = nm_to_osa(n[positive], -m[positive])
+    return j_pos, j_neg, m[positive]
+
+
+def rotate(coefs, alpha):
+    """Coefficients of W(rho, theta + alpha), for one or several angles.
+
+    ``coefs`` has shape (..., J) and ``alpha`` is a scalar or an array of shape
+    (A,); in the latter case the result has shape (A, ..., J), so a sweep over
+    hundreds of clocking angles is a single vectorized expression:
+
+        b_n^m  =  a_n^m cos(m alpha) + a_n^-m sin(m alpha)
+        b_n^-m = -a_n^m sin(m alpha) + a_n^-m cos(m alpha)
+    """
+    coefs = np.asarray(coefs, dtype=float)
+    alpha = np.asarray(alpha, dtype=float)
+    j_pos, j_neg, m = _pairs(coefs.shape[-1])
+
+    # broadcast angles over the leading axes of coefs
+    angles = alpha.reshape(alpha.shape + (1,) * (coefs.ndim - 1) + (1,))
+    c, s = np.cos(m * angles), np.sin(m * angles)
+    a_pos, a_neg = coefs[..., j_pos], coefs[..., j_neg]
+
+    out = np.broadcast_to(coefs, alpha.shape + coefs.shape).copy()
+    out[..., j_pos] = a_pos * c + a_neg * s
+    out[..., j_neg] = -a_pos * s + a_neg * c
+    return out
+
+
+def rotation_matrix(n_max, alpha):
+    """Block-diagonal J x J matrix of ``rotate``, with 2x2 blocks on the (n, +-m) pairs."""
+    J = n_max_to_J(n_max)
+    j_pos, j_neg, m = _pairs(J)
+    c, s = np.cos(m * alpha), np.sin(m * alpha)
+    matrix = np.eye(J)
+    matrix[j_pos, j_pos] = c
+    matrix[j_pos, j_neg] = s
+    matrix[j_neg, j_pos] = -s
+    matrix[j_neg, j_neg] = c
+    return matrix
+
+
+def _sampling(n_max):
+    # polar sampling with enough points for the fit to be exact up to n_max
+    res = 2 * n_max + 4
+    rho, theta = np.meshgrid(np.linspace(0, 1, res), np.linspace(0, 2 * np.pi, res, endpoint=False))
+    return rho * np.cos(theta), rho * np.sin(theta)
+
+
+@lru_cache(maxsize=64)
+def pupil_transform_matrix(n_max, dx=0.0, dy=0.0, scale=1.0, ortho_norm=False):
+    """J x J matrix M such that ``M @ a`` are the coefficients of W(scale*x - dx, scale*y - dy).
+
+    ``dx``, ``dy`` translate the coordinate system as in the Translation section
+    of the Wavefront page, and ``scale`` < 1 selects a concentric sub-aperture.
+    Since polynomials of degree <= n_max are closed under affine maps, the
+    matrix is exact; it is computed once per argument set by projecting the
+    mapped basis onto the basis with a cached fitter, then sparsified into a
+    ``scipy.sparse`` CSR matrix.
+    """
+    x, y = _sampling(n_max)
+    fitter = get_fitter(x, y, n_max, ortho_norm=ortho_norm)
+    xs, ys = scale * x - dx, scale * y - dy
+    mapped = zernike_matrix(fitter.n, fitter.m, np.hypot(xs, ys), np.arctan2(ys, xs), ortho_norm)
+    # column k holds the coefficients of the mapped z_k
+    matrix = fitter.fit(mapped).T
+    matrix[np.abs(matrix) < SPARSE_RTOL * max(np.abs(matrix).max(), 1.0)] = 0.0
+    # deferred: scipy is slow to import and only needed once a matrix is built
+    from scipy import sparse
+    return sparse.csr_matrix(matrix)
+
+
+def translate(coefs, dx, dy, scale=1.0, ortho_norm=False):
+    """Coefficients of W(scale*x - dx, scale*y - dy) for coefficient vectors of shape (..., J)."""
+    coefs = np.asarray(coefs, dtype=float)
+    n = osa_nm(coefs.shape[-1])[0]
+    n_max = int(n[-1])
+    if n_max_to_J(n_max) != coefs.shape[-1]:
+        raise ValueError(f"{coefs.shape[-1]} coefficients do not cover whole radial orders")
+    matrix = pupil_transform_matrix(n_max, float(dx), float(dy), float(scale), ortho_norm)
+    # (M @ a^T)^T, with a stack of vectors as the columns of a dense matrix
+    return np.asarray((matrix @ coefs.reshape(-1, coefs.shape[-1]).T).T).reshape(coefs.shape)
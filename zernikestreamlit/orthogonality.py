@@ -0,0 +1,67 @@
+"""Numerical orthogonality checks through Gram matrices.
+
+Instead of integrating pairs of polynomials one at a time, the basis is
+evaluated once on quadrature nodes, B of shape (J, points), and every inner
+product comes out of one matrix product G = B W B^T. The nodes are
+Gauss-Legendre in rho (with the rho dρ weight folded in) times equispaced in
+theta, which integrate the products of polynomials up to n_max exactly, so G
+only differs from the analytic result by rounding.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from zernikestreamlit.basis import n_max_to_J, normalization, osa_nm, zernike_matrix
+
+
+def _readonly(*arrays):
+    for arr in arrays:
+        arr.setflags(write=False)
+    return arrays
+
+
+@lru_cache(maxsize=32)
+def radial_quadrature(n_max):
+    """Nodes and weights on [0, 1] integrating p(rho) * rho exactly for p of degree <= 2 * n_max."""
+    # the integrand has degree 2 * n_max + 1, exact with k nodes when 2k - 1 >= 2 * n_max + 1
+    x, w = np.polynomial.legendre.leggauss(n_max + 1)
+    rho = (x + 1) / 2
+    return _readonly(rho, w / 2 * rho)
+
+
+@lru_cache(maxsize=32)
+def angular_quadrature(m_max):
+    """Equispaced nodes and weights on [0, 2pi) integrating trigonometric polynomials of degree <= 2 * m_max exactly."""
+    count = 2 * m_max + 1
+    theta = np.linspace(0, 2 * np.pi, count, endpoint=False)
+    return _readonly(theta, np.full(count, 2 * np.pi / count))
+
+
+@lru_cache(maxsize=32)
+def disk_quadrature(n_max):
+    """(rho, theta, weights) on the unit disk, in the meshgrid layout of the grids, exact up to order n_max."""
+    rho, w_rho = radial_quadrature(n_max)
+    theta, w_theta = angular_quadrature(n_max)
+    rho, theta = np.meshgrid(rho, theta)
+    return _readonly(rho, theta, np.outer(w_theta, w_rho))
+
+
+def gram_matrix(n_max, ortho_norm=False):
+    """(J, J) inner products of the Zernike polynomials up to n_max, in OSA order."""
+    rho, theta, weights = disk_quadrature(n_max)
+    n, m = osa_nm(n_max_to_J(n_max))
+    basis = zernike_matrix(n, m, rho, theta, ortho_norm).reshape(len(n), -1)
+    return (basis * weights.ravel()) @ basis.T
+
+
+def expected_norms(n, m, ortho_norm=False):
+    """Analytic z_n^m . z_n^m: (1 + delta_m0) pi / (2n + 2), or 1 when orthonormalized."""
+    if ortho_norm:
+        return np.ones(np.shape(n))
+    return 1 / normalization(n, m) ** 2
+
+
+def normalization_deviation(gram, n, m, ortho_norm=False):
+    """Relative deviation of the diagonal of ``gram`` from the analytic norms."""
+    expected = expected_norms(n, m, ortho_norm)
+    return np.diag(gram) / expected - 1
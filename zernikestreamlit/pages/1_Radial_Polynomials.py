@@ -1,9 +1,20 @@
 import streamlit as st
-from mocapy.zernike import Radial
-import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import sympy as sp
+
+from zernikestreamlit import background, expressions, gallery, instrument
+from zernikestreamlit.expressions import radial_entry
+from zernikestreamlit.grid import get_grid
+from zernikestreamlit.surface_store import get_surface
+from zernikestreamlit.plotting import surface_figure
+
+instrument.start("Radial Polynomials")
+
+# library functions, timed in profiled reruns
+radial_entry = instrument.timed("expression")(radial_entry)
+get_surface = instrument.timed("get_surface()")(get_surface)
+surface_figure = instrument.timed("figure")(surface_figure)
+
+# highest order of the inspector, evaluated by the recurrence of zernikestreamlit.radial
+MAX_INSPECTOR_ORDER = 60
 
 st.title("Radial Polynomials")
 st.write(
@@ -24,16 +35,14 @@ st.sidebar.markdown("""
 """)
 
 # Intro plot
-@st.cache_resource
+@instrument.cache_resource
 def intro_3d_plot(n=7, m=1):
-    fig = Radial(n, m).plot_3d_plotly()
-    fig.update_layout(title=f"Radial(n={n}, m={m})")
-    return fig
+    return surface_figure(get_grid(), get_surface("radial", n, m), title=f"Radial(n={n}, m={m})")
 
-st.plotly_chart(intro_3d_plot(), use_container_width=True)
+instrument.chart(intro_3d_plot(), width="stretch")
 
 # Definition Section
-@st.cache_resource
+@instrument.cache_resource
 def definition_content():
     st.header("Definition")
     st.write(r"Radial function is denoted $r_{n}^m$, for $n \ge m \ge 0$ and $n, m \in \mathbb{N}$:")
@@ -71,7 +80,7 @@ definition_content()
 
 # Evaluation Section
 st.header("Evaluating")
-@st.cache_data
+@instrument.cache_data
 def static_evaluation_content():
     st.write(r"""
     Several options are available to evaluate a polynomial, either as a 1D function of $\rho$, or as a 2D function of $x, y$.
@@ -93,40 +102,38 @@ static_evaluation_content()
 # Radial Inspector Section
 st.header("Radial Inspector")
 st.write("Use the controls to visualize the polynomial based on indices `n` and `m`.")
-def evaluate_radial_polynomial(n, m, rho):
-    try:
-        return Radial(n, m)(rho)
-    except Exception as e:
-        return str(e)
-
+st.caption(r"""Surfaces are evaluated from exact integer coefficient tables: with Horner's scheme on $\rho^2$ at low
+orders, with the recurrence of the Jacobi polynomials $r_n^m(\rho) = \rho^m P_{(n-m)/2}^{(0, m)}(2\rho^2 - 1)$ above,
+which does not lose precision to the cancellation of the large alternating coefficients.""")
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.number_input("`n`", min_value=0, max_value=10, value=0, key='n_input')
+    st.number_input("`n`", min_value=0, max_value=MAX_INSPECTOR_ORDER, value=0, key='n_input')
 with col2:
-    st.number_input("`m`", min_value=0, max_value=10, value=0, key='m_input')
+    st.number_input("`m`", min_value=0, max_value=MAX_INSPECTOR_ORDER, value=0, key='m_input')
 with col3:
     ortho_norm = st.checkbox("`ortho_norm`")
 
-r = Radial(st.session_state.n_input, st.session_state.m_input, ortho_norm)
-
 col1, col2 = st.columns(2)
 with col1:
     try:
         st.code(f">>> r = Radial(n={st.session_state.n_input}, m={st.session_state.m_input}, ortho_norm={ortho_norm})")
-        st.latex(rf"r_{{{st.session_state.n_input}}}^{{{st.session_state.m_input}}}(\rho) = {sp.latex(r._expr)}")
+        st.latex(rf"r_{{{st.session_state.n_input}}}^{{{st.session_state.m_input}}}(\rho) = {radial_entry(st.session_state.n_input, st.session_state.m_input, ortho_norm)['latex']}")
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
 
 with col2:
     try:
-        fig = r.plot_3d_plotly()
-        fig.update_layout(title="")
-        st.plotly_chart(fig, use_container_width=True)
+        surface = get_surface("radial", st.session_state.n_input, st.session_state.m_input, ortho_norm)
+        fig = surface_figure(get_grid(), surface)
+        instrument.chart(fig, width="stretch")
     except Exception as e:
         st.error(f"An error occurred while plotting: {str(e)}")
 
+# expression lookups: from the index, or built once and shared by every session
+expressions.report()
+
 # Normalization Section
-@st.cache_data
+@instrument.cache_data
 def display_normalization_content():
     st.header("Normalization and Orthogonality")
     st.latex(r"r_n^{m} \cdot r_{n'}^{m} = \int_0^1 r_n^m(\rho)r_{n'}^m(\rho) \rho d\rho = \frac{\delta_{n,n'}}{2n+2}")
@@ -143,29 +150,29 @@ display_normalization_content()
 
 # Radial Helpers Section
 st.header("Radial Class Helpers")
-st.subheader("1D Plots")
-st.markdown("Plotting the 1D for the N first polynomials.")
-@st.cache_data
-def cached_plot_1D(N=10):
-    fig = Radial.plot_1D(N=N)
-    return fig
 
-st.pyplot(cached_plot_1D())
+def radial_gallery(artifacts):
+    st.subheader("1D Plots")
+    st.markdown("Plotting the 1D for the N first polynomials.")
+    st.image(artifacts["plot_1d.png"])
+
+    st.subheader("2D Plots")
+    st.image(artifacts["plot_2d.png"])
 
-st.subheader("2D Plots")
-@st.cache_data
-def cached_plot_2D(N=30):
-    fig = Radial.plot_2D(N=N)
-    return fig
+    st.subheader("3D Plot")
+    st.image(artifacts["plot_3d.png"])
 
-st.pyplot(cached_plot_2D())
+# prebuilt with `python -m zernikestreamlit.gallery`, otherwise built once and saved; computed in the background, once
+# for every session, so the inspector above does not wait for it
+future = background.submit(("radial_gallery", gallery.PLOT_2D_N), gallery.load_or_build)
+background.section(future, radial_gallery, placeholder="Building the gallery of radial polynomials...")
 
-st.subheader("3D Plot")
-@st.cache_resource
-def cached_plot_3D():
-    fig = Radial.plot_3D()
-    return fig
+@instrument.cache_data
+def radial_summary():
+    # mocapy (and the sympy/matplotlib it pulls in) is only needed for this table
+    from mocapy.zernike import Radial
+    return Radial.summup()
 
-st.pyplot(cached_plot_3D())
+st.dataframe(radial_summary())
 
-st.dataframe(Radial.summup())
+instrument.report()
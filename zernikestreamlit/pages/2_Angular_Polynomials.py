@@ -1,22 +1,31 @@
 import streamlit as st
-from mocapy.zernike import Angular
-import sympy as sp
+
+from zernikestreamlit import expressions, instrument
+from zernikestreamlit.expressions import angular_entry
+from zernikestreamlit.grid import get_grid
+from zernikestreamlit.surface_store import get_surface
+from zernikestreamlit.plotting import surface_figure
+
+instrument.start("Angular Polynomials")
+
+# library functions, timed in profiled reruns
+angular_entry = instrument.timed("expression")(angular_entry)
+get_surface = instrument.timed("get_surface()")(get_surface)
+surface_figure = instrument.timed("figure")(surface_figure)
 
 # Title of the app
 st.title("Angular Polynomials")
 
 # Caching the 3D plot function
-@st.cache_resource
+@instrument.cache_resource
 def get_angular_plot(m):
-    fig = Angular(m).plot_3d_plotly()
-    fig.update_layout(title=f"Angular(m={m})")
-    return fig
+    return surface_figure(get_grid(), get_surface("angular", 0, m), title=f"Angular(m={m})")
 
 # Interactive slider for m parameter in intro plot
 st.header("Intro Plot")
 m_value = st.slider("Select value of m", min_value=-10, max_value=10, value=5)
 fig = get_angular_plot(m_value)
-st.plotly_chart(fig, use_container_width=True)
+instrument.chart(fig, width="stretch")
 
 # Definition section
 st.header('Definition')
@@ -45,9 +54,8 @@ a.plot_3d_plotly()
 """)
 
 # Displaying an example 3D plot of Angular(3)
-fig_example = Angular(3).plot_3d_plotly()
-fig_example.update_layout(title='Angular(3) Example Plot')
-st.plotly_chart(fig_example, use_container_width=True)
+fig_example = get_angular_plot(3)
+instrument.chart(fig_example, width="stretch")
 
 # Interactive Angular Inspector
 st.header("Angular Inspector")
@@ -62,9 +70,9 @@ with col1:
     
     # Attempt to create Angular instance with user inputs and display its properties
     try:
-        angular_instance = Angular(m_input, ortho_norm=ortho_norm)
-        st.code(f">>> a = Angular(m={m_input}, ortho_norm={ortho_norm})\n>>> a\n{repr(angular_instance)}")
-        expr_str = fr'a^{{{m_input}}}(\theta) = {sp.latex(angular_instance._expr)}'
+        entry = angular_entry(m_input, ortho_norm)
+        st.code(f">>> a = Angular(m={m_input}, ortho_norm={ortho_norm})\n>>> a\n<Angular(m={m_input}, ortho_norm={ortho_norm} : {entry['expr']})")
+        expr_str = fr'a^{{{m_input}}}(\theta) = {entry["latex"]}'
         st.latex(expr_str)
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
@@ -72,12 +80,15 @@ with col1:
 with col2:
     # Try to plot the Angular function
     try:
-        fig_inspector = angular_instance.plot_3d_plotly()
-        fig_inspector.update_layout(title=f"Angular(m={m_input}) 3D Plot")
-        st.plotly_chart(fig_inspector, use_container_width=True)
+        surface = get_surface("angular", 0, m_input, ortho_norm)
+        fig_inspector = surface_figure(get_grid(), surface, title=f"Angular(m={m_input}) 3D Plot")
+        instrument.chart(fig_inspector, width="stretch")
     except Exception as e:
         st.error(f"Plotting error: {str(e)}")
 
+# expression lookups: from the index, or built once and shared by every session
+expressions.report()
+
 # Normalization and orthogonality section
 st.header('Normalization and Orthogonality')
 st.markdown(r"""
@@ -111,4 +122,11 @@ st.write("The `ortho_norm` argument controls whether a polynomial is self-normal
 
 # Display a summary dataframe of Angular polynomials
 st.write("Summary of Angular Polynomials:")
-st.dataframe(Angular.summup())
+@instrument.cache_data
+def angular_summary():
+    from mocapy.zernike import Angular
+    return Angular.summup()
+
+st.dataframe(angular_summary())
+
+instrument.report()
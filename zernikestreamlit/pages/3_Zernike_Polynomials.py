@@ -1,9 +1,33 @@
+import time
+
+import numpy as np
 import streamlit as st
-from mocapy.zernike import Zernike
+
+from zernikestreamlit import expressions, instrument
+from zernikestreamlit.basis import osa_nm
+from zernikestreamlit.derivatives import gradient_coefficients, gradient_matrix
+from zernikestreamlit.expressions import zernike_entry, zernike_info
+from zernikestreamlit.grid import get_grid
+from zernikestreamlit.indexing import FIRST_INDEX, SCHEMES, j_to_nm, nm_to_j, reorder
+from zernikestreamlit.orthogonality import gram_matrix, normalization_deviation
+from zernikestreamlit.surface_store import get_surface
+from zernikestreamlit.plotting import heatmap_figure, quiver_figure, surface_figure
 
 # Set wide layout
 st.set_page_config(layout="wide")
 
+instrument.start("Zernike Polynomials")
+
+# library functions, timed in profiled reruns
+zernike_entry = instrument.timed("expression")(zernike_entry)
+get_surface = instrument.timed("get_surface()")(get_surface)
+heatmap_figure = instrument.timed("figure")(heatmap_figure)
+quiver_figure = instrument.timed("figure")(quiver_figure)
+surface_figure = instrument.timed("figure")(surface_figure)
+
+# seven charts: the Gram matrix, three components in the inspector, two derivatives and the gradient field
+payload = instrument.page_payload(plots=7)
+
 # Title and introductory header
 st.title('Zernike Polynomials')
 st.header('Recap')
@@ -51,6 +75,41 @@ st.latex(r"Z_n^m \cdot Z_{n'}^{m'} = \delta_{nmn'm'}")
 st.write('The leading normalization coefficient is:')
 st.latex(r"N_n^m = N_n \cdot N_m = \sqrt{2n+2} \cdot \frac{1}{\sqrt{(1+\delta_{m0})\pi}} = \sqrt{ \frac{ 2n+2 }{(1+\delta_{m0})\pi}}")
 
+# Gram matrix of the first polynomials
+st.write(r"""Rather than checking these dot products one pair at a time, all of them can be computed at once: with the basis
+evaluated on quadrature nodes as a $J \times P$ matrix $B$ and the quadrature weights as a diagonal $W$, the Gram matrix
+is $G = B W B^T$. Gauss-Legendre nodes in $\rho$ times equispaced nodes in $\theta$ integrate these polynomials exactly,
+so $G$ only differs from the analytic result by rounding errors:""")
+st.code(r"""
+>>> from zernikestreamlit.orthogonality import gram_matrix
+>>> G = gram_matrix(n_max=10, ortho_norm=True)   # (66, 66), close to the identity
+""")
+
+
+@instrument.cache_data
+def gram_check(n_max, ortho_norm):
+    start = time.perf_counter()
+    gram = gram_matrix(n_max, ortho_norm)
+    elapsed = time.perf_counter() - start
+    n_gram, m_gram = osa_nm(len(gram))
+    return gram, normalization_deviation(gram, n_gram, m_gram, ortho_norm), elapsed
+
+
+col1, col2 = st.columns([0.3, 0.7])
+with col1:
+    gram_n_max = st.number_input("Highest radial order `n`", min_value=1, max_value=20, value=6, key='gram_n_max')
+    gram_ortho_norm = st.checkbox("Orthonormalize", key='gram_ortho_norm')
+    gram, deviation, elapsed = gram_check(gram_n_max, gram_ortho_norm)
+    st.metric("Polynomials", len(gram))
+    st.metric("Max |off-diagonal|", f"{np.abs(gram - np.diag(np.diag(gram))).max():.1e}")
+    st.metric("Max |norm deviation| (relative)", f"{np.abs(deviation).max():.1e}")
+    st.metric("Evaluation and product", f"{elapsed * 1e3:.1f} ms")
+with col2:
+    gram_n, gram_m = osa_nm(len(gram))
+    labels = [f"({n_j}, {m_j})" for n_j, m_j in zip(gram_n, gram_m)]
+    payload.chart(heatmap_figure(gram, labels, title="Gram matrix"), key='gram_heatmap')
+    st.bar_chart({"norm deviation": deviation}, x_label="OSA index j", y_label="relative deviation")
+
 # Zernike polynomial creation example
 st.write('To create a Zernike polynomial:')
 st.code(r"""
@@ -84,30 +143,79 @@ with col2:
 with col3:
     ortho_norm = st.checkbox("Orthonormalize")
 
-# Create Zernike instance
-z = Zernike(n, m, ortho_norm)
+st.latex(rf"z_{{{n}}}^{{{m}}}(\rho, \theta) = {zernike_entry(n, m, ortho_norm)['latex']}")
+info = zernike_info(n, m)
+# expression lookups: from the index, or built once and shared by every session
+expressions.report()
+if info is not None:
+    st.write(f"Normalization constant $N_{{{n}}}^{{{m}}}$ = `{info['norm']}` ≈ {info['norm_value']:.6f}, "
+             f"OSA/ANSI index {info['osa']}, Noll index {info['noll']}, Fringe index {info['fringe']}.")
+
+# surfaces evaluated on the shared grid, read from the on-disk store, at the level of detail of a third of the page
+resolution = payload.resolution(columns=3)
+grid = get_grid(resolution)
 
 # Plotting each component in 3 columns
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    fig = z.R.plot_3d_plotly(False)
-    fig.update_layout(title='Radial Component')
-    st.plotly_chart(fig, use_container_width=True)
+    fig = surface_figure(grid, get_surface('radial', n, m, ortho_norm, resolution), cb=False, title='Radial Component')
+    payload.chart(fig, key='radial_component')
 
 with col2:
-    fig = z.A.plot_3d_plotly(False)
-    fig.update_layout(title='Angular Component')
-    st.plotly_chart(fig, use_container_width=True)
+    fig = surface_figure(grid, get_surface('angular', 0, m, ortho_norm, resolution), cb=False, title='Angular Component')
+    payload.chart(fig, key='angular_component')
 
 with col3:
-    fig = z.plot_3d_plotly(False)
-    fig.update_layout(title='Zernike Polynomial')
-    st.plotly_chart(fig, use_container_width=True)
+    fig = surface_figure(grid, get_surface('zernike', n, m, ortho_norm, resolution), cb=False, title='Zernike Polynomial')
+    payload.chart(fig, key='zernike_polynomial')
 
 # Indexing schemes section
 st.header('Indexing Schemes')
 st.write("Several indexing schemes have been developed to order Zernike polynomials as a sequence, which is useful for readability and control flow (e.g., looping over the first N polynomials).")
+st.markdown(r"""
+- **OSA/ANSI** (starts at 0): $j = \frac{n(n+2)+m}{2}$, ordered by $n$ then $m$.
+- **Noll** (starts at 1): ordered by $n$ then $|m|$, even $j$ for $m>0$ (cosine) terms and odd $j$ for $m<0$ (sine) terms.
+- **Fringe** (starts at 1): ordered by $\frac{n+|m|}{2}$ then decreasing $|m|$, $j = \left(1+\frac{n+|m|}{2}\right)^2 - 2|m| + [m<0]$.
+- **Wyant** (starts at 0): the Fringe ordering, shifted by one.
+""")
+st.write("All conversions work on whole arrays of indices, and coefficient vectors are moved between schemes with precomputed permutation tables:")
+st.code(r"""
+>>> from zernikestreamlit.indexing import j_to_nm, nm_to_j, convert, reorder
+>>> n, m = j_to_nm(np.arange(1, 100_001), "noll")
+>>> convert([4, 11, 22], "noll", "fringe")
+array([ 4,  9, 16])
+>>> fringe_coefs = reorder(osa_coefs, "osa", "fringe")
+""")
+
+col1, col2 = st.columns([0.4, 0.6])
+with col1:
+    scheme = st.selectbox("Scheme of the index", SCHEMES, key='index_scheme')
+    j = st.number_input("Index `j`", min_value=FIRST_INDEX[scheme], value=max(FIRST_INDEX[scheme], 4), key='index_j')
+    j_n, j_m = j_to_nm(j, scheme)
+    st.latex(rf"j_{{\mathrm{{{scheme}}}}} = {j} \Rightarrow (n, m) = ({j_n}, {j_m})")
+    st.write(", ".join(f"{other.upper() if other == 'osa' else other.capitalize()}: {nm_to_j(j_n, j_m, other)}" for other in SCHEMES))
+with col2:
+    n_table = st.number_input("Radial orders in the table", min_value=1, max_value=30, value=4, key='index_table_n')
+    table_n, table_m = j_to_nm(np.arange((n_table + 1) * (n_table + 2) // 2), "osa")
+    st.dataframe({"n": table_n, "m": table_m, **{other: nm_to_j(table_n, table_m, other) for other in SCHEMES}}, hide_index=True)
+
+st.write("Reorder a coefficient vector from one scheme to another:")
+col1, col2, col3 = st.columns([0.2, 0.2, 0.6])
+with col1:
+    src = st.selectbox("From", SCHEMES, index=1, key='reorder_src')
+with col2:
+    dst = st.selectbox("To", SCHEMES, index=0, key='reorder_dst')
+with col3:
+    text = st.text_input("Coefficients, comma separated", value="0, 0.1, -0.2, 0.5, 0.03, 0, 0.3", key='reorder_coefs')
+try:
+    coefs = np.array([float(c) for c in text.split(",") if c.strip()])
+    reordered = reorder(coefs, src, dst)
+    first = FIRST_INDEX[dst]
+    out_n, out_m = j_to_nm(np.arange(first, first + len(reordered)), dst)
+    st.dataframe({dst: np.arange(first, first + len(reordered)), "n": out_n, "m": out_m, "coefficient": reordered}, hide_index=True)
+except ValueError as e:
+    st.error(f"Could not reorder the coefficients: {str(e)}")
 
 # Properties Section
 st.header('Properties')
@@ -121,7 +229,66 @@ st.latex(r"""
 """)
 st.markdown(r"with $N_n^m=\sqrt{\frac{2(n+1)}{1+\delta_{0m}}}$")
 
+st.write(r"""Since the derivatives of a polynomial of order $n$ are polynomials of order $n-1$, they are exact linear combinations
+of lower-order Zernikes. The corresponding sparse derivative matrices are computed once, then the derivative basis on any
+point set (including $\rho=0$) is a sparse product with the basis. The same matrices give a least-squares fit of
+coefficients from measured slopes, e.g. from a Shack-Hartmann sensor, with a factorization cached per sampling:""")
+st.code(r"""
+>>> from zernikestreamlit.derivatives import derivative_matrices, gradient_matrix, get_slope_fitter
+>>> Dx, Dy = derivative_matrices(n_max=10)          # dz_j/dx = sum_k Dx[j, k] z_k
+>>> dzdx, dzdy = gradient_matrix(n, m, rho, theta)  # (J, ...) derivative bases
+>>> coefs = get_slope_fitter(x, y, n_max=10).fit(slopes_x, slopes_y)
+""")
+
+
+@instrument.cache_data
+def gradient_surfaces(n, m, ortho_norm, resolution):
+    grid = get_grid(resolution)
+    dx, dy = gradient_matrix([n], [m], grid.rho, grid.theta, ortho_norm)
+    # coarse Cartesian sampling for the arrows
+    xs, ys = np.meshgrid(np.linspace(-1, 1, 21), np.linspace(-1, 1, 21))
+    inside = np.hypot(xs, ys) <= 1
+    xs, ys = xs[inside], ys[inside]
+    u, v = gradient_matrix([n], [m], np.hypot(xs, ys), np.arctan2(ys, xs), ortho_norm)
+    return dx[0], dy[0], (xs, ys, u[0], v[0])
+
+
+def expansion_latex(row, ortho_norm):
+    letter = "Z" if ortho_norm else "z"
+    terms = [(c, k) for k, c in enumerate(row) if c != 0]
+    if not terms:
+        return "0"
+    k_n, k_m = j_to_nm(np.array([k for _, k in terms]), "osa")
+    return " + ".join(f"{c:.4g} {letter}_{{{kn}}}^{{{km}}}" for (c, _), kn, km in zip(terms, k_n, k_m)).replace("+ -", "- ")
+
+
+st.write(f"Gradient of the polynomial selected in the inspector above, $(n, m) = ({n}, {m})$:")
+if (n - m) % 2 or abs(m) > n:
+    st.info("Select a valid pair (n >= m, n - m even) in the Zernike inspector to see its gradient.")
+else:
+    letter = "Z" if ortho_norm else "z"
+    for axis, row in zip("xy", gradient_coefficients(n, m, ortho_norm)):
+        st.latex(rf"\frac{{\partial {letter}_{{{n}}}^{{{m}}}}}{{\partial {axis}}} = {expansion_latex(row, ortho_norm)}")
+    dzdx, dzdy, arrows = gradient_surfaces(n, m, ortho_norm, resolution)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        payload.chart(surface_figure(grid, dzdx, cb=False, title="∂z/∂x"), key='gradient_x')
+    with col2:
+        payload.chart(surface_figure(grid, dzdy, cb=False, title="∂z/∂y"), key='gradient_y')
+    with col3:
+        payload.chart(quiver_figure(*arrows, title="Gradient field"), key='gradient_field')
+
+payload.report()
+
 
 # Display a summary dataframe of Zernike polynomials
 st.write("Summary of Zernike Polynomials:")
-st.dataframe(Zernike.summup())
+@instrument.cache_data
+def zernike_summary():
+    # mocapy (and the sympy/matplotlib it pulls in) is only needed for this table
+    from mocapy.zernike import Zernike
+    return Zernike.summup()
+
+st.dataframe(zernike_summary())
+
+instrument.report()
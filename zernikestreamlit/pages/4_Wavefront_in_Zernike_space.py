@@ -1,6 +1,31 @@
+import time
+
 import streamlit as st
-from mocapy.zernike import Zernike, WaveFront
+import numpy as np
+from zernikestreamlit import instrument
+from zernikestreamlit.accumulator import session_accumulator
+from zernikestreamlit.basis import coefs_to_vector, get_grid_basis, n_max_to_J, osa_nm, vector_to_coefs, zernike_matrix
+from zernikestreamlit.fitting import get_fitter, load_sampled_surface
+from zernikestreamlit.grid import get_grid
+from zernikestreamlit.operators import rotate, translate
+from zernikestreamlit.payload import decimate
+from zernikestreamlit.plotting import surface_figure, xy_surface_figure
+from zernikestreamlit.pupil import annular_mask, get_masked_basis
+from zernikestreamlit.surface_store import get_surface
+
+instrument.start("Wavefront in Zernike space")
 
+# library functions, timed in profiled reruns
+get_grid_basis = instrument.timed("get_grid_basis()")(get_grid_basis)
+get_fitter = instrument.timed("get_fitter()")(get_fitter)
+get_masked_basis = instrument.timed("get_masked_basis()")(get_masked_basis)
+get_surface = instrument.timed("get_surface()")(get_surface)
+surface_figure = instrument.timed("figure")(surface_figure)
+xy_surface_figure = instrument.timed("figure")(xy_surface_figure)
+
+# nine surfaces: the two polynomials and their sum, the editor, the uploaded surface and its fit, an obstructed pupil
+# function, the translation example
+payload = instrument.page_payload(plots=9)
 
 st.header("Definition")
 st.markdown(r"A WFE is just a linear combination of zernike polynomials")       
@@ -87,6 +112,75 @@ st.code(r"""
 """)    
 st.write('This shows that the analytical computation of the new coefficients and the numerical decomposition give the same results, which is quite satisfying and reassuring!')
 
+st.subheader("Rotation operator")
+st.write(r"""The rotation only mixes the $(n, m)$ and $(n, -m)$ coefficients, so it can be applied directly to the whole coefficient
+vector (in OSA/ANSI order) as a block-diagonal matrix of 2x2 rotations, without sampling nor fitting anything. Passing an array
+of angles rotates the vector for all of them at once:""")
+st.code(r"""
+>>> from zernikestreamlit.basis import coefs_to_vector
+>>> from zernikestreamlit.operators import rotate
+>>> a = coefs_to_vector({(5, 3): 2, (3, 1): -0.5}, n_max=5)
+>>> b = rotate(a, np.pi / 5)                            # shape (J,)
+>>> bs = rotate(a, np.linspace(0, 2 * np.pi, 360))     # shape (360, J)
+""")
+
+# example wavefront of the rotation section, sampled on the 101x101 polar grid
+example = coefs_to_vector({(5, 3): 2, (3, 1): -0.5}, n_max=5)
+example_n, example_m = osa_nm(len(example))
+sampling = get_grid(101)
+example_fitter = get_fitter(sampling.x, sampling.y, 5)
+
+
+def rotated_by_fit(alpha):
+    zs = example @ zernike_matrix(example_n, example_m, sampling.rho, sampling.theta + alpha).reshape(len(example), -1)
+    return example_fitter.fit(zs.reshape(sampling.shape))
+
+
+# the fit route is the reference the operators are checked against: it is run
+# once per setting, and its timings are those of that first run
+@instrument.cache_data(max_entries=16)
+def rotation_fits(alpha, n_angles):
+    start = time.perf_counter()
+    b_fit = rotated_by_fit(alpha)
+    t_fit = time.perf_counter() - start
+    start = time.perf_counter()
+    sweep_fit = np.stack([rotated_by_fit(a) for a in np.linspace(0, 2 * np.pi, n_angles)])
+    return b_fit, t_fit, sweep_fit, time.perf_counter() - start
+
+
+@instrument.cache_data(max_entries=16)
+def translation_fit(dx, dy, scale):
+    start = time.perf_counter()
+    xs, ys = scale * sampling.x - dx, scale * sampling.y - dy
+    zs = example @ zernike_matrix(example_n, example_m, np.hypot(xs, ys), np.arctan2(ys, xs)).reshape(len(example), -1)
+    coefs = example_fitter.fit(zs.reshape(sampling.shape))
+    return coefs, time.perf_counter() - start
+
+
+col1, col2 = st.columns([0.3, 0.7])
+with col1:
+    alpha_deg = st.slider("Rotation angle (degrees)", min_value=0, max_value=360, value=36, key='alpha_deg')
+    n_angles = st.number_input("Angles in the sweep", min_value=1, max_value=360, value=100, key='n_angles')
+alpha = np.deg2rad(alpha_deg)
+
+start = time.perf_counter()
+b_operator = rotate(example, alpha)
+t_operator = time.perf_counter() - start
+b_fit, t_fit, sweep_fit, t_sweep_fit = rotation_fits(alpha, n_angles)
+
+alphas = np.linspace(0, 2 * np.pi, n_angles)
+start = time.perf_counter()
+sweep_operator = rotate(example, alphas)
+t_sweep_operator = time.perf_counter() - start
+
+with col1:
+    st.metric("Max |operator - fit|", f"{max(np.abs(b_operator - b_fit).max(), np.abs(sweep_operator - sweep_fit).max()):.1e}")
+    st.metric("One angle: operator / fit", f"{t_operator * 1e6:.0f} µs / {t_fit * 1e3:.1f} ms")
+    st.metric(f"{n_angles} angles: operator / fit", f"{t_sweep_operator * 1e3:.2f} ms / {t_sweep_fit * 1e3:.0f} ms")
+with col2:
+    keep = (np.abs(b_operator) > 1e-12) | (np.abs(b_fit) > 1e-12)
+    st.dataframe({"n": example_n[keep], "m": example_m[keep], "operator": b_operator[keep], "fit": b_fit[keep]}, hide_index=True)
+
 
 col1, col2, col3 = st.columns([0.15, 0.45, 0.45])
 
@@ -96,20 +190,153 @@ with col1:
     n2 = st.number_input("`n_2`", min_value=0, max_value=10, value=0, key='n_input2')
     m2 = st.number_input("`m_2`", min_value=0, max_value=10, value=0, key='m_input2')
 
-z1 = Zernike(n1, m1)
-z2 = Zernike(n2, m2)
+resolution = payload.resolution(columns=2)
+grid = get_grid(resolution)
 
 with col2:
-    fig = z1.plot_3d_plotly(cb=False)
-    st.plotly_chart(fig, use_container_width=True)
+    fig = surface_figure(grid, get_surface("zernike", n1, m1, resolution=resolution), cb=False)
+    payload.chart(fig, key='z1_plot')
 
 with col3:
-    fig = z2.plot_3d_plotly(cb=False)
-    st.plotly_chart(fig, use_container_width=True)
+    fig = surface_figure(grid, get_surface("zernike", n2, m2, resolution=resolution), cb=False)
+    payload.chart(fig, key='z2_plot')
+
+# the sum only adds the difference of the terms that changed, reusing the surfaces plotted above
+terms = {(n1, m1): 1.0}
+terms[(n2, m2)] = terms.get((n2, m2), 0.0) + 1.0
+wfe = session_accumulator("sum", resolution)
+wfe.update(terms)
+fig = surface_figure(grid, wfe.surface)
+payload.chart(fig, key='wfe_plot')
 
-wfe = z1 + z2
-fig = wfe.plot_3d_plotly()
-st.plotly_chart(fig, use_container_width=True)
+st.subheader("Wavefront editor")
+st.write(r"""The surfaces above are not summed again on every change: the wavefront keeps the evaluated surface of each
+$(n, m)$ term, and a new coefficient only adds $(a_{new} - a_{old}) Z_n^m$ to the sum, whatever the number of terms:""")
+st.code(r"""
+>>> from zernikestreamlit.accumulator import SurfaceAccumulator
+>>> wfe = SurfaceAccumulator(resolution=100)
+>>> wfe.update({(2, 0): 0.5, (3, 1): -0.2})   # adds two terms
+>>> wfe.set(3, 1, 0.1)                         # adds 0.3 * z_3^1 to wfe.surface
+""")
+
+n_max_editor = st.number_input("Highest radial order `n`", min_value=1, max_value=8, value=4, key='n_max_editor')
+editor_n, editor_m = osa_nm(n_max_to_J(n_max_editor))
+coefs = {}
+with st.expander(f"{len(editor_n)} coefficients", expanded=True):
+    cols = st.columns(6)
+    for j, (n, m) in enumerate(zip(editor_n.tolist(), editor_m.tolist())):
+        with cols[j % 6]:
+            coefs[(n, m)] = st.slider(f"$a_{{{n}}}^{{{m}}}$", min_value=-1.0, max_value=1.0, value=0.0, step=0.05,
+                                      key=f'editor_{n}_{m}')
+
+editor_resolution = payload.resolution(columns=1)
+editor = session_accumulator("editor", editor_resolution)
+start = time.perf_counter()
+changed = editor.update(coefs)
+st.caption(f"{changed} of {len(coefs)} terms updated in {(time.perf_counter() - start) * 1e3:.2f} ms")
+fig = surface_figure(get_grid(editor_resolution), editor.surface)
+payload.chart(fig, key='editor_plot')
+
+st.header("Fit an uploaded surface")
+st.write(r"""Upload a sampled surface, either as a `.npy` array sampled on a square grid over $[-1, 1]^2$, or as a `.npz`
+file holding `x`, `y` and `z` arrays. Only the samples inside the unit disk are used. The least-squares factorization
+of the basis is computed once per sampling and order, so fitting further surfaces with the same sampling is a single
+matrix product:""")
+st.code(r"""
+>>> from zernikestreamlit.fitting import get_fitter
+>>> fitter = get_fitter(x, y, n_max=6)
+>>> coefs = fitter.fit(zs)             # (J,) for one surface, (K, J) for a (K, H, W) stack
+>>> wfe = fitter.to_wavefront(coefs)
+""")
+
+col1, col2 = st.columns([0.3, 0.7])
+with col1:
+    uploaded = st.file_uploader("Sampled surface", type=["npy", "npz"])
+    n_max_fit = st.number_input("Highest radial order `n`", min_value=0, max_value=20, value=6, key='n_max_fit')
+
+if uploaded is not None:
+    try:
+        x, y, zs = load_sampled_surface(uploaded)
+        fitter = get_fitter(x, y, n_max_fit)
+        if zs.ndim not in (2, 3):
+            raise ValueError(f"expected a (H, W) surface or a (K, H, W) stack, got shape {zs.shape}")
+        # a stack is fitted in one product, and one of its surfaces is shown
+        coefs = fitter.fit(zs)
+        rms = fitter.residual_rms(zs, coefs)
+        with col1:
+            if zs.ndim == 3:
+                st.metric(f"Mean residual RMS ({len(zs)} surfaces)", f"{rms.mean():.3e}")
+                k = 0
+                if len(zs) > 1:
+                    k = st.slider("Surface", min_value=0, max_value=len(zs) - 1, value=0, key='uploaded_frame')
+                zs, coefs, rms = zs[k], coefs[k], rms[k]
+            st.metric("Residual RMS", f"{rms:.3e}")
+            st.dataframe({"n": fitter.n, "m": fitter.m, "coefficient": coefs}, hide_index=True)
+        with col2:
+            sampled = np.where(fitter.mask, zs, np.nan)
+            lod = payload.resolution(columns=1)
+            plot_x, plot_y = decimate(x, lod), decimate(y, lod)
+            fig = xy_surface_figure(plot_x, plot_y, decimate(sampled, lod), title="Uploaded surface")
+            payload.chart(fig, key='uploaded_plot')
+            fig = xy_surface_figure(plot_x, plot_y, decimate(fitter.reconstruct(coefs), lod), title="Zernike fit")
+            payload.chart(fig, key='uploaded_fit_plot')
+    except Exception as e:
+        st.error(f"Could not fit the uploaded surface: {str(e)}")
+
+st.header("Obstructed pupils")
+st.write(r"""Telescope pupils have a central obstruction and often spider vanes. On such a pupil the Zernike polynomials are
+no longer orthogonal: the inner products of the Zernike transform above mix the terms, and the coefficients they give are
+wrong. An orthonormal basis of the same polynomials is built numerically instead, by a QR decomposition (Gram-Schmidt) of
+the basis sampled on the pupil. It is computed once per pupil and cached, so every later fit and plot on that pupil is a
+single matrix product, and its coefficients convert back to Zernike coefficients exactly:""")
+st.code(r"""
+>>> from zernikestreamlit.pupil import annular_mask, get_masked_basis
+>>> mask = annular_mask(x, y, obstruction=0.3, spiders=4, spider_width=0.04)
+>>> pupil = get_masked_basis(x, y, n_max=5, mask=mask)   # QR once per mask
+>>> a = pupil.fit(zs)                                    # orthonormal-basis coefficients
+>>> coefs = pupil.to_zernike(a)                          # Zernike coefficients
+""")
+
+# the rotation example wavefront, sampled on a Cartesian grid
+pupil_x, pupil_y = np.meshgrid(np.linspace(-1, 1, 201), np.linspace(-1, 1, 201))
+
+
+@instrument.cache_data
+def pupil_wavefront():
+    rho, theta = np.hypot(pupil_x, pupil_y), np.arctan2(pupil_y, pupil_x)
+    return np.tensordot(example, zernike_matrix(example_n, example_m, rho, theta), axes=1)
+
+
+col1, col2 = st.columns([0.3, 0.7])
+with col1:
+    obstruction = st.slider("Obstruction ratio", min_value=0.0, max_value=0.8, value=0.3, step=0.05, key='obstruction')
+    spiders = st.selectbox("Spider vanes", [0, 3, 4], index=2, key='spiders')
+    mask = annular_mask(pupil_x, pupil_y, obstruction, spiders, spider_width=0.04)
+    start = time.perf_counter()
+    pupil = get_masked_basis(pupil_x, pupil_y, 5, mask)
+    t_basis = time.perf_counter() - start
+    start = time.perf_counter()
+    a_pupil = pupil.fit(pupil_wavefront())
+    t_pupil_fit = time.perf_counter() - start
+    projection = pupil.projection(pupil_wavefront())
+    pupil_coefs = pupil.to_zernike(a_pupil)
+    gram = pupil.gram()
+    st.metric("Max |correlation| between Zernikes on this pupil", f"{np.abs(gram - np.eye(len(gram))).max():.2f}")
+    st.metric("Max error: projection / orthonormal fit",
+              f"{np.abs(projection - example).max():.1e} / {np.abs(pupil_coefs - example).max():.1e}")
+    st.metric("Basis (once per pupil) / fit", f"{t_basis * 1e3:.1f} ms / {t_pupil_fit * 1e3:.2f} ms")
+with col2:
+    keep = (np.abs(example) > 1e-12) | (np.abs(projection) > 1e-3)
+    st.dataframe({"n": example_n[keep], "m": example_m[keep], "true": example[keep], "projection": projection[keep],
+                  "orthonormal fit": pupil_coefs[keep]}, hide_index=True)
+
+mode_labels = [f"U_{j} ({n_j}, {m_j})" for j, (n_j, m_j) in enumerate(zip(pupil.n, pupil.m))]
+mode = st.selectbox("Orthonormal function", range(len(mode_labels)), index=4, format_func=mode_labels.__getitem__,
+                    key='pupil_mode')
+mode_grid = get_grid(payload.resolution(columns=1))
+mode_values = pupil.evaluate(np.eye(len(mode_labels))[mode], mode_grid.rho, mode_grid.theta)
+mode_values = np.where(annular_mask(mode_grid.x, mode_grid.y, obstruction, spiders, spider_width=0.04), mode_values, np.nan)
+payload.chart(surface_figure(mode_grid, mode_values, title=mode_labels[mode]), key='pupil_mode_plot')
 
 st.header("Other Normalization Convention")
 st.write("Another convention sometimes used for normalizing the polynomials:")
@@ -122,3 +349,40 @@ st.write("For a translated coordinate system, the polynomials' coefficients adju
 st.latex(r"""
 W(x-\Delta x, y-\Delta y) = \sum_{n,m} a_{n,m} \sum_{i=0}^{\infty} \frac{(-1)^s}{s!} \left( \Delta x \frac{\partial}{\partial x} + \Delta y \frac{\partial}{\partial y} \right)^{s-th} Z_{n,m}(\rho, \theta)
 """)
+
+st.write(r"""Rather than expanding this series, note that translating or scaling the coordinates maps a polynomial of degree $n$
+onto a polynomial of degree $n$: the new coefficients are a linear function of the old ones, given by a sparse $J \times J$
+matrix computed once per $(\Delta x, \Delta y, s)$. The operator below returns the coefficients of $W(s x - \Delta x, s y - \Delta y)$,
+$s < 1$ selecting a concentric sub-aperture:""")
+st.code(r"""
+>>> from zernikestreamlit.operators import translate
+>>> b = translate(a, dx=0.1, dy=0.0, scale=0.8)
+""")
+
+col1, col2, col3 = st.columns([0.3, 0.35, 0.35])
+with col1:
+    dx = st.slider(r"$\Delta x$", min_value=-0.5, max_value=0.5, value=0.2, step=0.05, key='dx')
+    dy = st.slider(r"$\Delta y$", min_value=-0.5, max_value=0.5, value=0.0, step=0.05, key='dy')
+    scale = st.slider("scale $s$", min_value=0.1, max_value=1.0, value=1.0, step=0.05, key='scale')
+
+start = time.perf_counter()
+t_operator_coefs = translate(example, dx, dy, scale)
+t_operator = time.perf_counter() - start
+
+t_fit_coefs, t_fit = translation_fit(dx, dy, scale)
+
+with col1:
+    st.metric("Max |operator - fit|", f"{np.abs(t_operator_coefs - t_fit_coefs).max():.1e}")
+    st.metric("Operator / fit", f"{t_operator * 1e6:.0f} µs / {t_fit * 1e3:.1f} ms")
+
+basis = get_grid_basis(payload.resolution(columns=3))
+with col2:
+    fig = surface_figure(basis.grid, basis.combine(vector_to_coefs(example)), cb=False, title="Original")
+    payload.chart(fig, key='translation_original')
+with col3:
+    fig = surface_figure(basis.grid, basis.combine(vector_to_coefs(t_operator_coefs)), cb=False, title="Translated / scaled")
+    payload.chart(fig, key='translation_new')
+
+payload.report()
+
+instrument.report()
@@ -0,0 +1,89 @@
+import numpy as np
+import streamlit as st
+
+from zernikestreamlit import instrument
+from zernikestreamlit.basis import get_grid_basis
+from zernikestreamlit.decompose import default_root, list_tables, read_manifest, read_table
+from zernikestreamlit.plotting import surface_figure
+
+st.set_page_config(layout="wide")
+
+instrument.start("Coefficient Tables")
+
+# library functions, timed in profiled reruns
+get_grid_basis = instrument.timed("get_grid_basis()")(get_grid_basis)
+surface_figure = instrument.timed("figure")(surface_figure)
+
+st.title("Coefficient Tables")
+st.write(r"""Large archives of sampled surfaces are decomposed offline, by a command that streams the surfaces in chunks
+from memory-mapped `.npy`/`.npz` files, fits them with the cached least-squares factorization of page 4 on a pool of
+workers, and writes the coefficients as a Parquet table. Interrupted runs resume where they stopped:""")
+st.code(r"""
+python -m zernikestreamlit.decompose archive/*.npy --output ~/.cache/zernikestreamlit/tables/run1 --n-max 6 --workers 4
+""", language="bash")
+st.write("Tables are looked up in the directory below, `$ZERNIKESTREAMLIT_TABLES_DIR` by default.")
+
+root = st.text_input("Tables directory", value=str(default_root()), key='tables_root')
+tables = list_tables(root)
+if not tables:
+    st.info("No coefficient table found in this directory.")
+    instrument.report()
+    st.stop()
+
+table_path = st.selectbox("Table", tables, format_func=lambda path: path.name, key='table')
+manifest = read_manifest(table_path)
+
+
+@instrument.cache_data(max_entries=4)
+def load_table(path, parts):
+    # ``parts`` (names and sizes of the part files) invalidates the cache while a run is still writing
+    return read_table(path).to_pandas()
+
+
+parts = tuple((part.name, part.stat().st_size) for part in sorted(table_path.glob("part-*.parquet")))
+table = load_table(str(table_path), parts)
+columns = manifest["columns"]
+expected = sum(source["surfaces"] for source in manifest["inputs"])
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Surfaces", f"{len(table)} / {expected}")
+col2.metric("Coefficients", f"{len(columns)} (n <= {manifest['n_max']})")
+col3.metric("Source files", len(manifest["inputs"]))
+col4.metric("Median residual RMS", f"{table['residual_rms'].median():.2e}" if len(table) else "-")
+if "missing" in table and table["missing"].any():
+    st.caption(f"{(table['missing'] > 0).sum()} surfaces had non-finite samples in the pupil and were fitted on their "
+               f"finite samples only; {table[columns[0]].isna().sum()} had too few of them and have no coefficients.")
+
+with st.expander("Source files"):
+    st.dataframe([{"source": j, **source} for j, source in enumerate(manifest["inputs"])], hide_index=True)
+
+# Per-coefficient statistics
+st.header("Statistics")
+if len(table):
+    values = table[columns].dropna().to_numpy()
+    st.bar_chart({"RMS": np.sqrt(np.mean(values ** 2, axis=0))}, x_label="OSA index j", y_label="coefficient RMS")
+    st.dataframe({"coefficient": columns, "mean": values.mean(axis=0), "std": values.std(axis=0),
+                  "min": values.min(axis=0), "max": values.max(axis=0)}, hide_index=True)
+
+# Rows, one page at a time
+st.header("Rows")
+col1, col2 = st.columns([0.3, 0.7])
+with col1:
+    page_size = st.selectbox("Rows per page", [50, 200, 1000], key='page_size')
+    pages = max((len(table) + page_size - 1) // page_size, 1)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key='table_page')
+with col2:
+    st.dataframe(table.iloc[(page - 1) * page_size:page * page_size], hide_index=True)
+
+# Reconstructed surface of one row
+st.header("Surface")
+if len(table):
+    row = st.number_input("Row", min_value=0, max_value=len(table) - 1, value=0, key='table_row')
+    basis = get_grid_basis(n_max=manifest["n_max"], ortho_norm=manifest["ortho_norm"])
+    coefs = table[columns].iloc[row].to_numpy()
+    surface = np.tensordot(coefs, basis.values, axes=1)
+    instrument.chart(surface_figure(basis.grid, surface, title=f"Source {table['source'].iloc[row]}, "
+                                                           f"surface {table['index'].iloc[row]}"),
+                     width="stretch")
+
+instrument.report()
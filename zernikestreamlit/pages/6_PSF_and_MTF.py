@@ -0,0 +1,94 @@
+import time
+
+import numpy as np
+import streamlit as st
+
+from zernikestreamlit import instrument
+from zernikestreamlit.basis import n_max_to_J, osa_nm
+from zernikestreamlit.payload import decimate
+from zernikestreamlit.plotting import image_figure
+from zernikestreamlit.psf import diffraction_limited_mtf, session_psf
+
+st.set_page_config(layout="wide")
+
+instrument.start("PSF and MTF")
+
+# library functions, timed in profiled reruns
+session_psf = instrument.timed("session_psf()")(session_psf)
+image_figure = instrument.timed("figure")(image_figure)
+
+# two images: the wavefront on the pupil and the PSF
+payload = instrument.page_payload(plots=2)
+
+st.title("PSF and MTF")
+st.write(r"""What an optical system does with a wavefront $W$ (in waves) is described by its point-spread function, the
+image of a point source, which is the squared modulus of the Fourier transform of the complex pupil:""")
+st.latex(r"PSF(u, v) = \left| \mathcal{F}\left[P(x, y)\, e^{2 i \pi W(x, y)}\right](u, v) \right|^2")
+st.write(r"""and by its modulation transfer function, the contrast it transmits at each spatial frequency, which is the
+modulus of the Fourier transform of the PSF, normalized at zero frequency:""")
+st.latex(r"MTF(\nu) = \frac{\left| \mathcal{F}^{-1}[PSF](\nu) \right|}{\mathcal{F}^{-1}[PSF](0)}")
+st.write(r"""Both are computed with FFTs of the pupil, zero-padded to at least twice its size so that the PSF is sampled
+at $\lambda / 2D$ or finer and the MTF is not aliased. The PSF is normalized to the peak of the unaberrated pupil, so
+its maximum is the Strehl ratio.""")
+
+# Pupil and wavefront
+st.header("Wavefront")
+col1, col2, col3, col4 = st.columns(4)
+size = col1.selectbox("Pupil samples across", [128, 256, 512], index=2, key='psf_size')
+padding = col2.selectbox("Zero padding", [2, 4], key='psf_padding')
+n_max = col3.slider("Maximum order n", min_value=1, max_value=6, value=4, key='psf_n_max')
+ortho_norm = col4.checkbox("Orthonormalize", key='psf_ortho_norm')
+
+engine = session_psf(size, padding, ortho_norm)
+
+# one column of sliders per radial order, piston left out since it does not change the PSF
+coefs = {}
+with st.expander("Coefficients [waves]", expanded=True):
+    n, m = osa_nm(n_max_to_J(n_max))
+    columns = st.columns(n_max)
+    for n_j, m_j in zip(n[1:], m[1:]):
+        coefs[(n_j, m_j)] = columns[n_j - 1].slider(f"$z_{{{n_j}}}^{{{m_j}}}$", min_value=-1.0, max_value=1.0,
+                                                    value=0.0, step=0.01, key=f"psf_{n_j}_{m_j}")
+
+# only the coefficients that moved are applied to the wavefront, then both FFTs run again
+start = time.perf_counter()
+with instrument.stage("psf"):
+    changed = engine.update(coefs)
+    engine.psf()
+with instrument.stage("mtf"):
+    frequencies, mtf_x, mtf_y = engine.mtf_cuts()
+elapsed = time.perf_counter() - start
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Strehl ratio", f"{engine.strehl():.3f}")
+col2.metric("Maréchal estimate", f"{engine.marechal():.3f}", help=r"exp(-(2π RMS)²), valid for small errors")
+col3.metric("RMS wavefront error", f"{engine.rms():.3f} waves")
+col4.metric("PSF and MTF update", f"{elapsed * 1e3:.0f} ms",
+            help=f"{changed} terms changed, {engine.pupil.padded}² FFTs")
+
+col1, col2 = st.columns(2)
+with col1:
+    resolution = payload.resolution(columns=2)
+    wavefront = decimate(engine.pupil.image(engine.wavefront.surface), resolution)
+    axis = np.linspace(-1, 1, wavefront.shape[0])
+    payload.chart(image_figure(wavefront, axis, axis, title="Wavefront on the pupil", colorscale="RdBu",
+                               colorbar_title="waves"), key='psf_wavefront')
+
+with col2:
+    half_width = st.slider("PSF half width [λ/D]", min_value=2, max_value=32, value=8, key='psf_half_width')
+    log_scale = st.checkbox("Log scale", value=True, key='psf_log')
+    image, axis = engine.psf_image(half_width)
+    if log_scale:
+        image = np.log10(np.maximum(image, 1e-8))
+    payload.chart(image_figure(image, axis, axis, title="PSF", colorscale="Inferno",
+                               colorbar_title="log10" if log_scale else ""), key='psf_image')
+
+# MTF cuts along both axes, against the diffraction limit
+st.header("MTF")
+st.line_chart({"frequency [D/λ]": frequencies, "x": mtf_x, "y": mtf_y,
+               "diffraction limited": diffraction_limited_mtf(frequencies)},
+              x="frequency [D/λ]", y=["x", "y", "diffraction limited"])
+
+payload.report()
+
+instrument.report()
@@ -0,0 +1,146 @@
+from pathlib import Path
+
+import numpy as np
+import streamlit as st
+
+from zernikestreamlit import instrument
+from zernikestreamlit.basis import get_grid_basis, osa_nm
+from zernikestreamlit.payload import decimate
+from zernikestreamlit.plotting import heatmap_figure, spectrum_figure, surface_figure, xy_surface_figure
+from zernikestreamlit.timeseries import (DEFAULT_RATE, DEFAULT_SEGMENT, DEFAULT_WINDOW, CoefficientStream, analyze,
+                                         default_root, demo_stream)
+
+st.set_page_config(layout="wide")
+
+instrument.start("Time Series")
+
+# library functions, timed in profiled reruns
+analyze = instrument.timed("analyze()")(analyze)
+get_grid_basis = instrument.timed("get_grid_basis()")(get_grid_basis)
+heatmap_figure = instrument.timed("figure")(heatmap_figure)
+spectrum_figure = instrument.timed("figure")(spectrum_figure)
+surface_figure = instrument.timed("figure")(surface_figure)
+xy_surface_figure = instrument.timed("figure")(xy_surface_figure)
+
+# four figures: PSDs, covariance, reconstructed frame and recorded frame
+payload = instrument.page_payload(plots=4)
+
+st.title("Time Series")
+st.write(r"""Wavefront sensors record sequences of wavefronts, at kHz rates in adaptive-optics loops. In Zernike space
+such a sequence is a stream of coefficient vectors $a(t)$, whose statistics tell how each mode evolves: its RMS over
+time, its temporal power spectral density, and how modes are correlated with each other.""")
+st.write("""Streams are read from memory-mapped files in bounded chunks, and every statistic is accumulated in one pass:
+running sums of squares for the rolling RMS, batched FFTs of overlapping segments for the PSDs (Welch's method), and
+online (Welford) updates for the mean and covariance. Surface streams are fitted chunk by chunk with the cached
+least-squares factorization of page 4. Surfaces are only reconstructed for the frame displayed.""")
+
+# Stream selection
+st.header("Stream")
+source = st.radio("Source", ["Demo stream", "Recording"], horizontal=True, key='ts_source')
+col1, col2 = st.columns(2)
+rate = col1.number_input("Sample rate [Hz]", min_value=1.0, value=DEFAULT_RATE, key='ts_rate')
+
+
+@instrument.cache_data(max_entries=4)
+def demo_coefficients(frames, n_max, rate):
+    return demo_stream(frames, n_max, rate)
+
+
+if source == "Demo stream":
+    st.caption("Synthetic residuals of an adaptive-optics loop: turbulence decorrelating in a few milliseconds, "
+               "weaker at higher orders, and a 50 Hz vibration in tip and tilt.")
+    frames = col2.select_slider("Frames", [5000, 20000, 100000], value=20000, key='ts_frames')
+    stream = CoefficientStream(demo_coefficients(frames, 4, rate), rate=rate)
+    key = ("demo", frames)
+else:
+    st.write("""A `.npy` file holds a (T, J) coefficient stream in OSA order, or a (T, H, W) surface stream sampled on
+[-1, 1] x [-1, 1]; a `.npz` file holds `x`, `y` and a `z` surface stream. Recordings are looked up in the directory
+below, `$ZERNIKESTREAMLIT_STREAMS_DIR` by default.""")
+    root = st.text_input("Recordings directory", value=str(default_root()), key='ts_root')
+    recordings = sorted(path for pattern in ("*.npy", "*.npz") for path in Path(root).glob(pattern))
+    if not recordings:
+        st.info("No recording found in this directory.")
+        instrument.report()
+        st.stop()
+    path = st.selectbox("Recording", recordings, format_func=lambda path: path.name, key='ts_recording')
+    n_max = col2.number_input("Fitted order n (surface streams)", min_value=1, max_value=10, value=6, key='ts_n_max')
+    try:
+        stream = CoefficientStream.open(path, n_max=n_max, rate=rate)
+    except ValueError as e:
+        st.error(str(e))
+        instrument.report()
+        st.stop()
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime, stream.n_max)
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Frames", f"{len(stream)}")
+col2.metric("Duration", f"{stream.duration:.2f} s")
+col3.metric("Modes", f"{stream.J} (n <= {stream.n_max})")
+col4.metric("Stream", stream.kind)
+
+if len(stream) < 2:
+    st.info("The statistics of a stream need at least two frames.")
+    instrument.report()
+    st.stop()
+
+# One pass over the stream
+col1, col2 = st.columns(2)
+window = col1.number_input("Rolling RMS window [frames]", min_value=2, max_value=len(stream),
+                           value=min(DEFAULT_WINDOW, len(stream)), key='ts_window')
+segment = col2.select_slider("PSD segment [frames]", [128, 256, 512, 1024, 2048, 4096], value=DEFAULT_SEGMENT,
+                             key='ts_segment')
+
+
+@instrument.cache_data(max_entries=8, show_spinner="Reading the stream...")
+def stream_statistics(_stream, key, rate, window, segment):
+    # ``key`` identifies the stream: the demo parameters, or the path, size and modification time of the recording
+    return analyze(_stream, window, segment)
+
+
+stats = stream_statistics(stream, key, rate, window, segment)
+n, m = osa_nm(stream.J)
+labels = [f"z_{n_j}_{m_j}" for n_j, m_j in zip(n, m)]
+selected = st.multiselect("Modes", labels, default=labels[1:6], key='ts_modes')
+columns = [labels.index(label) for label in selected]
+
+st.header("Rolling RMS")
+st.line_chart({"time [s]": stats["times"], **{labels[j]: stats["rms"][:, j] for j in columns}}, x="time [s]",
+              y=selected or None)
+
+st.header("Power spectral density")
+frequencies, psd = stats["frequencies"][1:], stats["psd"][1:]
+payload.chart(spectrum_figure(frequencies, psd[:, columns], selected, title="PSD [coefficient² / Hz]"), key='ts_psd')
+
+st.header("Modal covariance")
+correlation = st.checkbox("Normalize to correlations", value=True, key='ts_correlation')
+covariance = stats["covariance"]
+if correlation:
+    # piston is constant in fitted streams: zero variance, left at zero correlation
+    scale = np.sqrt(np.diag(covariance))
+    scale[scale == 0] = 1
+    covariance = covariance / np.outer(scale, scale)
+payload.chart(heatmap_figure(covariance, labels, title="Correlation" if correlation else "Covariance"),
+              key='ts_covariance')
+
+# Only the displayed frame is reconstructed
+st.header("Frame")
+t = st.slider("Frame", min_value=0, max_value=len(stream) - 1, value=0, key='ts_frame')
+coefs = stream.coefficients(t)
+basis = get_grid_basis(payload.resolution(columns=2), n_max=stream.n_max, ortho_norm=stream.ortho_norm)
+col1, col2 = st.columns(2)
+with col1:
+    payload.chart(surface_figure(basis.grid, np.tensordot(coefs, basis.values, axes=1),
+                                 title=f"Reconstructed, t = {t / stream.rate:.4f} s"), key='ts_frame_fit')
+with col2:
+    if stream.kind == "surfaces":
+        resolution = payload.resolution(columns=2)
+        payload.chart(xy_surface_figure(decimate(stream.x, resolution), decimate(stream.y, resolution),
+                                        decimate(np.asarray(stream.frames[t], dtype=float), resolution),
+                                        title="Recorded"), key='ts_frame_recorded')
+    else:
+        st.dataframe({"coefficient": labels, "value": coefs}, hide_index=True)
+
+payload.report()
+
+instrument.report()
@@ -1,5 +1,9 @@
 import streamlit as st
 
+from zernikestreamlit import instrument
+
+instrument.start("Ressources")
+
 st.header("Bibliography")
 
 st.markdown("""
@@ -14,3 +18,5 @@ st.markdown("""
 9. Max, "Lecture 4: Geometrical and Physical Optics," University of California, Lick Observatory (2016). [PDF](https://www.ucolick.org/~max/289/Lectures%202016/Lecture%204%202016%20Geometrical%20and%20physical%20optics/Lecture4%20Geom%20&%20Phys%20Optics.pdf)
 10. "Section 1.5: Introduction to Zernike Polynomials," *Visual Optics Lab*, University of Arizona. [PDF](https://wp.optics.arizona.edu/visualopticslab/wp-content/uploads/sites/52/2016/08/Section1.5Slides.pdf)
 """)
+
+instrument.report()
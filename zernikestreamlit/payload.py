@@ -0,0 +1,125 @@
+"""Level of detail and size accounting for the surfaces sent to the browser.
+
+A 3D surface finer than a few screen pixels per mesh cell looks the same but
+costs websocket bytes and client render time. Pages build a ``PagePayload``
+with the number of surfaces they show; it picks an evaluation resolution per
+figure from the viewport width, the number of columns the figure shares and a
+per-page byte budget, and records the bytes of every chart it renders. The
+bytes are estimated from the data arrays of the figure, which costs no
+serialization, unless a ``measure`` function is given: profiled reruns
+(``instrument.page_payload``) measure the JSON spec exactly with
+``payload_bytes``.
+
+The viewport width is read from the ``width`` query parameter (e.g.
+``?width=1920``), the page budget from ``ZERNIKESTREAMLIT_PAGE_BUDGET`` (bytes).
+Figures are encoded as float32 binary arrays by ``zernikestreamlit.plotting``.
+"""
+import json
+import math
+import os
+
+import numpy as np
+import streamlit as st
+
+from zernikestreamlit.grid import DEFAULT_RESOLUTION
+
+DEFAULT_VIEWPORT_WIDTH = 1400
+# screen pixels per mesh cell below which a finer surface is not visibly different
+PIXELS_PER_SAMPLE = 5
+MIN_RESOLUTION = 20
+# resolutions are rounded down to a multiple of this, to bound the number of cached grids and surfaces
+RESOLUTION_STEP = 10
+DEFAULT_PAGE_BUDGET = 2 * 2**20
+BUDGET_ENV = "ZERNIKESTREAMLIT_PAGE_BUDGET"
+# x, y and z as float32, base64-encoded in the JSON spec
+BYTES_PER_SAMPLE = 3 * 4 * 4 / 3
+
+
+def page_budget():
+    """Bytes of surface data a page may send, from ``ZERNIKESTREAMLIT_PAGE_BUDGET``."""
+    return int(os.environ.get(BUDGET_ENV, DEFAULT_PAGE_BUDGET))
+
+
+def viewport_width():
+    """Viewport width [px] from the ``width`` query parameter, or ``DEFAULT_VIEWPORT_WIDTH``."""
+    try:
+        return max(int(st.query_params.get("width", DEFAULT_VIEWPORT_WIDTH)), 1)
+    except ValueError:
+        return DEFAULT_VIEWPORT_WIDTH
+
+
+def lod_resolution(plots, columns=1, width=DEFAULT_VIEWPORT_WIDTH, budget=DEFAULT_PAGE_BUDGET,
+                   max_resolution=DEFAULT_RESOLUTION):
+    """Grid resolution of one of ``plots`` surfaces, drawn in a 1/``columns`` wide column."""
+    by_width = width / columns / PIXELS_PER_SAMPLE
+    by_budget = math.sqrt(budget / max(plots, 1) / BYTES_PER_SAMPLE)
+    resolution = int(min(by_width, by_budget)) // RESOLUTION_STEP * RESOLUTION_STEP
+    return max(MIN_RESOLUTION, min(max_resolution, resolution))
+
+
+def decimate(values, resolution):
+    """Evenly spaced rows and columns of a 2D array, keeping the first and last ones."""
+    values = np.asarray(values)
+    rows = np.unique(np.linspace(0, values.shape[0] - 1, resolution).round().astype(int))
+    cols = np.unique(np.linspace(0, values.shape[1] - 1, resolution).round().astype(int))
+    return values[np.ix_(rows, cols)]
+
+
+def payload_bytes(fig):
+    """Size of the JSON spec Streamlit sends for ``fig``."""
+    import plotly.io as pio
+    return len(pio.to_json(fig, validate=False))
+
+
+def estimate_bytes(fig):
+    """Bytes of the data arrays of ``fig`` as plotly sends them, base64-encoded, without serializing the figure."""
+    total = 0
+    for trace in fig.data:
+        for value in trace.to_plotly_json().values():
+            if isinstance(value, np.ndarray) and value.dtype.kind in "biuf":
+                total += math.ceil(value.nbytes / 3) * 4
+            elif isinstance(value, (np.ndarray, list, tuple)):
+                total += len(json.dumps(np.asarray(value).tolist(), default=str))
+    return total
+
+
+class PagePayload:
+    """Level of detail and bytes sent for the charts of one page run."""
+
+    def __init__(self, plots, width=None, budget=None, measure=None, plot=None):
+        self.plots = plots
+        self.width = viewport_width() if width is None else width
+        self.budget = page_budget() if budget is None else budget
+        # bytes of a figure, estimated unless given; the function that draws it
+        self.measure = estimate_bytes if measure is None else measure
+        self.measured = measure is not None
+        self.plot = st.plotly_chart if plot is None else plot
+        self.sizes = {}
+
+    def __repr__(self):
+        return f"<PagePayload(plots={self.plots}, width={self.width}, budget={self.budget})>"
+
+    def resolution(self, columns=1):
+        """Resolution for a surface drawn in a 1/``columns`` wide column."""
+        return lod_resolution(self.plots, columns, self.width, self.budget)
+
+    def chart(self, fig, key, **kwargs):
+        """``st.plotly_chart`` at container width, recording the bytes sent under ``key``."""
+        self.sizes[key] = self.measure(fig)
+        return self.plot(fig, width="stretch", key=key, **kwargs)
+
+    @property
+    def total(self):
+        return sum(self.sizes.values())
+
+    def report(self):
+        """Bytes per figure and page total in the sidebar."""
+        with st.sidebar:
+            st.caption(f"Plot payload: {self.total / 1024:.0f} KiB of a {self.budget / 1024:.0f} KiB budget "
+                       f"({len(self.sizes)} charts, {self.width} px viewport, "
+                       f"{'measured' if self.measured else 'estimated from the data arrays'})")
+            if self.total > self.budget:
+                st.warning("The charts of this page exceed the payload budget.")
+            with st.expander("Bytes per figure"):
+                st.dataframe({"chart": list(self.sizes), "KiB": [size / 1024 for size in self.sizes.values()]},
+                             hide_index=True)
@@ -0,0 +1,82 @@
+"""Plotly figures built from values evaluated on a shared PolarGrid.
+
+plotly is imported when the first figure is built, not when pages import this module.
+Surface arrays are cast to float32, which plotly sends as base64 binary arrays
+half the size of float64 ones.
+"""
+import numpy as np
+
+
+def xy_surface_figure(x, y, values, cb=True, title=""):
+    """3D surface of ``values`` sampled at Cartesian coordinates (x, y)."""
+    import plotly.graph_objects as go
+    x, y, values = (np.asarray(a, dtype=np.float32) for a in (x, y, values))
+    fig = go.Figure(data=[go.Surface(x=x, y=y, z=values, showscale=cb)])
+    fig.update_layout(
+        title=title,
+        scene=dict(xaxis_title="x", yaxis_title="y", zaxis_title="z"),
+        margin=dict(l=0, r=0, t=40, b=0),
+    )
+    return fig
+
+
+def surface_figure(grid, values, cb=True, title=""):
+    """3D surface of ``values`` over the Cartesian coordinates of ``grid``."""
+    return xy_surface_figure(grid.x, grid.y, values, cb=cb, title=title)
+
+
+def quiver_figure(x, y, u, v, title="", scale=0.1):
+    """2D arrow field (u, v) at points (x, y)."""
+    import plotly.figure_factory as ff
+    fig = ff.create_quiver(x, y, u, v, scale=scale, arrow_scale=0.3)
+    fig.update_layout(
+        title=title,
+        xaxis=dict(title="x", scaleanchor="y"),
+        yaxis=dict(title="y"),
+        showlegend=False,
+        margin=dict(l=0, r=0, t=40, b=0),
+    )
+    return fig
+
+
+def heatmap_figure(values, labels, title=""):
+    """Square matrix heatmap with the same ``labels`` on both axes."""
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[go.Heatmap(z=np.asarray(values, dtype=np.float32), x=labels, y=labels, colorscale="RdBu",
+                                     zmid=0)])
+    fig.update_layout(
+        title=title,
+        yaxis=dict(autorange="reversed", scaleanchor="x"),
+        margin=dict(l=0, r=0, t=40, b=0),
+    )
+    return fig
+
+
+def image_figure(values, x, y, title="", colorscale="Viridis", colorbar_title=""):
+    """Image of ``values`` (rows along ``y``, columns along ``x``) with square pixels."""
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[go.Heatmap(z=np.asarray(values, dtype=np.float32), x=np.asarray(x, dtype=np.float32),
+                                     y=np.asarray(y, dtype=np.float32), colorscale=colorscale,
+                                     colorbar=dict(title=colorbar_title))])
+    fig.update_layout(
+        title=title,
+        yaxis=dict(scaleanchor="x"),
+        margin=dict(l=0, r=0, t=40, b=0),
+    )
+    return fig
+
+
+def spectrum_figure(frequencies, psd, labels, title=""):
+    """Log-log power spectral densities, one line per column of ``psd``."""
+    import plotly.graph_objects as go
+    frequencies = np.asarray(frequencies, dtype=np.float32)
+    psd = np.asarray(psd, dtype=np.float32)
+    fig = go.Figure(data=[go.Scatter(x=frequencies, y=psd[:, k], mode="lines", name=label)
+                          for k, label in enumerate(labels)])
+    fig.update_layout(
+        title=title,
+        xaxis=dict(type="log", title="frequency [Hz]"),
+        yaxis=dict(type="log", exponentformat="power"),
+        margin=dict(l=0, r=0, t=40, b=0),
+    )
+    return fig
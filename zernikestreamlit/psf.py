@@ -0,0 +1,180 @@
+"""Point-spread function and MTF of wavefronts, through zero-padded pupil FFTs.
+
+The PSF of a wavefront W [waves] is |F[P exp(2i pi W)]|^2, with P the
+unit-disk pupil, and the MTF is the modulus of the inverse transform of the PSF
+(the pupil autocorrelation), normalized at zero frequency. Both are sampled by
+FFTs of the pupil padded with zeros to ``padding`` times its size: the PSF is
+then sampled every 1/padding lambda/D, and with ``padding >= 2`` the
+autocorrelation fits in the padded array, so the MTF is not aliased.
+
+Everything that does not depend on the coefficients is built once per
+(size, padding) and shared by every session: the pupil samples, the flat
+indices of the pupil in the padded array, and the Zernike terms on the pupil.
+Each session keeps its wavefront as a ``SurfaceAccumulator`` over the pupil
+samples, so moving one coefficient slider costs one O(pupil) update before the
+FFTs. It also keeps a preallocated padded buffer, whose zero padding is
+written once. The FFTs are ``scipy.fft`` ones in single precision, on
+``workers`` threads. scipy keeps the plans of the last sizes it has
+transformed, so repeated transforms of one size do not plan again.
+"""
+import numpy as np
+import scipy.fft
+import streamlit as st
+
+from zernikestreamlit.accumulator import SurfaceAccumulator
+from zernikestreamlit.basis import zernike_matrix
+from zernikestreamlit.cache import LRUCache, counted
+
+DEFAULT_PUPIL_SIZE = 512
+DEFAULT_PADDING = 2
+MAX_CACHED_PUPILS = 4
+# terms of every (n, m) up to n = 10, float32 on the pupil samples
+MAX_CACHED_TERMS = 66
+SESSION_KEY = "psf_engine"
+
+
+class PupilGrid:
+    """Unit-disk pupil sampled on ``size`` x ``size`` pixel centers, in a padded array of ``size * padding``."""
+
+    def __init__(self, size=DEFAULT_PUPIL_SIZE, padding=DEFAULT_PADDING):
+        if padding < 2:
+            raise ValueError(f"padding must be at least 2 for an MTF without aliasing, got {padding}")
+        self.size = size
+        self.padding = padding
+        self.padded = int(round(size * padding))
+        x = (np.arange(size) + 0.5) / size * 2 - 1
+        x, y = np.meshgrid(x, x)
+        rho = np.hypot(x, y)
+        self.mask = rho <= 1
+        self.points = int(self.mask.sum())
+        self.rho = rho[self.mask]
+        self.theta = np.arctan2(y, x)[self.mask]
+        # flat indices of the pupil samples in the (padded, padded) array, pupil in the top-left corner
+        rows, cols = np.nonzero(self.mask)
+        self.index = rows * self.padded + cols
+        for arr in (self.mask, self.rho, self.theta, self.index):
+            arr.setflags(write=False)
+        self._terms = LRUCache(MAX_CACHED_TERMS)
+
+    def __repr__(self):
+        return f"<PupilGrid(size={self.size}, padding={self.padding}, points={self.points})>"
+
+    def _evaluate(self, n, m, ortho_norm):
+        term = zernike_matrix(n, m, self.rho, self.theta, ortho_norm)[0].astype(np.float32)
+        term.setflags(write=False)
+        return term
+
+    def term(self, n, m, ortho_norm=False):
+        """Read-only z_n^m on the pupil samples, shared by every session."""
+        return self._terms.get_or_create((n, m, ortho_norm), lambda: self._evaluate(n, m, ortho_norm))
+
+    def image(self, values):
+        """(size, size) image of values on the pupil samples, NaN outside."""
+        out = np.full(self.mask.shape, np.nan)
+        out[self.mask] = values
+        return out
+
+
+@counted(st.cache_resource, max_entries=MAX_CACHED_PUPILS)
+def get_pupil_grid(size=DEFAULT_PUPIL_SIZE, padding=DEFAULT_PADDING):
+    """PupilGrid shared by every session."""
+    return PupilGrid(size, padding)
+
+
+class PupilAccumulator(SurfaceAccumulator):
+    """Wavefront [waves] on the samples of a PupilGrid, updated term by term."""
+
+    def __init__(self, pupil, ortho_norm=False):
+        super().__init__(pupil.size, ortho_norm)
+        self.pupil = pupil
+        self.shape = (pupil.points,)
+        self.surface = np.zeros(self.shape)
+
+    def term(self, n, m):
+        return self.pupil.term(n, m, self.ortho_norm)
+
+
+def diffraction_limited_mtf(nu):
+    """MTF of the unaberrated circular pupil at frequencies ``nu`` in units of the cutoff D/lambda."""
+    nu = np.clip(np.asarray(nu, dtype=float), 0, 1)
+    return 2 / np.pi * (np.arccos(nu) - nu * np.sqrt(1 - nu ** 2))
+
+
+class PSFEngine:
+    """PSF and MTF of one wavefront on a shared PupilGrid, recomputed only when a coefficient changes."""
+
+    def __init__(self, pupil, ortho_norm=False, workers=-1):
+        self.pupil = pupil
+        self.workers = workers
+        self.wavefront = PupilAccumulator(pupil, ortho_norm)
+        self._buffer = np.zeros((pupil.padded, pupil.padded), dtype=np.complex64)
+        self._psf = self._mtf = None
+
+    def __repr__(self):
+        return f"<PSFEngine(pupil={self.pupil!r}, terms={len(self.wavefront.coefs)})>"
+
+    def update(self, coefs):
+        """Make ``{(n, m): coefficient [waves]}`` the wavefront; returns the number of terms changed."""
+        changed = self.wavefront.update(coefs)
+        if changed:
+            self._psf = self._mtf = None
+        return changed
+
+    def psf(self):
+        """(padded, padded) PSF normalized to the peak of the unaberrated pupil, origin at [0, 0]."""
+        if self._psf is None:
+            # only the pupil samples are written: the padding stays zero from the allocation
+            self._buffer.reshape(-1)[self.pupil.index] = np.exp((2j * np.pi) * self.wavefront.surface)
+            spectrum = scipy.fft.fft2(self._buffer, workers=self.workers)
+            psf = np.square(spectrum.real)
+            psf += np.square(spectrum.imag)
+            psf /= np.float32(self.pupil.points) ** 2
+            self._psf = psf
+        return self._psf
+
+    def mtf(self):
+        """(padded, padded // 2 + 1) MTF, the half plane of non-negative x frequencies."""
+        if self._mtf is None:
+            otf = np.abs(scipy.fft.rfft2(self.psf(), workers=self.workers))
+            self._mtf = otf / otf[0, 0]
+        return self._mtf
+
+    def mtf_cuts(self):
+        """(frequencies in units of D/lambda, MTF along x, MTF along y), from 0 to the cutoff."""
+        mtf, size = self.mtf(), self.pupil.size
+        return np.arange(size + 1) / size, mtf[0, :size + 1], mtf[:size + 1, 0]
+
+    def psf_image(self, half_width):
+        """PSF within ``half_width`` lambda/D of the origin, centered, and its sample coordinates [lambda/D]."""
+        k = int(half_width * self.pupil.padding)
+        offsets = np.arange(-k, k + 1)
+        index = offsets % self.pupil.padded
+        return self.psf()[np.ix_(index, index)], offsets / self.pupil.padding
+
+    def strehl(self):
+        """Peak of the PSF relative to the unaberrated one."""
+        return float(self.psf().max())
+
+    def rms(self):
+        """RMS wavefront error [waves] over the pupil, piston removed."""
+        return float(self.wavefront.surface.std())
+
+    def marechal(self):
+        """Strehl ratio estimated from the RMS error, exp(-(2 pi rms)^2), valid for small errors."""
+        return float(np.exp(-(2 * np.pi * self.rms()) ** 2))
+
+
+def session_psf(size=DEFAULT_PUPIL_SIZE, padding=DEFAULT_PADDING, ortho_norm=False):
+    """PSFEngine kept in the session state across reruns.
+
+    Only the engine of the current pupil size, padding and normalization is
+    kept: its FFT buffers take tens of MB at large sizes, so changing the
+    selection drops the previous one.
+    """
+    key = (size, padding, ortho_norm)
+    entry = st.session_state.get(SESSION_KEY)
+    if entry is None or entry[0] != key:
+        # release the previous engine before allocating the new one
+        entry = st.session_state[SESSION_KEY] = None
+        entry = st.session_state[SESSION_KEY] = (key, PSFEngine(get_pupil_grid(size, padding), ortho_norm))
+    return entry[1]
@@ -0,0 +1,120 @@
+"""Orthonormal bases of masked and annular pupils.
+
+On a pupil that is not the full unit disk (central obstruction, spider vanes,
+any sampled mask) the Zernike polynomials are no longer orthogonal, so their
+coefficients can no longer be read off inner products, and truncated fits
+depend on the order. The basis is therefore orthonormalized numerically on the
+samples of the pupil, once per mask: with the sampled Zernike basis B = QR,
+the functions U = sqrt(P) Q = B T, T = sqrt(P) R^-1, have unit RMS over the P
+samples of the pupil and are orthogonal. With ``annular_mask`` and no spiders,
+U_j are the annular Zernike polynomials, up to sampling.
+
+Uniformly sampled pupils (Cartesian grids) are assumed.
+"""
+import numpy as np
+
+from zernikestreamlit.basis import n_max_to_J, osa_nm, zernike_matrix
+from zernikestreamlit.cache import LRUCache, array_key
+
+MAX_CACHED_PUPILS = 8
+
+
+def annular_mask(x, y, obstruction=0.0, spiders=0, spider_width=0.0, spider_angle=0.0):
+    """Samples inside the unit disk, outside a central obstruction of radius ``obstruction``, and outside
+    ``spiders`` vanes of width ``spider_width`` evenly spaced from ``spider_angle``."""
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    rho = np.hypot(x, y)
+    mask = (rho <= 1) & (rho >= obstruction)
+    for k in range(spiders):
+        angle = spider_angle + 2 * np.pi * k / spiders
+        along = x * np.cos(angle) + y * np.sin(angle)
+        across = -x * np.sin(angle) + y * np.cos(angle)
+        mask &= ~((along >= 0) & (np.abs(across) <= spider_width / 2))
+    return mask
+
+
+class MaskedBasis:
+    """Orthonormal basis of the Zernike span up to n_max on the pupil ``mask`` sampled at (x, y).
+
+    U_j is z_j minus its projection on U_0..U_{j-1}, scaled to unit RMS
+    (Gram-Schmidt in OSA order). Row j of ``transform`` (J, J) holds the
+    Zernike coefficients of U_j.
+    """
+
+    def __init__(self, x, y, n_max, mask=None):
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        inside = np.hypot(x, y) <= 1
+        if mask is not None:
+            inside &= np.asarray(mask, dtype=bool)
+        self.shape = x.shape
+        self.mask = inside
+        self.n_max = n_max
+        self.n, self.m = osa_nm(n_max_to_J(n_max))
+        points = int(inside.sum())
+        if points < len(self.n):
+            raise ValueError(f"{points} samples in the pupil, at least {len(self.n)} are needed for n_max={n_max}")
+
+        basis = zernike_matrix(self.n, self.m, np.hypot(x, y)[inside], np.arctan2(y, x)[inside]).T
+        q, r = np.linalg.qr(basis)
+        # Gram-Schmidt signs: positive diagonal of R
+        signs = np.sign(np.diag(r))
+        signs[signs == 0] = 1
+        q, r = q * signs, r * signs[:, np.newaxis]
+        if np.abs(np.diag(r)).min() < 1e-10 * np.abs(np.diag(r)).max():
+            raise ValueError(f"the pupil does not separate the {len(self.n)} polynomials up to n_max={n_max}")
+        # (points, J) orthonormal functions with unit RMS, and their Zernike coefficients (J, J)
+        self.values = np.sqrt(points) * q
+        self.transform = np.sqrt(points) * np.linalg.inv(r).T
+        self._r = r
+        for arr in (self.values, self.transform, self._r):
+            arr.setflags(write=False)
+
+    def __repr__(self):
+        return f"<MaskedBasis(shape={self.shape}, points={len(self.values)}, J={len(self.n)})>"
+
+    def fit(self, zs):
+        """Coefficients (..., J) on the orthonormal basis of surfaces (..., H, W): one product with the cached basis."""
+        samples = np.asarray(zs, dtype=float)[..., self.mask]
+        return samples @ self.values / len(self.values)
+
+    def projection(self, zs):
+        """Naive Zernike coefficients <W, z_j> / <z_j, z_j> over the pupil, the full-disk recipe, biased here."""
+        samples = np.asarray(zs, dtype=float)[..., self.mask]
+        # B^T w = R^T Q^T w and <z_j, z_j> = |R[:, j]|^2
+        inner = (samples @ self.values / np.sqrt(len(self.values))) @ self._r
+        return inner / np.sum(self._r ** 2, axis=0)
+
+    def to_zernike(self, coefs):
+        """Zernike coefficients (..., J) of orthonormal-basis coefficients (..., J)."""
+        return np.asarray(coefs) @ self.transform
+
+    def from_zernike(self, coefs):
+        """Orthonormal-basis coefficients of Zernike coefficients."""
+        return np.linalg.solve(self.transform.T, np.asarray(coefs).T).T
+
+    def reconstruct(self, coefs):
+        """Surfaces (..., H, W) of orthonormal-basis coefficients, NaN outside the pupil."""
+        coefs = np.asarray(coefs, dtype=float)
+        out = np.full(coefs.shape[:-1] + self.shape, np.nan)
+        out[..., self.mask] = coefs @ self.values.T
+        return out
+
+    def evaluate(self, coefs, rho, theta):
+        """Orthonormal-basis expansion evaluated at any (rho, theta), through its Zernike coefficients."""
+        zernike = self.to_zernike(coefs)
+        return np.tensordot(zernike, zernike_matrix(self.n, self.m, rho, theta), axes=1)
+
+    def gram(self):
+        """Gram matrix of the sampled Zernikes scaled to unit RMS, to show how far from orthogonal they are."""
+        # B^T B = R^T R
+        gram = self._r.T @ self._r
+        norms = np.sqrt(np.diag(gram))
+        return gram / np.outer(norms, norms)
+
+
+_pupils = LRUCache(MAX_CACHED_PUPILS)
+
+
+def get_masked_basis(x, y, n_max, mask=None):
+    """MaskedBasis shared by every fit and plot on the same (x, y, mask, n_max) key."""
+    return _pupils.get_or_create((array_key(x, y, mask), n_max), lambda: MaskedBasis(x, y, n_max, mask))
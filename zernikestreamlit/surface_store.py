@@ -0,0 +1,236 @@
+"""Disk-backed store of evaluated polynomial surfaces.
+
+Surfaces are saved as versioned ``.npy`` files keyed by (kind, n, m, ortho_norm,
+resolution) and opened with memory mapping, so that worker restarts and the
+replicas running on one host share the same evaluated arrays through the page
+cache instead of recomputing them. The store is bounded in size: the least
+recently used files are evicted once it grows past ``max_bytes``. The size is
+tracked as a running total, and the directory is listed again every
+``RESYNC_WRITES`` writes so that files written by the other processes sharing
+it are counted too. When neither the cache directory nor the temporary
+directory is writable, surfaces are evaluated in memory instead.
+
+To fill the store ahead of time, for n, m <= 10 like the page inputs:
+
+    python -m zernikestreamlit.surface_store --n-max 10 --resolution 100
+"""
+import argparse
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+import streamlit as st
+
+from zernikestreamlit.basis import GridBasis, trig_table, zernike_matrix
+from zernikestreamlit.cache import counted
+from zernikestreamlit.grid import DEFAULT_MAX_ORDER, DEFAULT_RESOLUTION, PolarGrid, get_grid
+from zernikestreamlit.radial import radial
+
+# bump whenever the evaluation or the grid layout changes, old files are then ignored
+STORE_VERSION = 1
+KINDS = ("radial", "angular", "zernike")
+DEFAULT_MAX_BYTES = 512 * 2 ** 20
+CACHE_DIR_ENV = "ZERNIKESTREAMLIT_CACHE_DIR"
+MAX_BYTES_ENV = "ZERNIKESTREAMLIT_CACHE_MAX_BYTES"
+# writes after which the running size is replaced by a fresh listing of the directory
+RESYNC_WRITES = 32
+
+
+def default_root():
+    root = os.environ.get(CACHE_DIR_ENV)
+    if root:
+        return Path(root)
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "zernikestreamlit" / "surfaces"
+
+
+def is_valid(kind, n, m):
+    if kind == "angular":
+        return True
+    return 0 <= abs(m) <= n and (n - m) % 2 == 0
+
+
+def evaluate_surface(kind, n, m, ortho_norm, grid):
+    """Evaluate a single radial, angular or Zernike surface on ``grid``."""
+    if kind == "zernike":
+        return zernike_matrix([n], [m], grid.rho, grid.theta, ortho_norm)[0]
+    if kind == "radial":
+        values = radial(n, m, grid.rhos, ortho_norm)
+        return np.array(np.broadcast_to(values[np.newaxis, :], grid.shape))
+    if kind == "angular":
+        cos, sin = trig_table(abs(m), grid.thetas)
+        values = cos[m] if m >= 0 else sin[-m]
+        if ortho_norm:
+            values = values / np.sqrt((1 + (m == 0)) * np.pi)
+        return np.array(np.broadcast_to(values[:, np.newaxis], grid.shape))
+    raise ValueError(f"unknown surface kind {kind!r}, expected one of {KINDS}")
+
+
+class SurfaceStore:
+    """Size-bounded directory of memory-mapped surfaces."""
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root is not None else default_root()
+        self.directory = self.root / f"v{STORE_VERSION}"
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if not os.access(self.directory, os.W_OK):
+            raise PermissionError(f"surface store {self.directory} is not writable")
+        # running size of the store, listed on the first write, every RESYNC_WRITES writes and on eviction
+        self._nbytes = None
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<SurfaceStore({str(self.directory)!r}, max_bytes={self.max_bytes})>"
+
+    def path(self, kind, n, m, ortho_norm, resolution):
+        return self.directory / f"{kind}_n{n}_m{m}_{'on' if ortho_norm else 'raw'}_r{resolution}.npy"
+
+    def get(self, kind, n, m, ortho_norm=False, resolution=DEFAULT_RESOLUTION):
+        """Read-only memory-mapped surface, evaluated and saved on the first request.
+
+        Invalid (n, m) pairs give an in-memory array of zeros, as in GridBasis.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"unknown surface kind {kind!r}, expected one of {KINDS}")
+        if not is_valid(kind, n, m):
+            return np.zeros((resolution, resolution))
+        path = self.path(kind, n, m, ortho_norm, resolution)
+        try:
+            surface = np.load(path, mmap_mode="r")
+            os.utime(path)
+            return surface
+        except (FileNotFoundError, ValueError):
+            pass
+        self.put(path, evaluate_surface(kind, n, m, ortho_norm, get_grid(resolution)))
+        return np.load(path, mmap_mode="r")
+
+    def put(self, path, values, evict=True):
+        # write then rename, so that concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(values))
+            size = Path(tmp).stat().st_size
+            replaced = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self._writes += 1
+            if self._nbytes is None or self._writes % RESYNC_WRITES == 0:
+                # other replicas write to the same directory: count their files too
+                self._nbytes = self.nbytes
+            else:
+                self._nbytes += size - replaced
+            overflow = self._nbytes > self.max_bytes
+        if evict and overflow:
+            self.evict()
+
+    def entries(self):
+        """(path, size, last access) of every stored surface, least recently used first."""
+        entries = []
+        for path in self.directory.glob("*.npy"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    @property
+    def nbytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used surfaces until the store fits in ``max_bytes``."""
+        with self._lock:
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            for path, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                # mapped arrays stay valid after unlink, readers just reload next time
+                path.unlink(missing_ok=True)
+                total -= size
+            self._nbytes = total
+
+    def warm_up(self, n_max=DEFAULT_MAX_ORDER, resolution=DEFAULT_RESOLUTION, ortho_norms=(False, True)):
+        """Evaluate and save every surface with n, |m| <= n_max; returns the number of files written.
+
+        The store is evicted once, after the whole batch is written.
+        """
+        grid = PolarGrid(resolution, max(n_max, DEFAULT_MAX_ORDER))
+        written = 0
+        for ortho_norm in ortho_norms:
+            basis = GridBasis(grid, n_max, ortho_norm)
+            surfaces = []
+            for n in range(n_max + 1):
+                for m in range(-n_max, n_max + 1):
+                    if is_valid("zernike", n, m):
+                        surfaces.append(("zernike", n, m, basis.zernike(n, m)))
+                    if m >= 0 and is_valid("radial", n, m):
+                        surfaces.append(("radial", n, m, basis.radial(n, m)))
+            surfaces += [("angular", 0, m, basis.angular(m)) for m in range(-n_max, n_max + 1)]
+            for kind, n, m, values in surfaces:
+                path = self.path(kind, n, m, ortho_norm, resolution)
+                if not path.exists():
+                    self.put(path, values, evict=False)
+                    written += 1
+        if written:
+            self.evict()
+        return written
+
+
+@counted(st.cache_resource)
+def get_store():
+    """SurfaceStore configured from the environment, shared by every session.
+
+    Falls back to the temporary directory when the cache directory is not
+    writable, and to None when neither is.
+    """
+    max_bytes = int(os.environ.get(MAX_BYTES_ENV, DEFAULT_MAX_BYTES))
+    for root in (default_root(), Path(tempfile.gettempdir()) / "zernikestreamlit" / "surfaces"):
+        try:
+            return SurfaceStore(root, max_bytes)
+        except OSError:
+            continue
+    return None
+
+
+@counted(st.cache_resource, max_entries=256)
+def get_surface(kind, n, m, ortho_norm=False, resolution=DEFAULT_RESOLUTION):
+    """Surface from the disk store, memoized in-process on top of the memory map."""
+    store = get_store()
+    if store is not None:
+        return store.get(kind, n, m, ortho_norm, resolution)
+    # no writable directory: evaluate in memory, with the store's conventions
+    if kind not in KINDS:
+        raise ValueError(f"unknown surface kind {kind!r}, expected one of {KINDS}")
+    if not is_valid(kind, n, m):
+        return np.zeros((resolution, resolution))
+    surface = evaluate_surface(kind, n, m, ortho_norm, get_grid(resolution))
+    surface.setflags(write=False)
+    return surface
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the on-disk surface store.")
+    parser.add_argument("--n-max", type=int, default=DEFAULT_MAX_ORDER)
+    parser.add_argument("--resolution", type=int, nargs="+", default=[DEFAULT_RESOLUTION])
+    parser.add_argument("--root", type=Path, default=None, help=f"store directory (default: ${CACHE_DIR_ENV} or ~/.cache)")
+    parser.add_argument("--max-bytes", type=int, default=int(os.environ.get(MAX_BYTES_ENV, DEFAULT_MAX_BYTES)))
+    args = parser.parse_args()
+
+    store = SurfaceStore(args.root, args.max_bytes)
+    for resolution in args.resolution:
+        written = store.warm_up(args.n_max, resolution)
+        print(f"resolution {resolution}: {written} surfaces written")
+    print(f"{store}: {store.nbytes / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Statistics of Zernike coefficient streams: rolling RMS, temporal PSD and modal covariance.
+
+A stream is a (T, J) sequence of Zernike coefficients in OSA order, or a
+(T, H, W) sequence of surfaces, fitted chunk by chunk with the cached fitter of
+``zernikestreamlit.fitting``. Recordings are memory-mapped and read in chunks of
+at most ``CHUNK_BYTES``, and every statistic is accumulated in one pass over the
+chunks. Memory is therefore bounded by the chunk size and the size of the
+results, however long the recording:
+
+- the rolling RMS of every mode over ``window`` frames, from running sums of
+  squares, at ``max_points`` times at most
+- the PSD of every mode by Welch's method: Hann-windowed segments of
+  ``segment`` frames overlapping by half, transformed in batches (one rfft per
+  chunk) and averaged
+- the mean and covariance of the modes by Welford's online algorithm, merging
+  chunk statistics as in Chan et al.
+
+Surfaces are only reconstructed for the frames displayed.
+
+A ``.npy`` file holds a (T, J) coefficient stream or a (T, H, W) surface stream
+sampled on [-1, 1] x [-1, 1]; a ``.npz`` file holds ``x``, ``y`` and a ``z``
+surface stream, as in ``zernikestreamlit.decompose``.
+"""
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+import scipy.fft
+
+from zernikestreamlit.basis import n_max_to_J, osa_nm
+from zernikestreamlit.decompose import open_stack
+from zernikestreamlit.fitting import get_fitter
+
+CHUNK_BYTES = 64 * 2**20
+DEFAULT_RATE = 1000.0
+DEFAULT_WINDOW = 200
+DEFAULT_SEGMENT = 1024
+MAX_POINTS = 2000
+STREAMS_DIR_ENV = "ZERNIKESTREAMLIT_STREAMS_DIR"
+
+
+def default_root():
+    """Directory holding the recordings browsed by the app."""
+    root = os.environ.get(STREAMS_DIR_ENV)
+    if root:
+        return Path(root)
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "zernikestreamlit" / "streams"
+
+
+def J_to_n_max(J):
+    """n_max of a full OSA basis of J polynomials."""
+    n_max = (math.isqrt(8 * J + 1) - 3) // 2
+    if n_max < 0 or n_max_to_J(n_max) != J:
+        raise ValueError(f"{J} coefficients is not a full basis up to some order n, "
+                         f"expected one of {[n_max_to_J(n) for n in range(6)]}, ...")
+    return n_max
+
+
+class CoefficientStream:
+    """(T, J) coefficients or (T, H, W) surfaces sampled at ``rate`` Hz, read chunk by chunk."""
+
+    def __init__(self, frames, n_max=None, x=None, y=None, rate=DEFAULT_RATE, ortho_norm=False):
+        self.frames = frames
+        self.rate = rate
+        self.ortho_norm = ortho_norm
+        if frames.ndim == 2:
+            self.kind = "coefficients"
+            self.n_max = J_to_n_max(frames.shape[1])
+            self.x = self.y = None
+        elif frames.ndim == 3:
+            if n_max is None:
+                raise ValueError("the order n_max to fit a surface stream with is required")
+            self.kind = "surfaces"
+            self.n_max = n_max
+            if x is None:
+                h, w = frames.shape[1:]
+                x, y = np.meshgrid(np.linspace(-1, 1, w), np.linspace(-1, 1, h))
+            self.x, self.y = x, y
+        else:
+            raise ValueError(f"expected a (T, J) or (T, H, W) stream, got shape {frames.shape}")
+        self.J = n_max_to_J(self.n_max)
+
+    def __repr__(self):
+        return f"<CoefficientStream(kind={self.kind!r}, frames={len(self)}, n_max={self.n_max}, rate={self.rate})>"
+
+    def __len__(self):
+        return len(self.frames)
+
+    @classmethod
+    def open(cls, path, n_max=None, rate=DEFAULT_RATE, ortho_norm=False):
+        """Memory-mapped stream of a ``.npy`` or ``.npz`` file."""
+        path = Path(path)
+        if path.suffix == ".npy":
+            frames = np.load(path, mmap_mode="r", allow_pickle=False)
+            if frames.ndim == 2:
+                return cls(frames, rate=rate)
+        x, y, frames = open_stack(path)
+        return cls(frames, n_max, x, y, rate, ortho_norm)
+
+    @property
+    def duration(self):
+        return len(self) / self.rate
+
+    @property
+    def chunk_size(self):
+        """Frames per chunk, at most ``CHUNK_BYTES`` of float64."""
+        frame_bytes = 8 * int(np.prod(self.frames.shape[1:]))
+        return max(1, CHUNK_BYTES // frame_bytes)
+
+    @property
+    def fitter(self):
+        return get_fitter(self.x, self.y, self.n_max, ortho_norm=self.ortho_norm)
+
+    def chunks(self):
+        """(start, coefficients) of consecutive chunks of frames."""
+        fitter = self.fitter if self.kind == "surfaces" else None
+        for start in range(0, len(self), self.chunk_size):
+            chunk = np.asarray(self.frames[start:start + self.chunk_size], dtype=float)
+            yield start, chunk if fitter is None else fitter.fit(chunk)
+
+    def coefficients(self, t):
+        """(J,) coefficients of frame ``t``."""
+        frame = np.asarray(self.frames[t], dtype=float)
+        return frame if self.kind == "coefficients" else self.fitter.fit(frame)
+
+
+class Welford:
+    """Online mean and covariance of (J,) samples, updated by batches."""
+
+    def __init__(self, dim):
+        self.count = 0
+        self.mean = np.zeros(dim)
+        self.m2 = np.zeros((dim, dim))
+
+    def update(self, batch):
+        batch = np.asarray(batch, dtype=float)
+        n = len(batch)
+        if not n:
+            return
+        mean = batch.mean(axis=0)
+        centered = batch - mean
+        total = self.count + n
+        delta = mean - self.mean
+        self.m2 += centered.T @ centered + np.outer(delta, delta) * (self.count * n / total)
+        self.mean += delta * (n / total)
+        self.count = total
+
+    def covariance(self, ddof=1):
+        return self.m2 / max(self.count - ddof, 1)
+
+
+class RollingRMS:
+    """RMS over the ``window`` frames ending at each of ``stops``, from running sums of squares."""
+
+    def __init__(self, dim, window, stops):
+        self.window = window
+        self.stops = np.asarray(stops)
+        # the running sum is only kept where a window starts or ends
+        self.marks = np.union1d(self.stops, self.stops - window)
+        self.sums = np.zeros((len(self.marks), dim))
+        self.total = np.zeros(dim)
+        self.offset = 0
+
+    def update(self, batch):
+        batch = np.asarray(batch, dtype=float)
+        sums = np.cumsum(np.square(batch), axis=0)
+        sums += self.total
+        # sums[i] is the sum of squares of the first offset + i + 1 frames
+        lo, hi = np.searchsorted(self.marks, [self.offset + 1, self.offset + len(batch) + 1])
+        self.sums[lo:hi] = sums[self.marks[lo:hi] - self.offset - 1]
+        self.total = sums[-1]
+        self.offset += len(batch)
+
+    def result(self):
+        end = self.sums[np.searchsorted(self.marks, self.stops)]
+        start = self.sums[np.searchsorted(self.marks, self.stops - self.window)]
+        return np.sqrt(np.maximum(end - start, 0) / self.window)
+
+
+class WelchPSD:
+    """One-sided PSD of (J,) samples at ``rate`` Hz by Welch's method, updated by batches."""
+
+    def __init__(self, dim, segment, rate):
+        self.segment = segment
+        self.hop = segment // 2
+        self.rate = rate
+        # periodic Hann window
+        self.taper = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(segment) / segment)
+        self.sum = np.zeros((segment // 2 + 1, dim))
+        self.segments = 0
+        self._tail = np.zeros((0, dim))
+
+    def update(self, batch):
+        data = np.concatenate([self._tail, np.asarray(batch, dtype=float)])
+        count = (len(data) - self.segment) // self.hop + 1 if len(data) >= self.segment else 0
+        if count:
+            # (count, J, segment) views of the overlapping segments, transformed in one batch
+            segments = np.lib.stride_tricks.sliding_window_view(data, self.segment, axis=0)[::self.hop][:count]
+            spectra = scipy.fft.rfft(segments * self.taper, axis=-1, workers=-1)
+            self.sum += np.sum(np.square(np.abs(spectra)), axis=0).T
+            self.segments += count
+            data = data[count * self.hop:]
+        self._tail = data.copy()
+
+    def frequencies(self):
+        return np.fft.rfftfreq(self.segment, 1 / self.rate)
+
+    def result(self):
+        psd = self.sum / max(self.segments, 1) * 2 / (self.rate * np.sum(self.taper ** 2))
+        psd[0] /= 2
+        if self.segment % 2 == 0:
+            psd[-1] /= 2
+        return psd
+
+
+def analyze(stream, window=DEFAULT_WINDOW, segment=DEFAULT_SEGMENT, max_points=MAX_POINTS, progress=None):
+    """Rolling RMS, PSD, mean and covariance of every mode of ``stream``, in one pass over its chunks.
+
+    ``progress(frames_done, frames)`` is called after every chunk. Returns a
+    dict of ``times`` [s] and ``rms`` (K, J), ``frequencies`` [Hz] and ``psd``
+    (F, J), ``mean`` (J,) and ``covariance`` (J, J).
+    """
+    frames = len(stream)
+    window = min(window, frames)
+    segment = max(2, min(segment, frames))
+    step = max(1, math.ceil((frames - window + 1) / max_points))
+    stops = np.arange(window, frames + 1, step)
+
+    moments = Welford(stream.J)
+    rolling = RollingRMS(stream.J, window, stops)
+    spectrum = WelchPSD(stream.J, segment, stream.rate)
+    for start, coefs in stream.chunks():
+        moments.update(coefs)
+        rolling.update(coefs)
+        spectrum.update(coefs)
+        if progress:
+            progress(start + len(coefs), frames)
+    return {
+        "times": stops / stream.rate,
+        "rms": rolling.result(),
+        "frequencies": spectrum.frequencies(),
+        "psd": spectrum.result(),
+        "mean": moments.mean,
+        "covariance": moments.covariance(),
+    }
+
+
+def demo_stream(frames=20000, n_max=4, rate=DEFAULT_RATE, seed=0):
+    """(frames, J) synthetic AO residuals: AR(1) turbulence falling off with n, and a 50 Hz vibration in tip/tilt."""
+    rng = np.random.default_rng(seed)
+    J = n_max_to_J(n_max)
+    n, _ = osa_nm(J)
+    amplitude = np.where(n > 0, np.maximum(n, 1) ** (-11 / 6), 0.0)
+    # correlation time of a few ms, shorter for higher orders
+    alpha = np.exp(-1 / (rate * 0.005 / np.maximum(n, 1)))
+    noise = rng.normal(size=(frames, J)) * amplitude * np.sqrt(1 - alpha ** 2)
+    coefs = np.empty((frames, J))
+    coefs[0] = noise[0]
+    for t in range(1, frames):
+        coefs[t] = alpha * coefs[t - 1] + noise[t]
+    time = np.arange(frames) / rate
+    coefs[:, 1] += 0.3 * np.sin(2 * np.pi * 50 * time)
+    coefs[:, 2] += 0.2 * np.cos(2 * np.pi * 50 * time + 0.4)
+    return coefs
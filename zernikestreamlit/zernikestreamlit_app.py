@@ -1,13 +1,6 @@
 
 import streamlit as st
 
-from mocapy.zernike import Radial
-
-import numpy as np
-import plotly.graph_objects as go
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-
 
 st.set_page_config(page_title="Zernike documentation", layout="wide")
 